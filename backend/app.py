@@ -1,14 +1,30 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from services import FlightSearchService, HotelService, ActivityService
+from services import FlightSearchService, HotelService, ActivityService, TripService, serpapi_cache, upstream_calls, http_client, serpapi_limiter, image_proxy, hot_refresher, poi_store, http_cache
+from services.models import dumps, is_fallback, loads
 from datetime import datetime, timedelta
+import itertools
 import os
-import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify through services.models.dumps (orjson, slotted result models)"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # n8n webhook URL
@@ -18,6 +34,19 @@ N8N_WEBHOOK_URL = os.environ.get('N8N_WEBHOOK_URL', '')
 flight_service = FlightSearchService()
 hotel_service = HotelService()
 activity_service = ActivityService()
+trip_service = TripService(flight_service, hotel_service, activity_service, deadline=float(os.environ.get('TRIP_DEADLINE', 8)),
+                           max_workers=int(os.environ.get('TRIP_WORKERS', 48)))
+
+def start_background_tasks(traffic_share: float = 1.0):
+    """Start the background threads (hot search refresher); traffic_share is the part of the requests this process serves"""
+    # Un seul worker gunicorn compte les recherches : seuil de popularité ramené à sa part du trafic
+    hot_refresher.min_hits *= traffic_share
+    # Recherches populaires rafraîchies avant expiration du cache (budget SERPAPI_REFRESH_BUDGET / heure)
+    hot_refresher.start()
+
+# Sous gunicorn, démarrés après le fork dans un seul worker (gunicorn.conf.py)
+if os.environ.get('DEFER_BACKGROUND_TASKS', '').lower() not in ('1', 'true', 'yes'):
+    start_background_tasks()
 
 @app.route('/', methods=['GET'])
 def health():
@@ -27,6 +56,28 @@ def health():
 def api_health():
     return jsonify({'status': 'healthy'})
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters of the shared SerpAPI response cache and request coalescing"""
+    return jsonify({
+        'serpapi': serpapi_cache.stats(),
+        'coalescing': upstream_calls.stats(),
+        'http': http_client.stats(),
+        'rate_limit': serpapi_limiter.stats(),
+        'images': image_proxy.stats(),
+        'refresher': hot_refresher.stats(),
+        'pois': poi_store.stats(),
+        'http_cache': http_cache.stats(),
+    })
+
+def cached_json(kind, payload, etag_source=None, partial=False):
+    """JSON search results with ETag / Last-Modified / Cache-Control (304 on revalidation, compressed if large)"""
+    status, body, headers = http_cache.respond(
+        kind, http_cache.resource_key(request.path, request.args.items(multi=True)), dumps(payload), request.headers,
+        etag_source=dumps(etag_source) if etag_source is not None else None, partial=partial
+    )
+    return Response(body, status=status, headers=headers, mimetype='application/json')
+
 @app.route('/api/flights', methods=['GET'])
 def search_flights():
     """Search for flights"""
@@ -40,7 +91,26 @@ def search_flights():
         departure_date_from = request.args.get('departure_date_from')
         departure_date_to = request.args.get('departure_date_to')
         min_stay = int(request.args.get('min_stay', 4))
-        
+
+        # Mode fenêtre flexible : toutes les dates entre departure_date_from et departure_date_to
+        if request.args.get('flexible', '').lower() in ('1', 'true', 'yes'):
+            result = flight_service.search_flights_window(
+                origin_city=origin,
+                destination_city=destination,
+                departure_date_from=departure_date_from,
+                departure_date_to=departure_date_to,
+                min_stay_duration=min_stay,
+                top_n=int(request.args.get('limit', 10)),
+                per_day=int(request.args.get('per_day', 3))
+            )
+
+            return cached_json('flights', {
+                'success': True,
+                'flights': result['flights'],
+                'by_date': result['by_date'],
+                'total': len(result['flights'])
+            }, partial=not result['flights'] or is_fallback(result['flights']))
+
         flights = flight_service.search_flights(
             origin_city=origin,
             destination_city=destination,
@@ -49,15 +119,73 @@ def search_flights():
             min_stay_duration=min_stay
         )
         
-        return jsonify({
+        return cached_json('flights', {
             'success': True,
             'flights': flights,
             'total': len(flights)
-        })
+        }, partial=not flights or is_fallback(flights))
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/flights/stream', methods=['GET'])
+def stream_flights():
+    """Stream flight offers as NDJSON (or SSE with Accept: text/event-stream)"""
+    origin = request.args.get('origin', 'CDG')  # Default Paris
+    destination = request.args.get('destination')
+
+    if not destination:
+        return jsonify({'success': False, 'error': 'Destination parameter is required'}), 400
+
+    try:
+        events = flight_service.stream_flights(
+            origin_city=origin,
+            destination_city=destination,
+            departure_date_from=request.args.get('departure_date_from'),
+            departure_date_to=request.args.get('departure_date_to'),
+            min_stay_duration=int(request.args.get('min_stay', 4)),
+            flexible=request.args.get('flexible', '').lower() in ('1', 'true', 'yes'),
+            top_n=int(request.args.get('limit', 10)),
+            per_day=int(request.args.get('per_day', 3))
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    sse = 'text/event-stream' in request.headers.get('Accept', '')
+
+    def generate():
+        try:
+            for event in events:
+                payload = dumps(event).decode('utf-8')
+                yield f"event: {event['type']}\ndata: {payload}\n\n" if sse else payload + '\n'
+        except Exception as e:
+            error = dumps({'type': 'error', 'error': str(e)}).decode('utf-8')
+            yield f"event: error\ndata: {error}\n\n" if sse else error + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        # Désactive le buffering du proxy nginx pour que chaque offre parte immédiatement
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def parse_hotel_filters(args):
+    """Hotel filter / sort query params present in args (same names as the old /api/hotels/search)"""
+    filters = {}
+    if args.get('price_min'):
+        filters['price_min'] = float(args.get('price_min'))
+    if args.get('price_max'):
+        filters['price_max'] = float(args.get('price_max'))
+    if args.get('hotel_class'):
+        filters['hotel_class'] = args.get('hotel_class')
+    if args.get('hotel_type'):
+        filters['hotel_type'] = args.get('hotel_type')
+    if args.get('free_cancellation', '').lower() in ('1', 'true', 'yes'):
+        filters['free_cancellation'] = True
+    if args.get('sort'):
+        filters['sort'] = args.get('sort')
+    return filters
+
 @app.route('/api/hotels', methods=['GET'])
 def search_hotels():
     """Search for hotels"""
@@ -70,23 +198,93 @@ def search_hotels():
         checkin_date = request.args.get('checkin_date')
         checkout_date = request.args.get('checkout_date')
         adults = int(request.args.get('adults', 2))
+        # deep=1 : plusieurs pages SerpAPI récupérées en parallèle (60-90 hôtels)
+        deep = request.args.get('deep', '').lower() in ('1', 'true', 'yes')
+        # min_results : variantes de recherche jusqu'à ce nombre d'hôtels distincts
+        min_results = int(request.args.get('min_results', 0))
+        filters = parse_hotel_filters(request.args)
         
-        hotels = hotel_service.search_hotels(
+        # Avec des filtres, le jeu d'hôtels du séjour est filtré / trié côté serveur
+        search = hotel_service.filter_hotels if filters else hotel_service.search_hotels
+        hotels = search(
             destination_city=destination,
             checkin_date=checkin_date,
             checkout_date=checkout_date,
-            adults=adults
+            adults=adults,
+            deep=deep,
+            min_results=min_results,
+            **filters
         )
         
-        return jsonify({
+        return cached_json('hotels', {
             'success': True,
             'hotels': hotels,
             'total': len(hotels)
-        })
+        }, partial=not hotels or is_fallback(hotels))
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/hotels/grid', methods=['GET'])
+def search_hotels_grid():
+    """Cheapest nightly prices over a check-in date × stay length grid"""
+    try:
+        destination = request.args.get('destination')
+        
+        if not destination:
+            return jsonify({'success': False, 'error': 'Destination parameter is required'}), 400
+        
+        nights = [n for n in request.args.get('nights', '2,3,4,5').split(',') if n.strip()]
+        
+        grid = hotel_service.search_hotels_grid(
+            destination_city=destination,
+            checkin_from=request.args.get('checkin_from'),
+            checkin_to=request.args.get('checkin_to'),
+            nights=nights,
+            adults=int(request.args.get('adults', 2)),
+            top_n=int(request.args.get('limit', 10))
+        )
+        
+        return jsonify({'success': True, **grid})
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def send_image(image):
+    """Cached image response with ETag / Last-Modified (conditional requests get a 304)"""
+    if image is None:
+        return jsonify({'success': False, 'error': 'Image unavailable'}), 404
+    path, content_type, etag = image
+    return send_file(path, mimetype=content_type, etag=etag, conditional=True, max_age=image_proxy.max_age)
+
+@app.route('/api/images', methods=['GET'])
+def proxy_image():
+    """Remote hotel image served from the local image cache"""
+    src = request.args.get('src')
+    
+    if not src:
+        return jsonify({'success': False, 'error': 'src parameter is required'}), 400
+    
+    if not image_proxy.is_allowed(src):
+        return jsonify({'success': False, 'error': 'Image host not allowed'}), 403
+    
+    return send_image(image_proxy.get(src, request.args.get('w', type=int)))
+
+@app.route('/api/images/places/<path:photo_reference>', methods=['GET'])
+def proxy_places_photo(photo_reference):
+    """Google Places photo served from the local image cache (API key kept server-side)"""
+    signature = request.args.get('sig')
+
+    # Seules les références émises par le backend (URL signée) sont relayées avec la clé
+    if not image_proxy.is_signed(photo_reference, signature):
+        return jsonify({'success': False, 'error': 'Invalid photo signature'}), 403
+
+    return send_image(image_proxy.get_places_photo(photo_reference, request.args.get('w', 400, type=int), signature))
+
 @app.route('/api/activities', methods=['GET'])
 def search_activities():
     """Search for activities"""
@@ -96,14 +294,144 @@ def search_activities():
         if not destination:
             return jsonify({'success': False, 'error': 'Destination parameter is required'}), 400
 
-        activities = activity_service.search_activities(destination_city=destination)
+        # timeout : délai commun aux catégories Places (ACTIVITY_DEADLINE par défaut)
+        deadline = request.args.get('timeout')
+        result = activity_service.search_activities_timed(
+            destination_city=destination,
+            deadline=float(deadline) if deadline else None
+        )
+
+        # Les durées par catégorie varient à chaque requête : hors ETag
+        return cached_json('activities', {
+            'success': True,
+            'activities': result['activities'],
+            'categories': result['categories'],
+            'total': len(result['activities'])
+        }, etag_source=result['activities'], partial=any(c['status'] == 'timeout' for c in result['categories'].values()))
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/activities/more', methods=['GET'])
+def more_activities():
+    """Next activities of one category, served from the places already fetched (no upstream call)"""
+    try:
+        destination = request.args.get('destination')
+        category = request.args.get('category')
+
+        if not destination or not category:
+            return jsonify({'success': False, 'error': 'destination and category parameters are required'}), 400
+
+        result = activity_service.more_activities(
+            destination_city=destination,
+            place_type=category,
+            offset=int(request.args.get('offset', 0)),
+            limit=int(request.args.get('limit', 8))
+        )
 
         return jsonify({
             'success': True,
-            'activities': activities,
-            'total': len(activities)
+            'activities': result['activities'],
+            'next_offset': result['next_offset'],
+            'total': len(result['activities'])
         })
 
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/activities/batch', methods=['POST'])
+def search_activities_batch():
+    """Activities of several destinations, streamed per city as NDJSON (or SSE with Accept: text/event-stream)"""
+    data = request.get_json(silent=True) or {}
+    destinations = data.get('destinations')
+
+    if not isinstance(destinations, list) or not destinations:
+        return jsonify({'success': False, 'error': 'destinations must be a non-empty list'}), 400
+
+    try:
+        deadline = float(data['timeout']) if data.get('timeout') else None
+        events = activity_service.stream_activities_batch([str(name) for name in destinations], deadline=deadline)
+        # Première ville générée ici : les erreurs de validation restent des 400
+        first = next(events)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    sse = 'text/event-stream' in request.headers.get('Accept', '')
+
+    def generate():
+        try:
+            for event in itertools.chain([first], events):
+                payload = dumps(event).decode('utf-8')
+                yield f"event: {event['type']}\ndata: {payload}\n\n" if sse else payload + '\n'
+        except Exception as e:
+            error = dumps({'type': 'error', 'error': str(e)}).decode('utf-8')
+            yield f"event: error\ndata: {error}\n\n" if sse else error + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/pois', methods=['GET'])
+def search_pois():
+    """Points of interest from the local POI store (no upstream call).
+
+    Either bbox=south,west,north,east or a center (lat/lng, or a known
+    destination) with a radius in meters; category is a Places type.
+    """
+    try:
+        category = request.args.get('category')
+        limit = int(request.args.get('limit', 50))
+
+        if request.args.get('bbox'):
+            south, west, north, east = (float(value) for value in request.args.get('bbox').split(','))
+            pois = poi_store.query_bbox(south, west, north, east, category=category, limit=limit)
+        else:
+            if request.args.get('destination'):
+                center = activity_service.city_coordinates.get(request.args.get('destination').lower())
+                if center is None:
+                    return jsonify({'success': False, 'error': 'Unknown destination'}), 404
+                lat, lng = center
+            elif request.args.get('lat') and request.args.get('lng'):
+                lat, lng = float(request.args.get('lat')), float(request.args.get('lng'))
+            else:
+                return jsonify({'success': False, 'error': 'bbox, lat/lng or destination parameter is required'}), 400
+            radius = float(request.args.get('radius', 2000))
+            pois = poi_store.query_radius(lat, lng, radius, category=category, limit=limit)
+
+        return jsonify({'success': True, 'pois': pois, 'total': len(pois)})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/trip', methods=['GET'])
+def plan_trip():
+    """Flights, hotels and activities for one destination in a single round trip"""
+    try:
+        destination = request.args.get('destination')
+
+        if not destination:
+            return jsonify({'success': False, 'error': 'Destination parameter is required'}), 400
+
+        deadline = request.args.get('timeout')
+
+        trip = trip_service.plan_trip(
+            destination=destination,
+            origin=request.args.get('origin', 'CDG'),
+            checkin_date=request.args.get('checkin_date'),
+            checkout_date=request.args.get('checkout_date'),
+            adults=int(request.args.get('adults', 2)),
+            min_stay=int(request.args.get('min_stay', 4)),
+            deadline=float(deadline) if deadline else None
+        )
+
+        return jsonify(dict(trip, success=True))
+
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -117,7 +445,7 @@ def converse():
         # Try n8n webhook first if configured
         if N8N_WEBHOOK_URL:
             try:
-                n8n_response = requests.post(
+                n8n_response = http_client.post(
                     N8N_WEBHOOK_URL,
                     json={
                         'message': message,
@@ -140,58 +468,62 @@ def converse():
                 print(f"n8n webhook error: {n8n_error}. Falling back to local intent detection.")
 
         # Fallback: Local intent detection (if n8n not configured or failed)
-        message_lower = message.lower()
-        response = {
-            'text': '',
-            'actions': []
-        }
-
-        # Detect hotels intent
-        if any(word in message_lower for word in ['hotel', 'hôtel', 'hébergement', 'logement', 'dormir', 'sejour', 'séjour']):
-            destination = extract_destination(message_lower)
-            if destination:
-                response['text'] = f"Parfait ! Je vais vous trouver les meilleurs hôtels à {destination.capitalize()}. Laissez-moi rechercher..."
-                response['actions'] = [{
-                    'type': 'navigate',
-                    'url': f'/hotels?destination={destination}'
-                }]
-            else:
-                response['text'] = "Pour quelle destination souhaitez-vous rechercher des hôtels ?"
-
-        # Detect flights intent
-        elif any(word in message_lower for word in ['vol', 'vols', 'avion', 'billet', 'voler', 'partir', 'aller']):
-            destination = extract_destination(message_lower)
-            if destination:
-                response['text'] = f"Parfait ! Je vais vous trouver les meilleurs vols pour {destination.capitalize()}. Laissez-moi rechercher..."
-                response['actions'] = [{
-                    'type': 'navigate',
-                    'url': f'/vols?destination={destination}'
-                }]
-            else:
-                response['text'] = "Pour quelle destination souhaitez-vous rechercher des vols ?"
-
-        # Detect activities intent
-        elif any(word in message_lower for word in ['activité', 'activite', 'visite', 'faire', 'attraction', 'chose', 'excursion', 'tour']):
-            destination = extract_destination(message_lower)
-            if destination:
-                response['text'] = f"Parfait ! Je vais vous trouver les meilleures activités à {destination.capitalize()}. Laissez-moi rechercher..."
-                response['actions'] = [{
-                    'type': 'navigate',
-                    'url': f'/activites?destination={destination}'
-                }]
-            else:
-                response['text'] = "Pour quelle destination souhaitez-vous rechercher des activités ?"
-
-        # Default response
-        else:
-            response['text'] = "Bonjour ! Je suis votre assistant voyage. Je peux vous aider à trouver des vols, des hôtels ou des activités pour votre prochaine destination. Par exemple, dites-moi \"Je veux un vol pour Paris\" ou \"Trouve-moi des hôtels à Barcelone\"."
-
-        return jsonify(response)
+        return jsonify(detect_intent(message))
 
     except Exception as e:
         print(f"Error in /api/converse: {str(e)}")
         return jsonify({'text': f'Erreur: {str(e)}'}), 500
 
+def detect_intent(message):
+    """Local intent detection used when n8n is not configured or fails"""
+    message_lower = message.lower()
+    response = {
+        'text': '',
+        'actions': []
+    }
+
+    # Detect hotels intent
+    if any(word in message_lower for word in ['hotel', 'hôtel', 'hébergement', 'logement', 'dormir', 'sejour', 'séjour']):
+        destination = extract_destination(message_lower)
+        if destination:
+            response['text'] = f"Parfait ! Je vais vous trouver les meilleurs hôtels à {destination.capitalize()}. Laissez-moi rechercher..."
+            response['actions'] = [{
+                'type': 'navigate',
+                'url': f'/hotels?destination={destination}'
+            }]
+        else:
+            response['text'] = "Pour quelle destination souhaitez-vous rechercher des hôtels ?"
+
+    # Detect flights intent
+    elif any(word in message_lower for word in ['vol', 'vols', 'avion', 'billet', 'voler', 'partir', 'aller']):
+        destination = extract_destination(message_lower)
+        if destination:
+            response['text'] = f"Parfait ! Je vais vous trouver les meilleurs vols pour {destination.capitalize()}. Laissez-moi rechercher..."
+            response['actions'] = [{
+                'type': 'navigate',
+                'url': f'/vols?destination={destination}'
+            }]
+        else:
+            response['text'] = "Pour quelle destination souhaitez-vous rechercher des vols ?"
+
+    # Detect activities intent
+    elif any(word in message_lower for word in ['activité', 'activite', 'visite', 'faire', 'attraction', 'chose', 'excursion', 'tour']):
+        destination = extract_destination(message_lower)
+        if destination:
+            response['text'] = f"Parfait ! Je vais vous trouver les meilleures activités à {destination.capitalize()}. Laissez-moi rechercher..."
+            response['actions'] = [{
+                'type': 'navigate',
+                'url': f'/activites?destination={destination}'
+            }]
+        else:
+            response['text'] = "Pour quelle destination souhaitez-vous rechercher des activités ?"
+
+    # Default response
+    else:
+        response['text'] = "Bonjour ! Je suis votre assistant voyage. Je peux vous aider à trouver des vols, des hôtels ou des activités pour votre prochaine destination. Par exemple, dites-moi \"Je veux un vol pour Paris\" ou \"Trouve-moi des hôtels à Barcelone\"."
+
+    return response
+
 def extract_destination(message):
     """Extract destination from message"""
     # Common French prepositions for destinations
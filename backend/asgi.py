@@ -0,0 +1,239 @@
+"""
+ASGI entry point for the backend.
+
+/api/flights, /api/hotels, /api/hotels/grid, /api/activities and /api/converse
+are served by the asyncio service layer (one process keeps hundreds of
+upstream searches open without blocking a worker each). Every other route is delegated to the
+Flask app from app.py, so the /api/* contract stays identical.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, detect_intent, parse_hotel_filters, N8N_WEBHOOK_URL
+from services import (
+    AsyncFlightSearchService, AsyncHotelService, AsyncActivityService,
+    async_http_client, async_upstream_calls, serpapi_cache, serpapi_limiter, hot_refresher, http_cache,
+)
+from services.models import dumps, is_fallback
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSONResponse encoding result models through services.models.dumps"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def cached_json(request, kind, payload, etag_source=None, partial=False):
+    """JSON search results with ETag / Last-Modified / Cache-Control (304 on revalidation, compressed if large)"""
+    status, body, headers = http_cache.respond(
+        kind, http_cache.resource_key(request.url.path, request.query_params.multi_items()), dumps(payload), request.headers,
+        etag_source=dumps(etag_source) if etag_source is not None else None, partial=partial
+    )
+    return Response(body, status_code=status, headers=headers, media_type='application/json')
+
+
+flight_service = AsyncFlightSearchService()
+hotel_service = AsyncHotelService()
+activity_service = AsyncActivityService()
+
+
+async def search_flights(request):
+    """Search for flights"""
+    try:
+        args = request.query_params
+        origin = args.get('origin', 'CDG')  # Default Paris
+        destination = args.get('destination')
+
+        if not destination:
+            return ModelJSONResponse({'success': False, 'error': 'Destination parameter is required'}, status_code=400)
+
+        departure_date_from = args.get('departure_date_from')
+        departure_date_to = args.get('departure_date_to')
+        min_stay = int(args.get('min_stay', 4))
+
+        if args.get('flexible', '').lower() in ('1', 'true', 'yes'):
+            result = await flight_service.search_flights_window(
+                origin_city=origin,
+                destination_city=destination,
+                departure_date_from=departure_date_from,
+                departure_date_to=departure_date_to,
+                min_stay_duration=min_stay,
+                top_n=int(args.get('limit', 10)),
+                per_day=int(args.get('per_day', 3))
+            )
+
+            return cached_json(request, 'flights', {
+                'success': True,
+                'flights': result['flights'],
+                'by_date': result['by_date'],
+                'total': len(result['flights'])
+            }, partial=not result['flights'] or is_fallback(result['flights']))
+
+        flights = await flight_service.search_flights(
+            origin_city=origin,
+            destination_city=destination,
+            departure_date_from=departure_date_from,
+            departure_date_to=departure_date_to,
+            min_stay_duration=min_stay
+        )
+
+        return cached_json(request, 'flights', {'success': True, 'flights': flights, 'total': len(flights)}, partial=not flights or is_fallback(flights))
+
+    except Exception as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def search_hotels(request):
+    """Search for hotels"""
+    try:
+        args = request.query_params
+        destination = args.get('destination')
+
+        if not destination:
+            return ModelJSONResponse({'success': False, 'error': 'Destination parameter is required'}, status_code=400)
+
+        filters = parse_hotel_filters(args)
+        search = hotel_service.filter_hotels if filters else hotel_service.search_hotels
+        hotels = await search(
+            destination_city=destination,
+            checkin_date=args.get('checkin_date'),
+            checkout_date=args.get('checkout_date'),
+            adults=int(args.get('adults', 2)),
+            deep=args.get('deep', '').lower() in ('1', 'true', 'yes'),
+            min_results=int(args.get('min_results', 0)),
+            **filters
+        )
+
+        return cached_json(request, 'hotels', {'success': True, 'hotels': hotels, 'total': len(hotels)}, partial=not hotels or is_fallback(hotels))
+
+    except ValueError as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except Exception as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def search_hotels_grid(request):
+    """Cheapest nightly prices over a check-in date × stay length grid"""
+    try:
+        args = request.query_params
+        destination = args.get('destination')
+
+        if not destination:
+            return ModelJSONResponse({'success': False, 'error': 'Destination parameter is required'}, status_code=400)
+
+        grid = await hotel_service.search_hotels_grid(
+            destination_city=destination,
+            checkin_from=args.get('checkin_from'),
+            checkin_to=args.get('checkin_to'),
+            nights=[n for n in args.get('nights', '2,3,4,5').split(',') if n.strip()],
+            adults=int(args.get('adults', 2)),
+            top_n=int(args.get('limit', 10))
+        )
+
+        return ModelJSONResponse({'success': True, **grid})
+
+    except ValueError as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except Exception as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def search_activities(request):
+    """Search for activities"""
+    try:
+        destination = request.query_params.get('destination')
+
+        if not destination:
+            return ModelJSONResponse({'success': False, 'error': 'Destination parameter is required'}, status_code=400)
+
+        deadline = request.query_params.get('timeout')
+        result = await activity_service.search_activities_timed(
+            destination_city=destination,
+            deadline=float(deadline) if deadline else None
+        )
+
+        return cached_json(request, 'activities', {
+            'success': True,
+            'activities': result['activities'],
+            'categories': result['categories'],
+            'total': len(result['activities'])
+        }, etag_source=result['activities'], partial=any(c['status'] == 'timeout' for c in result['categories'].values()))
+
+    except Exception as e:
+        return ModelJSONResponse({'success': False, 'error': str(e)}, status_code=500)
+
+
+async def converse(request):
+    """Handle chatbot conversation via n8n + Gemini or fallback to local intent detection"""
+    try:
+        data = await request.json()
+        message = data.get('message', '')
+
+        if N8N_WEBHOOK_URL:
+            try:
+                n8n_response = await async_http_client.post(
+                    N8N_WEBHOOK_URL,
+                    json={'message': message, 'timestamp': datetime.now().isoformat()},
+                    timeout=10
+                )
+
+                if n8n_response.status_code == 200:
+                    n8n_data = n8n_response.json()
+                    return ModelJSONResponse({
+                        'text': n8n_data.get('response', 'Désolé, je n\'ai pas compris.'),
+                        'actions': n8n_data.get('actions', [])
+                    })
+            except Exception as n8n_error:
+                print(f"n8n webhook error: {n8n_error}. Falling back to local intent detection.")
+
+        return ModelJSONResponse(detect_intent(message))
+
+    except Exception as e:
+        print(f"Error in /api/converse: {str(e)}")
+        return ModelJSONResponse({'text': f'Erreur: {str(e)}'}, status_code=500)
+
+
+async def cache_stats(request):
+    """Cache, coalescing and HTTP counters of the async layer"""
+    return ModelJSONResponse({
+        'serpapi': serpapi_cache.stats(),
+        'coalescing': async_upstream_calls.stats(),
+        'http': async_http_client.stats(),
+        'rate_limit': serpapi_limiter.stats(),
+        'refresher': hot_refresher.stats(),
+        'http_cache': http_cache.stats(),
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    hot_refresher.stop(timeout=5)
+    await async_http_client.aclose()
+
+
+application = Starlette(
+    routes=[
+        Route('/api/flights', search_flights, methods=['GET']),
+        Route('/api/hotels', search_hotels, methods=['GET']),
+        Route('/api/hotels/grid', search_hotels_grid, methods=['GET']),
+        Route('/api/activities', search_activities, methods=['GET']),
+        Route('/api/converse', converse, methods=['POST']),
+        Route('/api/cache/stats', cache_stats, methods=['GET']),
+        # Toutes les autres routes restent servies par l'app Flask
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
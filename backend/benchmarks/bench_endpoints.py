@@ -0,0 +1,308 @@
+"""
+Offline load benchmark of the HTTP endpoints of backend/app.py and backend/vol/app.py.
+
+Starts benchmarks/stub_upstream.py in-process (recorded payloads, injected
+latency and errors), launches each backend in a subprocess pointed at the
+stub, then drives every selected endpoint with --requests calls spread over
+--concurrency client threads. For each endpoint it reports p50/p95/p99
+latency, throughput, non-2xx responses and the RSS of the server process
+and its workers (at the end of the run and peak sampled during it; pages
+shared copy-on-write by preloaded gunicorn workers are counted per worker).
+
+    flights     GET  /api/flights      (backend/app.py)
+    hotels      GET  /api/hotels
+    activities  GET  /api/activities
+    converse    POST /api/converse
+    search      POST /search           (backend/vol/app.py, Ryanair)
+
+--cache cold disables the SerpAPI response cache and the offer store so
+every request reaches the stub; --cache warm keeps them (steady state after
+the first hit). --variants spreads the requests over that many distinct
+dates so single-flight coalescing does not hide the upstream cost.
+
+--server gunicorn serves backend/app.py as in production (gunicorn.conf.py)
+with --worker-class sync / gthread / gevent, --workers and --threads; raise
+--latency to compare worker models under slow upstreams.
+
+Usage (from backend/):
+    python benchmarks/bench_endpoints.py --requests 300 --concurrency 16 --latency 80 --jitter 40
+    python benchmarks/bench_endpoints.py --server asgi --endpoints flights,hotels --cache warm
+    python benchmarks/bench_endpoints.py --server gunicorn --worker-class gevent --workers 2 --latency 800 --concurrency 64
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stub_upstream import StubUpstream  # noqa: E402
+
+ENDPOINTS = ('flights', 'hotels', 'activities', 'converse', 'search')
+
+# Commandes de lancement : serveur de dev Flask (threaded), gunicorn (wsgi.py) ou uvicorn pour asgi.py
+FLASK_COMMAND = "from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"
+GUNICORN_COMMAND = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{port}', 'wsgi:app']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def build_request(endpoint: str, i: int, variants: int):
+    """(method, path, query params, json body) of the i-th request"""
+    day = date.today() + timedelta(days=30 + i % variants)
+    checkout = day + timedelta(days=4)
+    if endpoint == 'flights':
+        return 'GET', '/api/flights', {'origin': 'CDG', 'destination': 'BCN', 'departure_date_from': day.isoformat()}, None
+    if endpoint == 'hotels':
+        return 'GET', '/api/hotels', {'destination': 'Barcelone', 'checkin_date': day.isoformat(), 'checkout_date': checkout.isoformat()}, None
+    if endpoint == 'activities':
+        return 'GET', '/api/activities', {'destination': 'barcelone'}, None
+    if endpoint == 'converse':
+        return 'POST', '/api/converse', None, {'message': f'Je veux partir à Barcelone le {day.isoformat()}'}
+    return 'POST', '/search', None, {
+        'origin_city': 'Charleroi',
+        'destination_city': 'Barcelona',
+        'departure_date': day.isoformat(),
+        'return_date': checkout.isoformat() if i % 2 else None,
+    }
+
+
+def read_rss(pid: int):
+    """Resident set size of pid in bytes (None if unavailable)"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return int(subprocess.check_output(['ps', '-o', 'rss=', '-p', str(pid)])) * 1024
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def child_pids(pid: int):
+    """Direct children of pid (Linux /proc)"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            return [int(child) for child in children.read().split()]
+    except OSError:
+        return []
+
+
+def tree_rss(pid: int):
+    """RSS of pid and all its descendants (gunicorn master + workers), None if unavailable"""
+    total, pending = None, [pid]
+    while pending:
+        current = pending.pop()
+        rss = read_rss(current)
+        if rss:
+            total = (total or 0) + rss
+        pending.extend(child_pids(current))
+    return total
+
+
+class Backend:
+    """A backend app running in a subprocess on a free port"""
+
+    def __init__(self, name: str, command: list, cwd: str, env: dict, health_path: str):
+        self.name = name
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.health_path = health_path
+        self.process = subprocess.Popen(
+            [arg.format(port=self.port) for arg in command], cwd=cwd, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def wait_ready(self, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with code {self.process.returncode}")
+            try:
+                if requests.get(self.base_url + self.health_path, timeout=1).status_code == 200:
+                    return self
+            except requests.RequestException:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"{self.name} not ready after {timeout}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def run_endpoint(backend: Backend, endpoint: str, total: int, concurrency: int, variants: int, timeout: float):
+    """Drive one endpoint and return its latency / throughput / RSS summary"""
+    local = threading.local()
+    rss_samples = []
+    sampling = threading.Event()
+
+    def sample_rss():
+        while not sampling.wait(0.05):
+            rss = tree_rss(backend.process.pid)
+            if rss:
+                rss_samples.append(rss)
+
+    def call(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, path, params, body = build_request(endpoint, i, variants)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, backend.base_url + path, params=params, json=body, timeout=timeout)
+            response.content
+            ok = 200 <= response.status_code < 300
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+    sampling.set()
+    sampler.join()
+
+    latencies = [latency * 1000 for latency, _ in results]
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    rss = tree_rss(backend.process.pid)
+    return {
+        'endpoint': endpoint,
+        'requests': total,
+        'errors': sum(1 for _, ok in results if not ok),
+        'p50_ms': round(cuts[49], 1),
+        'p95_ms': round(cuts[94], 1),
+        'p99_ms': round(cuts[98], 1),
+        'throughput_rps': round(total / elapsed, 1),
+        'rss_mib': round(rss / 2 ** 20, 1) if rss else None,
+        'peak_rss_mib': round(max(rss_samples + [rss or 0]) / 2 ** 20, 1) if rss_samples or rss else None,
+    }
+
+
+def backend_env(stub: StubUpstream, cache: str, store_dir: str) -> dict:
+    env = dict(os.environ, **stub.env())
+    env.update({
+        'SERPAPI_KEY': 'bench',
+        'GOOGLE_MAPS_API_KEY': 'bench',
+        'OFFER_STORE_PATH': os.path.join(store_dir, 'offers.db'),
+        'POI_STORE_PATH': os.path.join(store_dir, 'pois.db'),
+        'PYTHONUNBUFFERED': '1',
+    })
+    if cache == 'cold':
+        env['SERPAPI_CACHE_MAX_ENTRIES'] = '0'
+        env['OFFER_STORE_MAX_AGE'] = '-1'
+        env['POI_MAX_AGE'] = '-1'
+    return env
+
+
+def print_report(results, args):
+    server = args.server
+    if server == 'gunicorn':
+        server += f" ({args.workers} {args.worker_class} workers" + (f" x {args.threads} threads)" if args.worker_class == 'gthread' else ')')
+    print(f"\n{args.requests} requests/endpoint, concurrency {args.concurrency}, server {server}, cache {args.cache}, "
+          f"upstream latency {args.latency:g}+{args.jitter:g} ms, error rate {args.error_rate:g}")
+    header = f"{'endpoint':<12}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'RSS MiB':>10}{'peak MiB':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['endpoint']:<12}{r['errors']:>8}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['throughput_rps']:>10}{str(r['rss_mib']):>10}{str(r['peak_rss_mib']):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help='comma separated subset of ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per endpoint before measuring')
+    parser.add_argument('--variants', type=int, default=30, help='distinct dates spread over the requests')
+    parser.add_argument('--timeout', type=float, default=30.0, help='client timeout per request (s)')
+    parser.add_argument('--server', choices=('flask', 'asgi', 'gunicorn'), default='flask', help='how backend/app.py is served')
+    parser.add_argument('--worker-class', choices=('sync', 'gthread', 'gevent'), default='gthread', help='gunicorn worker model')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--worker-connections', type=int, default=1000, help='concurrent requests per gevent worker')
+    parser.add_argument('--cache', choices=('cold', 'warm'), default='cold')
+    parser.add_argument('--latency', type=float, default=50.0, help='upstream base latency (ms)')
+    parser.add_argument('--jitter', type=float, default=25.0, help='upstream extra uniform latency (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of upstream responses replaced by a 503')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    stub = StubUpstream(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=1).start()
+    store_dir = tempfile.mkdtemp(prefix='bench-store-')
+    env = backend_env(stub, args.cache, store_dir)
+
+    if args.server == 'asgi':
+        api_command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning']
+    elif args.server == 'gunicorn':
+        api_command = GUNICORN_COMMAND
+        env.update({
+            'GUNICORN_WORKER_CLASS': args.worker_class,
+            'GUNICORN_WORKERS': str(args.workers),
+            'GUNICORN_THREADS': str(args.threads),
+            'GUNICORN_WORKER_CONNECTIONS': str(args.worker_connections),
+            'GUNICORN_ACCESS_LOG': '',
+        })
+    else:
+        api_command = [sys.executable, '-c', FLASK_COMMAND]
+
+    backends = {}
+    results = []
+    try:
+        if set(endpoints) - {'search'}:
+            backends['api'] = Backend('backend/app.py', api_command, BACKEND_DIR, env, '/api/health').wait_ready()
+        if 'search' in endpoints:
+            backends['vol'] = Backend('backend/vol/app.py', [sys.executable, '-c', FLASK_COMMAND],
+                                      os.path.join(BACKEND_DIR, 'vol'), env, '/health').wait_ready()
+
+        for endpoint in endpoints:
+            backend = backends['vol' if endpoint == 'search' else 'api']
+            if args.warmup:
+                run_endpoint(backend, endpoint, args.warmup, min(args.concurrency, args.warmup), args.variants, args.timeout)
+            results.append(run_endpoint(backend, endpoint, args.requests, args.concurrency, args.variants, args.timeout))
+            print(f"{endpoint}: done")
+    finally:
+        for backend in backends.values():
+            backend.stop()
+        stub.stop()
+
+    print_report(results, args)
+    print(f"upstream calls: {stub.stats()}")
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'settings': vars(args), 'results': results, 'upstream': stub.stats()}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
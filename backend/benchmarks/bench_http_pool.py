@@ -0,0 +1,96 @@
+"""
+Benchmark: pooled keep-alive HttpClient vs module-level requests.get.
+
+Starts a local HTTPS stub (self-signed certificate generated with the
+openssl CLI) and times N sequential GETs with both clients. The difference
+is the TCP+TLS handshake paid on every call without a shared pool.
+
+Usage (from backend/):
+    python benchmarks/bench_http_pool.py --requests 200
+"""
+import argparse
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.http_pool import HttpClient  # noqa: E402
+
+PAYLOAD = b'{"status": "OK", "results": []}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_certificate(directory):
+    """Generate a self-signed certificate for localhost"""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key, '-out', cert, '-subj', '/CN=localhost',
+         '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+
+def start_stub(cert, key):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, get, url, count, cert):
+    get(url, verify=cert)  # warm-up
+    start = time.perf_counter()
+    for _ in range(count):
+        get(url, verify=cert).content
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>5} req  {elapsed:7.3f} s  {elapsed / count * 1000:7.2f} ms/req")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server = start_stub(cert, key)
+        url = f"https://localhost:{server.server_address[1]}/search.json"
+
+        client = HttpClient()
+        baseline = run('requests.get (no pool)', lambda u, **kw: requests.get(u, timeout=10, **kw), url, args.requests, cert)
+        pooled = run('HttpClient (keep-alive)', lambda u, **kw: client.get(u, timeout=10, **kw), url, args.requests, cert)
+        print(f"speedup: x{baseline / pooled:.1f}")
+
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: ad-hoc result dicts + json vs slotted models + services.models.dumps.
+
+For a payload of N flight offers (default 1000) it reports, for each
+representation: allocated blocks and peak memory while building the
+offers (tracemalloc), and the best serialization time of the
+{'success', 'flights', 'total'} response body.
+
+Usage (from backend/):
+    python benchmarks/bench_models.py --offers 1000 --repeat 50
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.models import FlightOffer, dumps, orjson  # noqa: E402
+
+
+def build_dicts(count):
+    return [
+        {
+            'airline': f'Airline {i % 7}',
+            'departure': 'CDG',
+            'arrival': 'BCN',
+            'departureTime': '08:30',
+            'arrivalTime': '10:45',
+            'departureDate': '2025-11-01',
+            'returnDate': '2025-11-05',
+            'price': 40 + i % 90,
+            'duration': '2h15',
+            'stops': i % 2,
+            'booking_link': f'https://www.google.com/travel/flights/booking?token={i:032d}',
+        }
+        for i in range(count)
+    ]
+
+
+def build_models(count):
+    return [
+        FlightOffer(
+            airline=f'Airline {i % 7}',
+            departure='CDG',
+            arrival='BCN',
+            departureTime='08:30',
+            arrivalTime='10:45',
+            departureDate='2025-11-01',
+            returnDate='2025-11-05',
+            price=40 + i % 90,
+            duration='2h15',
+            stops=i % 2,
+            booking_link=f'https://www.google.com/travel/flights/booking?token={i:032d}',
+        )
+        for i in range(count)
+    ]
+
+
+def measure_build(builder, count):
+    """(allocated blocks, current bytes, peak bytes) while building the offers"""
+    tracemalloc.start()
+    offers = builder(count)
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    del offers
+    return blocks, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    dicts = build_dicts(args.offers)
+    models = build_models(args.offers)
+    # Encodage équivalent au jsonify par défaut de Flask
+    dict_encode = lambda: json.dumps({'success': True, 'flights': dicts, 'total': len(dicts)}).encode('utf-8')
+    model_encode = lambda: dumps({'success': True, 'flights': models, 'total': len(models)})
+
+    assert json.loads(dict_encode()) == json.loads(model_encode())
+
+    print(f"{args.offers} flight offers, serializer: {'orjson' if orjson else 'json (orjson not installed)'}")
+    print(f"{'':<22}{'blocks':>10}{'current KiB':>14}{'peak KiB':>12}{'encode ms':>12}")
+    for label, builder, encode in (('dict + json.dumps', build_dicts, dict_encode), ('FlightOffer + dumps', build_models, model_encode)):
+        blocks, current, peak = measure_build(builder, args.offers)
+        best = min(timeit.repeat(encode, number=1, repeat=args.repeat)) * 1000
+        print(f"{label:<22}{blocks:>10}{current / 1024:>14.1f}{peak / 1024:>12.1f}{best:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
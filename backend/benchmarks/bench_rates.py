@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: the former two-pass hotel price extraction vs RateNormalizer.
+
+The former code walked the rate fields and ran re.findall twice per hotel
+(once for the display price, once for the numeric one). RateNormalizer
+parses each rate once with precompiled patterns and normalizes a whole
+`properties` page in one call.
+
+The payload is built by repeating the properties of recorded Google Hotels
+responses (--payload, default benchmarks/fixtures/serpapi_google_hotels.json)
+up to --hotels entries, with the rate formats cycled so every branch is hit.
+
+Usage (from backend/):
+    python benchmarks/bench_rates.py --hotels 20000 --repeat 5
+    python benchmarks/bench_rates.py --payload capture1.json capture2.json
+"""
+import argparse
+import copy
+import json
+import os
+import re
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from services.rates import RateNormalizer, DEFAULT_RATES_PATH  # noqa: E402
+
+PRICE_FIELDS = ['lowest', 'extracted_lowest', 'before_taxes_fees', 'displayed_price', 'total', 'price']
+
+# Formats rencontrés dans les réponses SerpAPI selon gl/hl
+RATE_FORMATS = (
+    lambda p: {'lowest': f"{p} €", 'extracted_lowest': p},
+    lambda p: {'lowest': f"${p}", 'extracted_lowest': p},
+    lambda p: {'extracted_lowest': p},
+    lambda p: {'lowest': f"€{p:,}", 'before_taxes_fees': f"€{p - 9}"},
+    lambda p: {'displayed_price': f"{p * 10:,} $"},
+)
+
+
+def legacy_extract(rate_info, numeric):
+    """Former HotelService._extract_price / _extract_price_numeric"""
+    if not rate_info:
+        return None
+    if isinstance(rate_info, dict):
+        for field in PRICE_FIELDS:
+            if rate_info.get(field):
+                price = rate_info[field]
+                price_str = str(price).replace('$', '').replace('€', '').replace(',', '').strip()
+                numbers = re.findall(r'\d+\.?\d*', price_str)
+                if numbers:
+                    try:
+                        price_num = float(numbers[0])
+                        if '$' in str(price):
+                            price_num *= 0.85
+                        return int(price_num) if numeric else f"{int(price_num)}€"
+                    except Exception:
+                        pass
+    return None
+
+
+def legacy_page(properties):
+    results = []
+    for hotel in properties:
+        rate_info = hotel.get('rate_per_night', {}) or hotel.get('prices', {}) or hotel.get('price', {})
+        results.append((legacy_extract(rate_info, False), legacy_extract(rate_info, True)))
+    return results
+
+
+def build_properties(paths, count):
+    recorded = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            recorded.extend(json.load(f).get('properties', []))
+    properties = []
+    for i in range(count):
+        hotel = copy.copy(recorded[i % len(recorded)])
+        hotel['rate_per_night'] = RATE_FORMATS[i % len(RATE_FORMATS)](60 + i % 400)
+        properties.append(hotel)
+    return properties
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payload', nargs='+', default=[os.path.join(BENCH_DIR, 'fixtures', 'serpapi_google_hotels.json')])
+    parser.add_argument('--hotels', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--rates', default=DEFAULT_RATES_PATH, help='currency table used by RateNormalizer')
+    args = parser.parse_args()
+
+    properties = build_properties(args.payload, args.hotels)
+    normalizer = RateNormalizer.from_file(args.rates)
+
+    legacy = legacy_page(properties)
+    current = normalizer.normalize_page(properties)
+    differences = sum(1 for a, b in zip(legacy, current) if a != b)
+
+    legacy_best = min(timeit.repeat(lambda: legacy_page(properties), number=1, repeat=args.repeat))
+    current_best = min(timeit.repeat(lambda: normalizer.normalize_page(properties), number=1, repeat=args.repeat))
+
+    print(f"{args.hotels} hotels from {len(args.payload)} payload(s)")
+    print(f"{'':<26}{'total ms':>10}{'us/hotel':>10}")
+    for label, best in (('two-pass extraction', legacy_best), ('RateNormalizer (page)', current_best)):
+        print(f"{label:<26}{best * 1000:>10.1f}{best / args.hotels * 1e6:>10.2f}")
+    print(f"speedup x{legacy_best / current_best:.2f}")
+    if differences:
+        # Séparateurs d'espace, virgules décimales et devises autres que USD/EUR mal lus avant
+        print(f"{differences} hotels priced differently from the former extraction")
+
+
+if __name__ == '__main__':
+    main()
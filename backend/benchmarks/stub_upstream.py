@@ -0,0 +1,176 @@
+"""
+Local stand-in for every upstream the backends call: SerpAPI, Google Places,
+the n8n webhook and the Ryanair fares API.
+
+Responses are replayed from the recorded payloads in benchmarks/fixtures/
+(replace them with real captures to benchmark against other shapes). Each
+response can be delayed (--latency + uniform --jitter, in ms) and a share of
+them replaced by a 503 (--error-rate) to exercise the retry and fallback
+paths.
+
+Routes (prefix the env vars of the backends with the printed base URL):
+    GET  /serpapi/search.json          SERPAPI_URL        (engine=google_flights|google_hotels)
+    GET  /places/nearbysearch/json     GOOGLE_PLACES_URL  = <base>/places
+    POST /n8n/webhook                  N8N_WEBHOOK_URL
+    GET  /ryanair/site                 RYANAIR_SITE_URL   (session cookie)
+    GET  /ryanair/api/oneWayFares      RYANAIR_API_URL    = <base>/ryanair/api/
+    GET  /ryanair/api/roundTripFares
+    GET  /_stats                       per-route call counters
+
+Usage (from backend/):
+    python benchmarks/stub_upstream.py --port 8900 --latency 80 --jitter 40 --error-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Route -> fichier de fixture (les réponses SerpAPI dépendent du paramètre engine)
+SERPAPI_FIXTURES = {
+    'google_flights': 'serpapi_google_flights.json',
+    'google_hotels': 'serpapi_google_hotels.json',
+}
+ROUTE_FIXTURES = {
+    '/places/nearbysearch/json': 'places_nearbysearch.json',
+    '/n8n/webhook': 'n8n_converse.json',
+    '/ryanair/api/oneWayFares': 'ryanair_one_way_fares.json',
+    '/ryanair/api/roundTripFares': 'ryanair_round_trip_fares.json',
+}
+
+
+class StubUpstream:
+    """Threaded HTTP server replaying fixtures with injected latency and errors"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fixtures_dir: str = FIXTURES_DIR,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = None):
+        self.latency = latency / 1000
+        self.jitter = jitter / 1000
+        self.error_rate = error_rate
+        self.payloads = {
+            name: open(os.path.join(fixtures_dir, name), 'rb').read()
+            for name in set(SERPAPI_FIXTURES.values()) | set(ROUTE_FIXTURES.values())
+        }
+        self.calls = Counter()
+        self.errors = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> dict:
+        """Environment pointing the backends at this stub"""
+        return {
+            'SERPAPI_URL': f"{self.base_url}/serpapi/search.json",
+            'GOOGLE_PLACES_URL': f"{self.base_url}/places",
+            'N8N_WEBHOOK_URL': f"{self.base_url}/n8n/webhook",
+            'RYANAIR_API_URL': f"{self.base_url}/ryanair/api/",
+            'RYANAIR_SITE_URL': f"{self.base_url}/ryanair/site",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='stub-upstream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'calls': dict(self.calls), 'errors': dict(self.errors)}
+
+    def _respond(self, path: str, query: dict):
+        """(status, body) for a request, after the injected delay"""
+        if path == '/serpapi/search.json':
+            name = SERPAPI_FIXTURES.get(query.get('engine', [''])[0])
+        else:
+            name = ROUTE_FIXTURES.get(path)
+
+        with self._lock:
+            self.calls[path] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors[path] += 1
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            return 503, b'{"error": "Injected upstream failure"}'
+        if name is None:
+            return 404, b'{"error": "Unknown route"}'
+        return 200, self.payloads[name]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, comme les vrais upstreams
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == '/_stats':
+                    self._send(200, json.dumps(stub.stats()).encode())
+                elif url.path == '/ryanair/site':
+                    self._send(200, b'<html></html>', 'text/html', {'Set-Cookie': 'rid=bench; Path=/'})
+                else:
+                    self._send(*stub._respond(url.path, parse_qs(url.query)))
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._send(*stub._respond(urlsplit(self.path).path, {}))
+
+            def _send(self, status, body, content_type='application/json', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--latency', type=float, default=0.0, help='base delay per response (ms)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra uniform delay (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of responses replaced by a 503')
+    args = parser.parse_args()
+
+    stub = StubUpstream(args.host, args.port, args.fixtures, args.latency, args.jitter, args.error_rate)
+    print(f"Stub upstream on {stub.base_url}")
+    for name, value in stub.env().items():
+        print(f"  export {name}={value}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
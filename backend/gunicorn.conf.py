@@ -0,0 +1,105 @@
+"""
+gunicorn settings for backend/app.py (gunicorn -c gunicorn.conf.py wsgi:app).
+
+Worker model (GUNICORN_WORKER_CLASS):
+    sync      one request at a time per worker process
+    gthread   GUNICORN_THREADS requests per worker (default): upstream waits
+              block a thread, not the whole worker
+    gevent    cooperative greenlets, up to GUNICORN_WORKER_CONNECTIONS
+              requests per worker; suited to long upstream waits (requires gevent)
+
+With GUNICORN_PRELOAD (default on) the app and its service singletons are
+imported once in the master before forking, so workers share the loaded
+code and start instantly.
+
+Background tasks (the hot search refresher) run in ONE worker only, elected
+after the fork with a lock file (HOT_REFRESH_LOCK): SERPAPI_REFRESH_BUDGET
+is therefore spent once for the whole server, not once per worker. The
+elected worker only sees its share of the requests, so its popularity
+threshold (HOT_REFRESH_MIN_HITS) is divided by the worker count; its
+refreshes are written to the offer store, which the other workers read.
+The other workers retry the lock every HOT_REFRESH_ELECTION_INTERVAL
+seconds, so one of them takes over when the elected worker exits
+(graceful restart, max_requests).
+
+Graceful restarts: `kill -HUP <master pid>` replaces the workers one by one
+after their in-flight requests finish (GUNICORN_GRACEFUL_TIMEOUT); with
+preload, new code needs `kill -USR2` (new master) then `kill -TERM` on the
+old one. Workers are also recycled after GUNICORN_MAX_REQUESTS requests.
+Each worker has its own in-memory caches; the SQLite offer and POI stores
+are shared by all of them.
+"""
+import fcntl
+import multiprocessing
+import os
+import threading
+
+WORKER_CLASSES = {'sync': 'sync', 'gthread': 'gthread', 'threaded': 'gthread', 'gevent': 'gevent', 'greenlet': 'gevent'}
+
+worker_class = WORKER_CLASSES.get(os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').lower(), 'gthread')
+
+if worker_class == 'gevent':
+    # Patch avant tout import de l'app (preload) : sockets et verrous deviennent coopératifs
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+# Attente d'E/S surtout : plus de workers que de coeurs (threads / greenlets en plus)
+workers = int(os.environ.get('GUNICORN_WORKERS') or os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+# Tâches de fond jamais lancées à l'import : post_fork les démarre dans un seul worker
+os.environ['DEFER_BACKGROUND_TASKS'] = '1'
+refresh_lock_path = os.environ.get('HOT_REFRESH_LOCK', f"/tmp/hackaton-hot-refresh-{bind.rsplit(':', 1)[-1]}.lock")
+election_interval = float(os.environ.get('HOT_REFRESH_ELECTION_INTERVAL', 10))
+_refresh_lock = None  # fichier verrouillé par le worker élu, gardé ouvert toute sa vie
+_exiting = threading.Event()
+_election_guard = threading.Lock()  # pas de démarrage des tâches pendant l'arrêt du worker
+
+# Une recherche lente (fenêtre de vols, grille d'hôtels) peut durer plusieurs dizaines de secondes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def _elect(server, worker):
+    """Wait for the refresh lock, then start the background tasks in this worker"""
+    global _refresh_lock
+    lock = open(refresh_lock_path, 'a')
+    while True:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except OSError:
+            if _exiting.wait(election_interval):
+                lock.close()
+                return
+    with _election_guard:
+        # Un worker en cours d'arrêt (redémarrage gracieux) laisse le verrou à un nouveau worker
+        if _exiting.is_set() or not worker.alive:
+            lock.close()
+            return
+        _refresh_lock = lock
+        server.log.info(f"Worker {worker.pid} runs the background tasks")
+        from app import start_background_tasks
+        start_background_tasks(traffic_share=1 / server.cfg.workers)
+
+
+def post_fork(server, worker):
+    """Elect the one worker running the background tasks (the others keep retrying the lock)"""
+    threading.Thread(target=_elect, args=(server, worker), name='refresh-election', daemon=True).start()
+
+
+def worker_exit(server, worker):
+    with _election_guard:
+        _exiting.set()
+    from services import hot_refresher
+    hot_refresher.stop(timeout=5)
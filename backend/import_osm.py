@@ -0,0 +1,10 @@
+"""
+Import the POIs of a local OpenStreetMap extract into per-city files.
+
+See services/osm_pois.py. Run from backend/:
+    python import_osm.py <extract.osm.pbf | extract.osm.bz2> [--city NAME[=lat,lon]] [--radius METERS]
+"""
+from services.osm_pois import main
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,27 @@
 from .flight_service import FlightSearchService
 from .hotel_service import HotelService
 from .activity_service import ActivityService
-from .mappings import CITY_TO_IATA, IATA_TO_CITY
+from .trip_service import TripService
+from .async_services import AsyncFlightSearchService, AsyncHotelService, AsyncActivityService
+from .mappings import CITY_TO_IATA, IATA_TO_CITY, resolve_destination
+from .models import FlightOffer, HotelOffer, Activity, is_fallback
+from .hotel_dedup import HotelDedupIndex
+from .hotel_filters import HotelIndex
+from .rates import RateNormalizer, rate_normalizer
+from .cache import ResponseCache, serpapi_cache
+from .store import OfferStore, offer_store
+from .pois import POIStore, poi_store
+from .singleflight import SingleFlight, AsyncSingleFlight, upstream_calls, async_upstream_calls
+from .http_pool import HttpClient, AsyncHttpClient, http_client, async_http_client
+from .rate_limit import TokenBucket, serpapi_limiter, places_photo_limiter
+from .refresher import HotKeyRefresher, hot_refresher
+from .image_proxy import ImageProxy, image_proxy
+from .http_cache import HttpCache, http_cache
 
-__all__ = ['FlightSearchService', 'HotelService', 'ActivityService', 'CITY_TO_IATA', 'IATA_TO_CITY']
+__all__ = ['FlightSearchService', 'HotelService', 'ActivityService', 'TripService',
+           'AsyncFlightSearchService', 'AsyncHotelService', 'AsyncActivityService',
+           'CITY_TO_IATA', 'IATA_TO_CITY', 'resolve_destination', 'FlightOffer', 'HotelOffer', 'Activity', 'is_fallback', 'HotelDedupIndex', 'HotelIndex', 'RateNormalizer', 'rate_normalizer', 'ResponseCache', 'serpapi_cache', 'OfferStore', 'offer_store', 'POIStore', 'poi_store',
+           'SingleFlight', 'AsyncSingleFlight', 'upstream_calls', 'async_upstream_calls',
+           'HttpClient', 'AsyncHttpClient', 'http_client', 'async_http_client', 'TokenBucket', 'serpapi_limiter', 'places_photo_limiter',
+           'HotKeyRefresher', 'hot_refresher',
+           'ImageProxy', 'image_proxy', 'HttpCache', 'http_cache']
@@ -1,10 +1,59 @@
-import requests
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed, wait
+
+from .cache import ResponseCache
+from .http_pool import http_client
+from .image_proxy import image_proxy
+from .models import Activity
+from .osm_pois import DEFAULT_OSM_DIR, SUBTYPE_LABELS, city_slug, load_city_pois
+from .pois import poi_store
+from .singleflight import upstream_calls
+
+# Catégories recherchées : (type Google Places, catégorie affichée, nombre max)
+PLACE_CATEGORIES = [
+    ('tourist_attraction', 'Visite', 6),
+    ('museum', 'Culture', 4),
+    ('park', 'Nature', 4),
+    ('restaurant', 'Gastronomie', 4),
+]
+
+# Villes max d'une requête /api/activities/batch
+MAX_BATCH_DESTINATIONS = 20
+
+# Places renvoie 20 résultats par page et au plus 3 pages par recherche
+MAX_PLACES_PAGES = 3
+
+# Essais max d'un next_page_token encore invalide (INVALID_REQUEST), et délai max d'un essai
+MAX_PAGE_ATTEMPTS = 3
+PAGE_REQUEST_TIMEOUT = 10
 
 class ActivityService:
     def __init__(self):
         self.google_maps_api_key = os.environ.get('GOOGLE_MAPS_API_KEY') or os.environ.get('GOOGLE_MAP_API')
-        self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.base_url = os.environ.get('GOOGLE_PLACES_URL', "https://maps.googleapis.com/maps/api/place")
+        self.images = image_proxy
+        # POI déjà reçus de Places : zones fraîches servies sans appel réseau
+        self.pois = poi_store
+        # Fichiers POI par ville produits hors ligne (python import_osm.py <extrait OSM>)
+        self.osm_dir = os.environ.get('OSM_POI_DIR', DEFAULT_OSM_DIR)
+        self._osm_cache = {}  # slug -> (mtime, pois)
+        # Délai commun à toutes les catégories : les retardataires sont écartés de la réponse
+        self.deadline = float(os.environ.get('ACTIVITY_DEADLINE', 10))
+        # 4 catégories par requête : 32 threads pour 8 requêtes /api/activities simultanées
+        self.workers = int(os.environ.get('ACTIVITY_WORKERS', 32))
+        self._executor = None
+        # Pool séparé pour /api/activities/batch : un lot ne passe pas devant les requêtes normales
+        self.batch_workers = int(os.environ.get('ACTIVITY_BATCH_WORKERS', 8))
+        self._batch_executor = None
+        # Pages suivantes (next_page_token) : préchargées en arrière-plan, gardées par token
+        self.page_token_delay = float(os.environ.get('PLACES_PAGE_TOKEN_DELAY', 2))
+        self.pages = ResponseCache(
+            max_entries=int(os.environ.get('PLACES_PAGE_CACHE_MAX_ENTRIES', 256)),
+            default_ttl=int(os.environ.get('PLACES_PAGE_TTL', 3600)),
+            stale_ttl=0,
+        )
+        self._prefetch_executor = None
         
         # Coordonnées des villes principales
         self.city_coordinates = {
@@ -45,83 +94,404 @@ class ActivityService:
             'nantes': (47.2184, -1.5536),
         }
     
-    def search_activities(self, destination_city: str):
+    def _get_executor(self):
+        """Lazily create the worker pool running the category searches concurrently"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='places')
+        return self._executor
+
+    def _get_batch_executor(self):
+        """Lazily create the pool of the batch searches (bounds what one batch can occupy)"""
+        if self._batch_executor is None:
+            self._batch_executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix='places-batch')
+        return self._batch_executor
+
+    def search_activities(self, destination_city: str, deadline: float = None):
         """Search for activities using Google Places API"""
-        city_lower = destination_city.lower()
-        coordinates = self.city_coordinates.get(city_lower)
-        
-        if not coordinates:
-            return self._get_fallback_activities(destination_city)
+        return self.search_activities_timed(destination_city, deadline)['activities']
+
+    def search_activities_timed(self, destination_city: str, deadline: float = None):
+        """Return {'activities', 'categories'}: every category searched concurrently.
+
+        Each category gets `deadline` seconds from the moment it starts
+        running, so time spent queued behind other requests in a busy pool
+        does not eat its budget; categories still running past their
+        deadline, or not started within it, are reported as 'timeout' and
+        left out. 'categories' gives the status and elapsed time of each
+        Places type.
+        """
+        coordinates = self.city_coordinates.get(destination_city.lower())
         
-        if not self.google_maps_api_key:
-            return self._get_fallback_activities(destination_city)
+        if not coordinates or not self.google_maps_api_key:
+            return self._offline_activities(destination_city)
         
         lat, lng = coordinates
-        activities = []
+        deadline = self.deadline if deadline is None else deadline
         
         try:
-            # Rechercher des attractions touristiques
-            attractions = self._search_places(lat, lng, 'tourist_attraction', limit=6)
-            activities.extend(self._format_activities(attractions, 'Visite'))
-            
-            # Rechercher des musées
-            museums = self._search_places(lat, lng, 'museum', limit=4)
-            activities.extend(self._format_activities(museums, 'Culture'))
-            
-            # Rechercher des parcs
-            parks = self._search_places(lat, lng, 'park', limit=4)
-            activities.extend(self._format_activities(parks, 'Nature'))
-            
-            # Rechercher des restaurants
-            restaurants = self._search_places(lat, lng, 'restaurant', limit=4)
-            activities.extend(self._format_activities(restaurants, 'Gastronomie'))
+            executor = self._get_executor()
+            started = time.perf_counter()
+            starts = {}  # place_type -> début effectif de la recherche
+            futures = [
+                executor.submit(self._timed_search, lat, lng, place_type, limit, deadline, starts)
+                for place_type, _, limit in PLACE_CATEGORIES
+            ]
+            wait(futures, timeout=deadline)
+            # Catégories démarrées en retard (pool occupé) : leur délai court depuis leur début,
+            # celles encore en file après `deadline` sont abandonnées (réponse en 2 × deadline au plus)
+            for (place_type, _, _), future in zip(PLACE_CATEGORIES, futures):
+                begun = starts.get(place_type)
+                if not future.done() and begun is not None and begun - started <= deadline:
+                    wait([future], timeout=max(0, begun + deadline - time.perf_counter()))
             
+            # Attractions, musées, parcs puis restaurants (ordre fixe quel que soit l'ordre d'arrivée)
+            results = {}
+            for (place_type, _, _), future in zip(PLACE_CATEGORIES, futures):
+                if future.done():
+                    results[place_type] = future.result()
+                else:
+                    future.cancel()
+                    results[place_type] = (None, time.perf_counter() - starts.get(place_type, started))
         except Exception as e:
             print(f"Activity search error: {e}")
-            return self._get_fallback_activities(destination_city)
+            return self._offline_activities(destination_city)
         
-        return activities[:12]  # Limiter à 12 activités
+        return self._collect(results)
+    
+    def stream_activities_batch(self, destinations, deadline: float = None):
+        """Yield {'type': 'city'} for each destination as soon as its categories are in.
+
+        Destinations are deduplicated (case-insensitive, first spelling kept).
+        Every (city, category) search goes to the batch worker pool (apart
+        from the pool of single searches), which bounds the concurrency of
+        all batches together, and all of them share one deadline: when it
+        expires the unfinished cities are emitted with their late categories
+        as 'timeout'. A final {'type': 'summary'} closes the stream.
+        """
+        names, seen = [], set()
+        for name in destinations:
+            key = (name or '').strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                names.append(name.strip())
+        if len(names) > MAX_BATCH_DESTINATIONS:
+            raise ValueError(f"At most {MAX_BATCH_DESTINATIONS} destinations per batch")
+        deadline = self.deadline if deadline is None else deadline
+        started = time.perf_counter()
+
+        pending = {}  # ville -> {place_type: future}
+        futures = {}  # future -> (ville, place_type)
+        for name in names:
+            coordinates = self.city_coordinates.get(name.lower())
+            if not coordinates or not self.google_maps_api_key:
+                # Fichier OSM ou activités génériques : aucune attente réseau
+                yield self._city_event(name, self._offline_activities(name))
+                continue
+            lat, lng = coordinates
+            executor = self._get_batch_executor()
+            pending[name] = {}
+            for place_type, _, limit in PLACE_CATEGORIES:
+                future = executor.submit(self._timed_search, lat, lng, place_type, limit, deadline)
+                pending[name][place_type] = future
+                futures[future] = (name, place_type)
+
+        timeouts = 0
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                name, _ = futures[future]
+                if name in pending and all(f.done() for f in pending[name].values()):
+                    yield self._city_event(name, self._collect_city(pending.pop(name), started))
+        except TimeoutError:
+            # Délai commun dépassé : chaque ville restante part avec ce qui est arrivé
+            for name, city_futures in list(pending.items()):
+                timeouts += 1
+                yield self._city_event(name, self._collect_city(city_futures, started))
+                del pending[name]
+
+        yield {'type': 'summary', 'destinations': names, 'total': len(names), 'timeouts': timeouts,
+               'elapsed_ms': round((time.perf_counter() - started) * 1000)}
+
+    def _collect_city(self, city_futures, started):
+        """_collect of the category futures of one city (late ones cancelled and reported as timeout)"""
+        results = {}
+        for place_type, future in city_futures.items():
+            if future.done():
+                results[place_type] = future.result()
+            else:
+                future.cancel()
+                results[place_type] = (None, time.perf_counter() - started)
+        return self._collect(results)
+
+    @staticmethod
+    def _city_event(name, result):
+        return {'type': 'city', 'destination': name, 'activities': result['activities'],
+                'categories': result['categories'], 'total': len(result['activities'])}
+
+    def more_activities(self, destination_city: str, place_type: str, offset: int = 0, limit: int = 8):
+        """Next activities of one category ("show more"), read from the POI store only.
+
+        Returns {'activities', 'next_offset'}; next_offset is None when the
+        stored places (first page plus prefetched pages) are exhausted.
+        """
+        categories = {name: category for name, category, _ in PLACE_CATEGORIES}
+        if place_type not in categories:
+            raise ValueError(f"Unknown category '{place_type}' (expected one of {', '.join(categories)})")
+        coordinates = self.city_coordinates.get(destination_city.lower())
+        if not coordinates:
+            return {'activities': [], 'next_offset': None}
+        
+        lat, lng = coordinates
+        places = self._filter_places({'status': 'OK', 'results': self.pois.query_radius(lat, lng, 15000, category=place_type)}, None)
+        page = places[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(places) else None
+        return {'activities': self._format_activities(page, categories[place_type]), 'next_offset': next_offset}
+
+    def _offline_activities(self, destination_city):
+        """Activities from the imported OSM file of the city, the generic fallback without one"""
+        pois = self._osm_pois(destination_city)
+        if not pois:
+            return {'activities': self._get_fallback_activities(destination_city), 'categories': {}}
+        activities = []
+        categories = {}
+        for place_type, category, limit in PLACE_CATEGORIES:
+            # Fichier trié par notoriété : les premiers lieux de chaque type suffisent
+            selected = [poi for poi in pois if poi['place_type'] == place_type][:limit]
+            activities.extend(self._format_osm(selected, category))
+            categories[place_type] = {'status': 'offline', 'elapsed_ms': 0, 'total': len(selected)}
+        return {'activities': activities[:12], 'categories': categories}
+    
+    def _osm_pois(self, destination_city):
+        """POIs of the city's OSM file (reloaded when the file changes), None if not imported"""
+        slug = city_slug(destination_city)
+        try:
+            mtime = os.stat(os.path.join(self.osm_dir, f"{slug}.json.gz")).st_mtime
+        except OSError:
+            return None
+        cached = self._osm_cache.get(slug)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = self._osm_cache[slug] = (mtime, load_city_pois(destination_city, self.osm_dir))
+            except Exception as e:
+                print(f"OSM POI file error: {e}")
+                return None
+        return cached[1]
+    
+    def _format_osm(self, pois, category):
+        """Format OSM POIs as activities (no rating nor photo in OSM data)"""
+        return [
+            Activity(
+                name=poi['name'],
+                category=category,
+                price=self._estimate_price(category),
+                duration=self._estimate_duration(category),
+                image=None,
+                description=f"{SUBTYPE_LABELS.get(poi['subtype'], 'Lieu')} · OpenStreetMap",
+                rating=None
+            )
+            for poi in pois
+        ]
     
-    def _search_places(self, lat, lng, place_type, radius=15000, limit=10):
+    def _timed_search(self, lat, lng, place_type, limit, timeout, starts=None):
+        started = time.perf_counter()
+        if starts is not None:
+            starts[place_type] = started
+        return self._search_places(lat, lng, place_type, limit=limit, timeout=timeout), time.perf_counter() - started
+    
+    def _collect(self, results):
+        """Activities (max 12) and per-category timings from {place_type: (places or None, elapsed)}"""
+        activities = []
+        categories = {}
+        for place_type, category, _ in PLACE_CATEGORIES:
+            places, elapsed = results[place_type]
+            if places is None:
+                categories[place_type] = {'status': 'timeout', 'elapsed_ms': round(elapsed * 1000)}
+                continue
+            activities.extend(self._format_activities(places, category))
+            categories[place_type] = {'status': 'ok', 'elapsed_ms': round(elapsed * 1000), 'total': len(places)}
+        return {'activities': activities[:12], 'categories': categories}  # Limiter à 12 activités
+    
+    def _search_places(self, lat, lng, place_type, radius=15000, limit=10, timeout=10):
         """Search for places using Google Places API"""
         if not self.google_maps_api_key:
             return []
         
-        params = {
-            'location': f"{lat},{lng}",
-            'radius': radius,
-            'type': place_type,
-            'key': self.google_maps_api_key
-        }
+        local = self._local_places(lat, lng, place_type, radius, limit)
+        if local is not None:
+            return local
+        
+        params = self._places_params(lat, lng, place_type, radius)
+        started = time.perf_counter()
         
         try:
-            response = requests.get(f"{self.base_url}/nearbysearch/json", params=params, timeout=10)
+            response = http_client.get(f"{self.base_url}/nearbysearch/json", params=params, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
-                if data.get('status') == 'OK':
-                    places = data.get('results', [])
-                    places = [p for p in places if p.get('name') and p.get('rating', 0) > 3.5]
-                    places = sorted(places, key=lambda x: x.get('rating', 0), reverse=True)
-                    return places[:limit]
+                self._store_places(lat, lng, place_type, radius, data)
+                places = self._filter_places(data, limit)
+                return self._continue_places(places, data.get('next_page_token'), place_type, limit, timeout - (time.perf_counter() - started))
         except Exception as e:
             print(f"Places API error: {e}")
         
         return []
     
+    def _continue_places(self, places, token, place_type, limit, remaining):
+        """Complete a thin category with the next result pages.
+
+        The following pages are always prefetched in the background (stored
+        in the POI store for later requests and "show more"). When fewer than
+        `limit` places passed the filter and the remaining time allows the
+        token delay, the pages are first fetched here, bounded by `remaining`
+        seconds; the prefetch is started after them so that this request
+        never waits on a fetch without deadline.
+        """
+        if not token:
+            return places
+        deadline = time.perf_counter() + remaining
+        first_token = token
+        
+        found = {place.get('place_id') for place in places}
+        pages = 1
+        while token and len(places) < limit and pages < MAX_PLACES_PAGES and deadline - time.perf_counter() > self.page_token_delay + 1:
+            # Même appel que le préchargement : une seule requête par token
+            data = self._fetch_token_page(token, place_type, deadline)
+            pages += 1
+            if data is None:
+                break
+            self._add_page(places, found, data)
+            token = data.get('next_page_token')
+        
+        # Pages déjà chargées ci-dessus : servies par le cache de pages
+        self._get_prefetch_executor().submit(self._prefetch_pages, first_token, place_type)
+        places.sort(key=lambda place: place.get('rating', 0), reverse=True)
+        return places[:limit]
+    
+    def _add_page(self, places, found, data):
+        """Append the places of a token page that passed the filter and were not found yet"""
+        for place in self._filter_places(data, None):
+            if place.get('place_id') not in found:
+                found.add(place.get('place_id'))
+                places.append(place)
+    
+    def _get_prefetch_executor(self):
+        """Small pool for background page prefetches (kept apart from the request pool)"""
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get('PLACES_PREFETCH_WORKERS', 2)), thread_name_prefix='places-pages'
+            )
+        return self._prefetch_executor
+    
+    def _prefetch_pages(self, token, place_type):
+        """Fetch every following page of a search into the page cache and the POI store"""
+        pages = 1
+        while token and pages < MAX_PLACES_PAGES:
+            data = self._fetch_token_page(token, place_type)
+            if data is None:
+                return
+            pages += 1
+            token = data.get('next_page_token')
+    
+    def _fetch_token_page(self, token, place_type, deadline=None):
+        """Payload of the page behind a next_page_token (cached by token, one upstream call per token).
+
+        deadline is a time.perf_counter() instant after which None is returned.
+        """
+        params = {'pagetoken': token}
+        wait = None if deadline is None else max(0, deadline - time.perf_counter())
+        try:
+            return self.pages.get_or_fetch(params, lambda: upstream_calls.do(
+                ('places_page', token), lambda: self._load_token_page(token, place_type, deadline), timeout=wait
+            ))
+        except TimeoutError:
+            return None
+    
+    def _load_token_page(self, token, place_type, deadline=None):
+        """Fetch a token page, waiting for the token to become valid (None on error or past deadline)"""
+        # Un token n'est utilisable qu'après un court délai côté Google (INVALID_REQUEST avant)
+        for attempt in range(MAX_PAGE_ATTEMPTS):
+            if deadline is not None and deadline - time.perf_counter() <= self.page_token_delay:
+                return None  # plus le temps d'attendre le token ni de faire la requête
+            time.sleep(self.page_token_delay)
+            timeout = PAGE_REQUEST_TIMEOUT
+            if deadline is not None:
+                timeout = min(PAGE_REQUEST_TIMEOUT, deadline - time.perf_counter())
+                if timeout <= 0:
+                    return None
+            try:
+                response = http_client.get(
+                    f"{self.base_url}/nearbysearch/json",
+                    params={'pagetoken': token, 'key': self.google_maps_api_key},
+                    timeout=timeout
+                )
+            except Exception as e:
+                print(f"Places page error: {e}")
+                return None
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            if data.get('status') == 'INVALID_REQUEST':
+                continue
+            if data.get('status') != 'OK':
+                return None
+            try:
+                self.pois.save_places(data.get('results', []), place_type)
+            except Exception as e:
+                print(f"POI store error: {e}")
+            return data
+        return None
+    
+    def _local_places(self, lat, lng, place_type, radius, limit):
+        """Best places of the POI store if the area is fresh there, None if it must be fetched"""
+        try:
+            if not self.pois.is_covered(lat, lng, place_type, radius):
+                return None
+            places = self.pois.query_radius(lat, lng, radius, category=place_type)
+        except Exception as e:
+            print(f"POI store error: {e}")
+            return None
+        return self._filter_places({'status': 'OK', 'results': places}, limit)
+    
+    def _store_places(self, lat, lng, place_type, radius, data):
+        """File the results of a nearbysearch in the POI store and mark its area as fresh"""
+        if data.get('status') not in ('OK', 'ZERO_RESULTS'):
+            return
+        try:
+            self.pois.save_places(data.get('results', []), place_type)
+            self.pois.mark_covered(lat, lng, place_type, radius)
+        except Exception as e:
+            print(f"POI store error: {e}")
+    
+    def _places_params(self, lat, lng, place_type, radius=15000):
+        """Google Places nearbysearch params"""
+        return {
+            'location': f"{lat},{lng}",
+            'radius': radius,
+            'type': place_type,
+            'key': self.google_maps_api_key
+        }
+    
+    def _filter_places(self, data, limit):
+        """Best-rated places (rating > 3.5) of a nearbysearch payload (all of them if limit is None)"""
+        if data.get('status') != 'OK':
+            return []
+        places = data.get('results', [])
+        places = [p for p in places if p.get('name') and p.get('rating', 0) > 3.5]
+        places = sorted(places, key=lambda x: x.get('rating', 0), reverse=True)
+        return places[:limit]
+    
     def _format_activities(self, places, category):
         """Format places as activities"""
         activities = []
         for place in places:
-            activities.append({
-                'name': place.get('name', 'Activité'),
-                'category': category,
-                'price': self._estimate_price(category),
-                'duration': self._estimate_duration(category),
-                'image': self._get_photo_url(place.get('photos', [])),
-                'description': f"Activité recommandée avec {place.get('user_ratings_total', 0)} avis",
-                'rating': round(place.get('rating', 4.0), 1)
-            })
+            activities.append(Activity(
+                name=place.get('name', 'Activité'),
+                category=category,
+                price=self._estimate_price(category),
+                duration=self._estimate_duration(category),
+                image=self._get_photo_url(place.get('photos', [])),
+                description=f"Activité recommandée avec {place.get('user_ratings_total', 0)} avis",
+                rating=round(place.get('rating', 4.0), 1)
+            ))
         return activities
     
     def _estimate_price(self, category):
@@ -155,6 +525,9 @@ class ActivityService:
         
         photo_ref = photos[0].get('photo_reference')
         if photo_ref:
+            # Servie par le proxy d'images : la clé API reste côté serveur
+            if self.images.enabled:
+                return self.images.places_url_for(photo_ref, 400)
             return f"{self.base_url}/photo?maxwidth=400&photoreference={photo_ref}&key={self.google_maps_api_key}"
         
         return None
@@ -162,31 +535,31 @@ class ActivityService:
     def _get_fallback_activities(self, city_name):
         """Fallback activities when API fails"""
         return [
-            {
-                'name': f'Visite guidée de {city_name}',
-                'category': 'Visite',
-                'price': 35,
-                'duration': '3h',
-                'image': None,
-                'description': f'Découvrez les secrets de {city_name}',
-                'rating': 4.7
-            },
-            {
-                'name': f'Cours de cuisine locale',
-                'category': 'Gastronomie',
-                'price': 75,
-                'duration': '2h30',
-                'image': None,
-                'description': f'Apprenez les spécialités de {city_name}',
-                'rating': 4.8
-            },
-            {
-                'name': f'Excursion en bateau',
-                'category': 'Aventure',
-                'price': 55,
-                'duration': '4h',
-                'image': None,
-                'description': f'Croisière autour de {city_name}',
-                'rating': 4.9
-            },
+            Activity(
+                name=f'Visite guidée de {city_name}',
+                category='Visite',
+                price=35,
+                duration='3h',
+                image=None,
+                description=f'Découvrez les secrets de {city_name}',
+                rating=4.7
+            ),
+            Activity(
+                name=f'Cours de cuisine locale',
+                category='Gastronomie',
+                price=75,
+                duration='2h30',
+                image=None,
+                description=f'Apprenez les spécialités de {city_name}',
+                rating=4.8
+            ),
+            Activity(
+                name=f'Excursion en bateau',
+                category='Aventure',
+                price=55,
+                duration='4h',
+                image=None,
+                description=f'Croisière autour de {city_name}',
+                rating=4.9
+            ),
         ]
@@ -0,0 +1,412 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .activity_service import ActivityService, MAX_PAGE_ATTEMPTS, MAX_PLACES_PAGES, PAGE_REQUEST_TIMEOUT, PLACE_CATEGORIES
+from .cache import serpapi_cache
+from .flight_service import FlightSearchService
+from .hotel_dedup import HotelDedupIndex
+from .hotel_filters import HotelIndex
+from .hotel_service import HotelService, DEEP_MAX_PAGES, DEFAULT_GRID_NIGHTS
+from .http_pool import async_http_client
+from .serpapi import serpapi_search_async
+from .singleflight import async_upstream_calls
+
+
+class AsyncFlightSearchService(FlightSearchService):
+    """asyncio version of FlightSearchService (same params, parsing, store and fallbacks)"""
+
+    async def search_flights(self, origin_city: str, destination_city: str, departure_date_from: str = None, departure_date_to: str = None, min_stay_duration: int = 4):
+        """Search for flights from origin to destination"""
+        origin, destination = self._resolve_route(origin_city, destination_city)
+
+        if not departure_date_from:
+            departure_date_from = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+
+        if not self.serpapi_key:
+            return self._get_fallback_flights(origin, destination, departure_date_from)
+
+        self.refresher.record('flights', origin, destination, departure_date_from, min_stay_duration)
+        try:
+            flights = await self._fetch_serpapi_flights(origin, destination, departure_date_from, min_stay_duration)
+        except Exception as e:
+            print(f"Flight search error: {e}")
+            flights = None
+
+        return flights[:10] if flights else self._get_fallback_flights(origin, destination, departure_date_from)
+
+    async def search_flights_window(self, origin_city: str, destination_city: str, departure_date_from: str = None, departure_date_to: str = None, min_stay_duration: int = 4, top_n: int = 10, per_day: int = 3):
+        """Search every departure date of a flexible window concurrently"""
+        origin, destination = self._resolve_route(origin_city, destination_city)
+        dates = self._window_dates(departure_date_from, departure_date_to)
+
+        if not self.serpapi_key:
+            return self._summarize_window(origin, destination, dates, {}, top_n, per_day)
+
+        semaphore = asyncio.Semaphore(self.window_workers)
+
+        async def search_day(date):
+            async with semaphore:
+                try:
+                    return date, await self._fetch_serpapi_flights(origin, destination, date, min_stay_duration)
+                except Exception as e:
+                    print(f"Flight window search error for {date}: {e}")
+                    return date, None
+
+        results = dict(await asyncio.gather(*(search_day(date) for date in dates)))
+        return self._summarize_window(origin, destination, dates, results, top_n, per_day)
+
+    async def _fetch_serpapi_flights(self, origin: str, destination: str, departure_date: str, min_stay: int):
+        key = ('flights', origin, destination, departure_date, min_stay)
+        return await async_upstream_calls.do(key, lambda: self._load_flights(origin, destination, departure_date, min_stay))
+
+    async def _load_flights(self, origin: str, destination: str, departure_date: str, min_stay: int):
+        params = self._build_params(origin, destination, departure_date, min_stay)
+        departure_date, return_date = params['outbound_date'], params['return_date']
+
+        if not serpapi_cache.contains(params):
+            max_age = min(self.store.max_age, serpapi_cache.servable_for(params))
+            stored = await asyncio.to_thread(self.store.get_flights, origin, destination, departure_date, return_date, max_age)
+            if stored is not None:
+                return stored
+
+        loop = asyncio.get_running_loop()
+
+        def persist(payload):
+            loop.run_in_executor(None, self._persist_flights, payload, origin, destination, departure_date, return_date)
+
+        data = await serpapi_search_async(params, base_url=self.base_url, timeout=15, on_fetch=persist)
+
+        if data is None:
+            return None
+
+        return self._parse_flights(data, origin, destination, departure_date, return_date)
+
+
+class AsyncHotelService(HotelService):
+    """asyncio version of HotelService (same params, parsing, store and fallbacks)"""
+
+    async def search_hotels(self, destination_city: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, deep: bool = False, min_results: int = 0):
+        """Search for hotels using SERP API Google Hotels"""
+        city_name = self._resolve_city(destination_city)
+        checkin_date, checkout_date = self._default_dates(checkin_date, checkout_date)
+
+        if not self.serpapi_key:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        self.refresher.record('hotels', city_name, checkin_date, checkout_date, adults)
+        try:
+            key = ('hotels', city_name, checkin_date, checkout_date, adults, deep, min_results)
+            hotels = await async_upstream_calls.do(key, lambda: self._load_inventory(city_name, checkin_date, checkout_date, adults, deep, min_results))
+        except Exception as e:
+            print(f"Hotel search error: {e}")
+            hotels = None
+
+        if hotels is None:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        return hotels
+
+    async def filter_hotels(self, destination_city: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, deep: bool = False, min_results: int = 0, **filters):
+        """Hotels of a stay filtered and sorted server-side (filters: see HotelIndex.select)"""
+        city_name = self._resolve_city(destination_city)
+        checkin_date, checkout_date = self._default_dates(checkin_date, checkout_date)
+
+        if not self.serpapi_key:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        self.refresher.record('hotels', city_name, checkin_date, checkout_date, adults)
+        stay = self._stay_params(city_name, checkin_date, checkout_date, adults, deep, min_results)
+        try:
+            index = await self.indexes.get_or_fetch_async(stay, lambda: async_upstream_calls.do(
+                ('hotel_index',) + tuple(stay.values()),
+                lambda: self._build_index(city_name, checkin_date, checkout_date, adults, deep, min_results)
+            ))
+        except Exception as e:
+            print(f"Hotel search error: {e}")
+            index = None
+
+        if index is None:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        return index.select(**filters)
+
+    async def search_hotels_grid(self, destination_city: str, checkin_from: str = None, checkin_to: str = None, nights=DEFAULT_GRID_NIGHTS, adults: int = 2, top_n: int = 10):
+        """Price every check-in date × stay length of a window concurrently"""
+        city_name = self._resolve_city(destination_city)
+        checkins = self._grid_checkins(checkin_from, checkin_to)
+        nights = self._grid_nights(nights)
+
+        if not self.serpapi_key:
+            return dict(self._summarize_grid(city_name, checkins, nights, {}, top_n), skipped=0)
+
+        semaphore = asyncio.Semaphore(self.page_workers)
+        # Même budget par grille que la version synchrone (acquisition non bloquante)
+        budget = threading.Semaphore(self.grid_searches)
+        deadline = time.monotonic() + self.grid_wait
+        skipped = []
+
+        async def search_cell(checkin, length):
+            async with semaphore:
+                try:
+                    return (checkin, length), await self._search_cell(city_name, checkin, length, adults, budget, deadline, skipped)
+                except Exception as e:
+                    print(f"Hotel grid error for {(checkin, length)}: {e}")
+                    return (checkin, length), None
+
+        results = dict(await asyncio.gather(*(search_cell(checkin, length) for checkin in checkins for length in nights)))
+        return dict(self._summarize_grid(city_name, checkins, nights, results, top_n), skipped=len(skipped))
+
+    async def _search_cell(self, city_name, checkin_date, nights, adults, budget, deadline, skipped):
+        checkout_date = self._checkout(checkin_date, nights)
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        if not serpapi_cache.contains(params):
+            stored = await asyncio.to_thread(self._stored_hotels, params, city_name, checkin_date, checkout_date, adults)
+            if stored is not None:
+                return stored
+            if not budget.acquire(blocking=False) or not await self.limiter.acquire_async(timeout=max(0, deadline - time.monotonic())):
+                skipped.append((checkin_date, nights))
+                return None
+        key = ('hotels', city_name, checkin_date, checkout_date, adults, False, 0)
+        return await async_upstream_calls.do(key, lambda: self._load_inventory(city_name, checkin_date, checkout_date, adults))
+
+    async def _build_index(self, city_name, checkin_date, checkout_date, adults, deep, min_results):
+        hotels = await self._load_inventory(city_name, checkin_date, checkout_date, adults, deep, min_results)
+        return HotelIndex(hotels) if hotels is not None else None
+
+    async def _load_inventory(self, city_name, checkin_date, checkout_date, adults, deep=False, min_results=0):
+        if deep:
+            hotels = await self._load_hotels_deep(city_name, checkin_date, checkout_date, adults)
+        else:
+            hotels = await self._load_hotels(city_name, checkin_date, checkout_date, adults)
+
+        if min_results and (hotels is None or len(hotels) < min_results):
+            hotels = await self._broaden(hotels, city_name, checkin_date, checkout_date, adults, min_results)
+
+        return hotels
+
+    async def _load_hotels(self, city_name, checkin_date, checkout_date, adults):
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+
+        if not serpapi_cache.contains(params):
+            stored = await asyncio.to_thread(self._stored_hotels, params, city_name, checkin_date, checkout_date, adults)
+            if stored is not None:
+                return stored
+
+        loop = asyncio.get_running_loop()
+
+        def persist(payload):
+            loop.run_in_executor(None, self._persist_hotels, payload, city_name, checkin_date, checkout_date, adults)
+
+        data = await serpapi_search_async(params, base_url=self.base_url, timeout=15, on_fetch=persist)
+
+        if data is None:
+            return None
+
+        return self._parse_hotels(data)
+
+    async def _load_hotels_deep(self, city_name, checkin_date, checkout_date, adults, max_pages: int = DEEP_MAX_PAGES):
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        loop = asyncio.get_running_loop()
+
+        def persist(payload):
+            loop.run_in_executor(None, self._persist_hotels, payload, city_name, checkin_date, checkout_date, adults)
+
+        first = await serpapi_search_async(params, base_url=self.base_url, timeout=15, on_fetch=persist)
+
+        if first is None:
+            return None
+
+        page_size = len(first.get('properties', []))
+        if not first.get('serpapi_pagination') or not page_size:
+            return self._parse_hotels(first)
+
+        pages = await asyncio.gather(
+            *(self._fetch_page(params, page * page_size) for page in range(1, max_pages)),
+            return_exceptions=True
+        )
+
+        index = HotelDedupIndex(locality=(city_name,)).extend(self._parse_hotels(first))
+        for page in pages:
+            if isinstance(page, Exception):
+                print(f"Hotel page error: {page}")
+                continue
+            if page is None:
+                continue
+            if not page:
+                break
+            index.extend(page)
+
+        return index.hotels
+
+    async def _fetch_page(self, params, start):
+        data = await serpapi_search_async(dict(params, start=str(start)), base_url=self.base_url, timeout=15)
+        if data is None:
+            return None
+        return self._parse_hotels(data)
+
+
+    async def _broaden(self, hotels, city_name, checkin_date, checkout_date, adults, min_results):
+        index = HotelDedupIndex(locality=(city_name,)).extend(hotels or [])
+
+        tasks = [
+            asyncio.ensure_future(self._fetch_variant(params))
+            for params in self._variant_params(city_name, checkin_date, checkout_date, adults)
+        ]
+
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                try:
+                    page = await next_page
+                except Exception as e:
+                    print(f"Hotel variant error: {e}")
+                    continue
+                if page:
+                    index.extend(page)
+                if len(index) >= min_results:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if hotels is None and not index.hotels:
+            return None
+        return index.hotels
+
+    async def _fetch_variant(self, params):
+        if not serpapi_cache.contains(params) and not await self.limiter.acquire_async(timeout=self.variant_wait):
+            return None
+        data = await serpapi_search_async(params, base_url=self.base_url, timeout=10)
+        if data is None:
+            return None
+        return self._parse_hotels(data)
+
+
+class AsyncActivityService(ActivityService):
+    """asyncio version of ActivityService (category searches as concurrent tasks)"""
+
+    async def search_activities(self, destination_city: str, deadline: float = None):
+        """Search for activities using Google Places API"""
+        return (await self.search_activities_timed(destination_city, deadline))['activities']
+
+    async def search_activities_timed(self, destination_city: str, deadline: float = None):
+        """Return {'activities', 'categories'}: every category searched concurrently under one deadline"""
+        coordinates = self.city_coordinates.get(destination_city.lower())
+
+        if not coordinates or not self.google_maps_api_key:
+            return await asyncio.to_thread(self._offline_activities, destination_city)
+
+        lat, lng = coordinates
+        deadline = self.deadline if deadline is None else deadline
+        started = time.perf_counter()
+        tasks = [
+            asyncio.ensure_future(self._timed_search(lat, lng, place_type, limit, deadline))
+            for place_type, _, limit in PLACE_CATEGORIES
+        ]
+        await asyncio.wait(tasks, timeout=deadline)
+
+        results = {}
+        for (place_type, _, _), task in zip(PLACE_CATEGORIES, tasks):
+            if task.done() and not task.cancelled() and task.exception() is None:
+                results[place_type] = task.result()
+            else:
+                task.cancel()
+                results[place_type] = (None, time.perf_counter() - started)
+
+        return self._collect(results)
+
+    async def _timed_search(self, lat, lng, place_type, limit, timeout):
+        started = time.perf_counter()
+        return await self._search_places(lat, lng, place_type, limit=limit, timeout=timeout), time.perf_counter() - started
+
+    async def _search_places(self, lat, lng, place_type, radius=15000, limit=10, timeout=10):
+        if not self.google_maps_api_key:
+            return []
+
+        local = await asyncio.to_thread(self._local_places, lat, lng, place_type, radius, limit)
+        if local is not None:
+            return local
+
+        params = self._places_params(lat, lng, place_type, radius)
+        started = time.perf_counter()
+
+        try:
+            response = await async_http_client.get(f"{self.base_url}/nearbysearch/json", params=params, timeout=timeout)
+
+            if response.status_code == 200:
+                data = response.json()
+                await asyncio.to_thread(self._store_places, lat, lng, place_type, radius, data)
+                places = self._filter_places(data, limit)
+                if not data.get('next_page_token'):
+                    return places
+                return await self._continue_places_async(
+                    places, data['next_page_token'], place_type, limit, timeout - (time.perf_counter() - started)
+                )
+        except Exception as e:
+            print(f"Places API error: {e}")
+
+        return []
+
+    async def _continue_places_async(self, places, token, place_type, limit, remaining):
+        """ActivityService._continue_places with the token pages awaited on the event loop.
+
+        Cancelling the category task (deadline reached) stops the page
+        fetches at once; the background prefetch is still started.
+        """
+        deadline = time.perf_counter() + remaining
+        found = {place.get('place_id') for place in places}
+        next_token = token
+        pages = 1
+        try:
+            while next_token and len(places) < limit and pages < MAX_PLACES_PAGES and deadline - time.perf_counter() > self.page_token_delay + 1:
+                data = await self._fetch_token_page_async(next_token, place_type, deadline)
+                pages += 1
+                if data is None:
+                    break
+                self._add_page(places, found, data)
+                next_token = data.get('next_page_token')
+        finally:
+            # Pages déjà chargées ci-dessus : servies par le cache de pages
+            self._get_prefetch_executor().submit(self._prefetch_pages, token, place_type)
+
+        places.sort(key=lambda place: place.get('rating', 0), reverse=True)
+        return places[:limit]
+
+    async def _fetch_token_page_async(self, token, place_type, deadline):
+        """Payload of the page behind a next_page_token (shared page cache, None past deadline)"""
+        return await self.pages.get_or_fetch_async({'pagetoken': token}, lambda: async_upstream_calls.do(
+            ('places_page', token), lambda: self._load_token_page_async(token, place_type, deadline)
+        ))
+
+    async def _load_token_page_async(self, token, place_type, deadline):
+        """Fetch a token page, waiting for the token to become valid (None on error or past deadline)"""
+        for attempt in range(MAX_PAGE_ATTEMPTS):
+            if deadline - time.perf_counter() <= self.page_token_delay:
+                return None
+            await asyncio.sleep(self.page_token_delay)
+            timeout = min(PAGE_REQUEST_TIMEOUT, deadline - time.perf_counter())
+            if timeout <= 0:
+                return None
+            try:
+                response = await async_http_client.get(
+                    f"{self.base_url}/nearbysearch/json",
+                    params={'pagetoken': token, 'key': self.google_maps_api_key},
+                    timeout=timeout
+                )
+            except Exception as e:
+                print(f"Places page error: {e}")
+                return None
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            if data.get('status') == 'INVALID_REQUEST':
+                continue
+            if data.get('status') != 'OK':
+                return None
+            try:
+                await asyncio.to_thread(self.pois.save_places, data.get('results', []), place_type)
+            except Exception as e:
+                print(f"POI store error: {e}")
+            return data
+        return None
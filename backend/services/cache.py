@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Paramètres jamais inclus dans la clé de cache (identifiants propres au compte)
+SECRET_PARAMS = ('api_key', 'key')
+
+
+class ResponseCache:
+    """Process-wide TTL + LRU cache for upstream JSON responses.
+
+    Entries are keyed by the canonicalized request params (secrets excluded)
+    and expire after a per-engine TTL. Expired entries are still served for
+    `stale_ttl` seconds while a single background refresh replaces them.
+    """
+
+    def __init__(self, max_entries: int = 512, ttls: dict = None, default_ttl: int = 600, stale_ttl: int = 600, refresh_workers: int = 4):
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at, ttl)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_workers = refresh_workers
+        self._executor = None
+        self._tasks = set()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'refreshes': 0, 'refresh_errors': 0}
+
+    @staticmethod
+    def make_key(params: dict) -> str:
+        """Canonical cache key: sorted params, values as strings, secrets removed"""
+        canonical = {str(k): str(v) for k, v in params.items() if k not in SECRET_PARAMS and v is not None}
+        return json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+
+    def ttl_for(self, params: dict) -> int:
+        return self.ttls.get(params.get('engine'), self.default_ttl)
+
+    def get_or_fetch(self, params: dict, fetch, on_fetch=None):
+        """Return the cached response for params, calling fetch() on a miss.
+
+        fetch() returning None (upstream error) is not cached. on_fetch(value)
+        is called for every value actually fetched upstream, including
+        background refreshes of stale entries.
+        """
+        key = self.make_key(params)
+
+        with self._lock:
+            found, value, stale = self._lookup(key)
+            if stale:
+                self._schedule_refresh(key, params, fetch, on_fetch)
+        if found:
+            return value
+
+        value = fetch()
+        if value is not None:
+            self.set(params, value)
+            self._notify(on_fetch, value)
+        return value
+
+    async def get_or_fetch_async(self, params: dict, fetch, on_fetch=None):
+        """Async variant of get_or_fetch: fetch is a coroutine function and
+        stale entries are refreshed in an asyncio task."""
+        key = self.make_key(params)
+
+        with self._lock:
+            found, value, stale = self._lookup(key)
+            if stale and key not in self._refreshing:
+                self._refreshing.add(key)
+                task = asyncio.get_running_loop().create_task(self._refresh_async(key, params, fetch, on_fetch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        if found:
+            return value
+
+        value = await fetch()
+        if value is not None:
+            self.set(params, value)
+            self._notify(on_fetch, value)
+        return value
+
+    def _lookup(self, key):
+        """(found, value, stale) for key, updating counters (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at, ttl = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return True, value, False
+            if age < ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self._stats['stale_hits'] += 1
+                return True, value, True
+            del self._entries[key]
+        self._stats['misses'] += 1
+        return False, None, False
+
+    def servable_for(self, params: dict) -> int:
+        """How long (s) a response for params may be served: TTL plus the stale window"""
+        return self.ttl_for(params) + self.stale_ttl
+
+    def contains(self, params: dict) -> bool:
+        """True if a fresh or still-servable stale entry exists for params"""
+        key = self.make_key(params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            _, stored_at, ttl = entry
+            return time.time() - stored_at < ttl + self.stale_ttl
+
+    def expires_in(self, params: dict):
+        """Seconds before the entry for params goes stale (negative once stale), None if absent"""
+        key = self.make_key(params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            _, stored_at, ttl = entry
+        return stored_at + ttl - time.time()
+
+    def set(self, params: dict, value):
+        key = self.make_key(params)
+        with self._lock:
+            self._entries[key] = (value, time.time(), self.ttl_for(params))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _notify(self, on_fetch, value):
+        if on_fetch is None:
+            return
+        try:
+            on_fetch(value)
+        except Exception as e:
+            print(f"Cache on_fetch error: {e}")
+
+    def _schedule_refresh(self, key, params, fetch, on_fetch):
+        """Refresh a stale entry in the background (caller holds the lock)"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._refresh_workers, thread_name_prefix='cache-refresh')
+        self._executor.submit(self._refresh, key, params, fetch, on_fetch)
+
+    def _refresh(self, key, params, fetch, on_fetch):
+        try:
+            value = fetch()
+            if value is not None:
+                self.set(params, value)
+                self._notify(on_fetch, value)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            print(f"Cache refresh error: {e}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _refresh_async(self, key, params, fetch, on_fetch):
+        try:
+            value = await fetch()
+            if value is not None:
+                self.set(params, value)
+                self._notify(on_fetch, value)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            print(f"Cache refresh error: {e}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+# Cache partagé par tous les appels SerpAPI du processus
+serpapi_cache = ResponseCache(
+    max_entries=int(os.environ.get('SERPAPI_CACHE_MAX_ENTRIES', 512)),
+    ttls={
+        'google_flights': int(os.environ.get('SERPAPI_CACHE_TTL_FLIGHTS', 900)),
+        'google_hotels': int(os.environ.get('SERPAPI_CACHE_TTL_HOTELS', 1800)),
+    },
+    default_ttl=int(os.environ.get('SERPAPI_CACHE_TTL_DEFAULT', 900)),
+    stale_ttl=int(os.environ.get('SERPAPI_CACHE_STALE_TTL', 600)),
+)
@@ -1,18 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-import requests
 import os
+import queue
+
+from .cache import serpapi_cache
+from .models import FlightOffer, is_fallback
+from .store import offer_store
+from .serpapi import serpapi_search, serpapi_refresh, SERPAPI_URL
+from .refresher import hot_refresher
+from .singleflight import upstream_calls
+
+# Nombre max de jours interrogés en mode fenêtre flexible (1 appel SerpAPI par jour)
+MAX_WINDOW_DAYS = 31
 
 class FlightSearchService:
     def __init__(self):
         self.serpapi_key = os.environ.get('SERPAPI_KEY')
-        self.base_url = "https://serpapi.com/search.json"
+        self.base_url = SERPAPI_URL
+        self.window_workers = int(os.environ.get('FLIGHT_WINDOW_WORKERS', MAX_WINDOW_DAYS))
+        self.store = offer_store
+        # Routes / dates les plus demandées gardées au chaud en arrière-plan
+        self.refresher = hot_refresher
+        if self.serpapi_key:
+            self.refresher.register('flights', self._build_params, self.refresh_flights)
+        self._executor = None
+
+    def _get_executor(self):
+        """Lazily create the bounded worker pool used for date-window fan-out"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.window_workers, thread_name_prefix='flight-window')
+        return self._executor
 
     def search_flights(self, origin_city: str, destination_city: str, departure_date_from: str = None, departure_date_to: str = None, min_stay_duration: int = 4):
         """Search for flights from origin to destination"""
-        from . import CITY_TO_IATA, IATA_TO_CITY
-
-        origin = CITY_TO_IATA.get(origin_city.lower(), origin_city.upper())
-        destination = CITY_TO_IATA.get(destination_city.lower(), destination_city.upper())
+        origin, destination = self._resolve_route(origin_city, destination_city)
 
         if not departure_date_from:
             departure_date_from = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
@@ -23,14 +44,195 @@ class FlightSearchService:
         if not self.serpapi_key:
             return self._get_fallback_flights(origin, destination, departure_date_from)
 
+        self.refresher.record('flights', origin, destination, departure_date_from, min_stay_duration)
         try:
             return self._search_with_serpapi(origin, destination, departure_date_from, min_stay_duration)
         except Exception as e:
             print(f"Flight search error: {e}")
             return self._get_fallback_flights(origin, destination, departure_date_from)
 
+    def search_flights_window(self, origin_city: str, destination_city: str, departure_date_from: str = None, departure_date_to: str = None, min_stay_duration: int = 4, top_n: int = 10, per_day: int = 3):
+        """Search every departure date of a flexible window in parallel.
+
+        Returns a dict with the cheapest offers per departure date ('by_date')
+        and the global cheapest offers across the window ('flights').
+        """
+        origin, destination = self._resolve_route(origin_city, destination_city)
+        dates = self._window_dates(departure_date_from, departure_date_to)
+
+        if not self.serpapi_key:
+            return self._summarize_window(origin, destination, dates, {}, top_n, per_day)
+
+        # Un appel par jour, tous lancés en même temps : la latence totale
+        # reste proche d'un seul aller-retour SerpAPI tant que le pool suffit
+        executor = self._get_executor()
+        futures = {
+            date: executor.submit(self._fetch_serpapi_flights, origin, destination, date, min_stay_duration)
+            for date in dates
+        }
+
+        results = {}
+        for date, future in futures.items():
+            try:
+                results[date] = future.result()
+            except Exception as e:
+                print(f"Flight window search error for {date}: {e}")
+
+        return self._summarize_window(origin, destination, dates, results, top_n, per_day)
+
+    def stream_flights(self, origin_city: str, destination_city: str, departure_date_from: str = None, departure_date_to: str = None, min_stay_duration: int = 4, flexible: bool = False, top_n: int = 10, per_day: int = 3):
+        """Yield search events as soon as results are available.
+
+        Emits {'type': 'offer'} for each bookable offer as soon as it is
+        parsed, {'type': 'date'} when a departure date of a flexible window
+        completes, then a final {'type': 'summary'} with the cheapest offers
+        sorted by price. Fallback offers (no live result at all) are never
+        sent as offers: they only appear in the summary, with 'fallback': True.
+        """
+        origin, destination = self._resolve_route(origin_city, destination_city)
+
+        if flexible:
+            dates = self._window_dates(departure_date_from, departure_date_to)
+        else:
+            dates = [departure_date_from or (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')]
+
+        results = {}
+        if self.serpapi_key:
+            events = queue.Queue()
+            executor = self._get_executor()
+            for date in dates:
+                executor.submit(self._stream_date, origin, destination, date, min_stay_duration, events)
+            # Offres émises au fil du parsing, chaque date close dès que sa recherche se termine
+            while len(results) < len(dates):
+                kind, date, value = events.get()
+                if kind == 'offer':
+                    yield {'type': 'offer', 'date': date, 'offer': value}
+                    continue
+                results[date] = value
+                if flexible:
+                    yield {'type': 'date', 'date': date, 'count': len(value or [])}
+
+        summary = self._summarize_window(origin, destination, dates, results, top_n, per_day)
+
+        event = {'type': 'summary', 'flights': summary['flights'], 'total': len(summary['flights']),
+                 'fallback': is_fallback(summary['flights'])}
+        if flexible:
+            event['by_date'] = summary['by_date']
+        yield event
+
+    def _stream_date(self, origin: str, destination: str, departure_date: str, min_stay: int, events):
+        """Search one departure date for stream_flights, queueing each offer as soon as it is parsed"""
+        streamed = []
+
+        def emit(offer):
+            streamed.append(offer)
+            events.put(('offer', departure_date, offer))
+
+        offers = None
+        try:
+            offers = self._fetch_serpapi_flights(origin, destination, departure_date, min_stay, on_offer=emit)
+            # Offres du stockage ou d'une recherche partagée avec une autre requête : pas encore émises
+            if not streamed:
+                for offer in offers or []:
+                    events.put(('offer', departure_date, offer))
+        except Exception as e:
+            print(f"Flight stream search error for {departure_date}: {e}")
+        finally:
+            events.put(('done', departure_date, offers))
+
+    def _summarize_window(self, origin: str, destination: str, dates: list, results: dict, top_n: int, per_day: int):
+        """Cheapest offers per date plus global top-N from per-date results"""
+        by_date = {}
+        all_flights = []
+        for date in dates:
+            day_flights = results.get(date)
+            if day_flights:
+                by_date[date] = day_flights[:per_day]
+                all_flights.extend(day_flights)
+
+        if not all_flights:
+            flights = self._get_fallback_flights(origin, destination, dates[0])
+            return {'flights': flights[:top_n], 'by_date': {dates[0]: flights[:per_day]}}
+
+        all_flights.sort(key=lambda x: x.price)
+        return {'flights': all_flights[:top_n], 'by_date': by_date}
+
+    def _resolve_route(self, origin_city: str, destination_city: str):
+        """Map city names to IATA codes (unknown names are used as codes)"""
+        from . import CITY_TO_IATA
+
+        origin = CITY_TO_IATA.get(origin_city.lower(), origin_city.upper())
+        destination = CITY_TO_IATA.get(destination_city.lower(), destination_city.upper())
+        return origin, destination
+
+    def _window_dates(self, departure_date_from: str = None, departure_date_to: str = None):
+        """List every departure date of the window (inclusive, capped to MAX_WINDOW_DAYS)"""
+        try:
+            start = datetime.strptime(departure_date_from, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            start = datetime.now() + timedelta(days=30)
+        try:
+            end = datetime.strptime(departure_date_to, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            end = start + timedelta(days=MAX_WINDOW_DAYS - 1)
+
+        days = max(0, min((end - start).days, MAX_WINDOW_DAYS - 1))
+        return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days + 1)]
+
     def _search_with_serpapi(self, origin: str, destination: str, departure_date: str, min_stay: int):
         """Search flights using SERPAPI Google Flights"""
+        flights = self._fetch_serpapi_flights(origin, destination, departure_date, min_stay)
+        return flights[:10] if flights else self._get_fallback_flights(origin, destination, departure_date)
+
+    def _fetch_serpapi_flights(self, origin: str, destination: str, departure_date: str, min_stay: int, on_offer=None):
+        """Fetch and parse bookable offers for one departure date, sorted by price (None on API error).
+
+        Concurrent identical searches share a single upstream call; on_offer
+        is only called by the caller that actually parses the payload.
+        """
+        key = ('flights', origin, destination, departure_date, min_stay)
+        return upstream_calls.do(key, lambda: self._load_flights(origin, destination, departure_date, min_stay, on_offer))
+
+    def _load_flights(self, origin: str, destination: str, departure_date: str, min_stay: int, on_offer=None):
+        """Offers for one departure date from the cache, the store or SerpAPI (on_offer(offer) called while parsing)"""
+        params = self._build_params(origin, destination, departure_date, min_stay)
+        departure_date, return_date = params['outbound_date'], params['return_date']
+
+        # Tier chaud sur disque : consulté seulement si le cache mémoire n'a rien, et pas
+        # au-delà de ce que le cache servirait (sinon la recherche ne serait jamais rafraîchie)
+        if not serpapi_cache.contains(params):
+            max_age = min(self.store.max_age, serpapi_cache.servable_for(params))
+            stored = self.store.get_flights(origin, destination, departure_date, return_date, max_age=max_age)
+            if stored is not None:
+                return stored
+
+        def persist(payload):
+            self._persist_flights(payload, origin, destination, departure_date, return_date)
+
+        data = serpapi_search(params, base_url=self.base_url, timeout=15, on_fetch=persist)
+
+        if data is None:
+            return None
+
+        return self._parse_flights(data, origin, destination, departure_date, return_date, on_offer)
+
+    def refresh_flights(self, origin: str, destination: str, departure_date: str, min_stay: int):
+        """Fetch the offers of one departure date again (cache and store updated); False on API error"""
+        params = self._build_params(origin, destination, departure_date, min_stay)
+        departure_date, return_date = params['outbound_date'], params['return_date']
+
+        def persist(payload):
+            self._persist_flights(payload, origin, destination, departure_date, return_date)
+
+        return serpapi_refresh(params, base_url=self.base_url, timeout=15, on_fetch=persist) is not None
+
+    def _persist_flights(self, data: dict, origin: str, destination: str, departure_date: str, return_date: str):
+        """Write the offers of a freshly fetched payload to the store"""
+        flights = self._parse_flights(data, origin, destination, departure_date, return_date)
+        self.store.save_flights(origin, destination, departure_date, return_date, flights)
+
+    def _build_params(self, origin: str, destination: str, departure_date: str, min_stay: int):
+        """SerpAPI Google Flights params for a round trip (invalid dates default to today+30)"""
         try:
             departure_dt = datetime.strptime(departure_date, '%Y-%m-%d')
         except:
@@ -39,7 +241,7 @@ class FlightSearchService:
 
         return_date = (departure_dt + timedelta(days=min_stay)).strftime('%Y-%m-%d')
 
-        params = {
+        return {
             'engine': 'google_flights',
             'departure_id': origin,
             'arrival_id': destination,
@@ -52,17 +254,21 @@ class FlightSearchService:
             'type': '1'  # Round trip
         }
 
-        response = requests.get(self.base_url, params=params, timeout=15)
-
-        if response.status_code != 200:
-            return self._get_fallback_flights(origin, destination, departure_date)
+    def _parse_flights(self, data: dict, origin: str, destination: str, departure_date: str, return_date: str, on_offer=None):
+        """Parse bookable offers out of a Google Flights payload, sorted by price"""
+        flights = []
+        for offer in self._iter_flights(data, origin, destination, departure_date, return_date):
+            flights.append(offer)
+            if on_offer is not None:
+                on_offer(offer)
 
-        data = response.json()
+        # Sort by price
+        flights.sort(key=lambda x: x.price)
 
-        if 'error' in data:
-            return self._get_fallback_flights(origin, destination, departure_date)
+        return flights
 
-        flights = []
+    def _iter_flights(self, data: dict, origin: str, destination: str, departure_date: str, return_date: str):
+        """Yield each bookable offer of a Google Flights payload as soon as it is built (payload order)"""
         best_flights = data.get('best_flights', [])
         other_flights = data.get('other_flights', [])
 
@@ -123,24 +329,19 @@ class FlightSearchService:
 
             # ONLY add flight if we have a valid booking link (not generic search)
             if booking_link and booking_source in ['partner', 'google', 'extension']:
-                flights.append({
-                    'airline': airline,
-                    'departure': origin,
-                    'arrival': destination,
-                    'departureTime': departure_time,
-                    'arrivalTime': arrival_time,
-                    'departureDate': departure_date,
-                    'returnDate': return_date,
-                    'price': price,
-                    'duration': duration_str,
-                    'stops': layovers,
-                    'booking_link': booking_link
-                })
-
-        # Sort by price
-        flights.sort(key=lambda x: x['price'])
-
-        return flights[:10] if flights else self._get_fallback_flights(origin, destination, departure_date)
+                yield FlightOffer(
+                    airline=airline,
+                    departure=origin,
+                    arrival=destination,
+                    departureTime=departure_time,
+                    arrivalTime=arrival_time,
+                    departureDate=departure_date,
+                    returnDate=return_date,
+                    price=price,
+                    duration=duration_str,
+                    stops=layovers,
+                    booking_link=booking_link
+                )
 
     def _get_fallback_flights(self, origin: str, destination: str, departure_date: str):
         """Fallback flights when API fails or no API key"""
@@ -174,19 +375,20 @@ class FlightSearchService:
             # Generic Google Flights link
             booking_link = f"https://www.google.com/travel/flights?q=Flights+from+{origin}+to+{destination}+on+{departure_date}"
 
-            results.append({
-                'airline': airline['name'],
-                'departure': origin,
-                'arrival': destination,
-                'departureTime': dep_time,
-                'arrivalTime': arr_time,
-                'departureDate': departure_date,
-                'returnDate': departure_date,  # Fallback uses same date
-                'price': final_price,
-                'duration': duration,
-                'stops': 0,
-                'booking_link': booking_link
-            })
-
-        results.sort(key=lambda x: x['price'])
+            results.append(FlightOffer(
+                airline=airline['name'],
+                departure=origin,
+                arrival=destination,
+                departureTime=dep_time,
+                arrivalTime=arr_time,
+                departureDate=departure_date,
+                returnDate=departure_date,  # Fallback uses same date
+                price=final_price,
+                duration=duration,
+                stops=0,
+                booking_link=booking_link,
+                fallback=True
+            ))
+
+        results.sort(key=lambda x: x.price)
         return results
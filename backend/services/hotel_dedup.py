@@ -0,0 +1,200 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import replace
+
+from .mappings import CITY_TO_IATA, IATA_TO_CITY
+
+# Mots sans valeur d'identification dans un nom d'hôtel
+STOPWORDS = frozenset({
+    'hotel', 'hotels', 'hoteles', 'the', 'a', 'an', 'and', 'by', 'at', 'of',
+    'de', 'del', 'du', 'des', 'la', 'le', 'les', 'l', 'd', 'et', 'el', 'los', 'y', 'di', 'da',
+})
+_WORDS = re.compile(r'[a-z0-9]+')
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+
+
+# Mots de lieu : communs à des hôtels voisins, ils n'identifient pas un établissement
+LOCALITY_WORDS = frozenset(
+    {token for city in list(CITY_TO_IATA) + list(IATA_TO_CITY.values()) for token in _WORDS.findall(_normalize(city))}
+    | {
+        'barcelona', 'lisboa', 'roma', 'london', 'wien', 'praha', 'athina', 'kobenhavn', 'brussel', 'geneve',
+        'milano', 'venezia', 'firenze', 'napoli', 'seville', 'munchen', 'edinburgh',
+        'centro', 'center', 'centre', 'central', 'city', 'ville', 'downtown', 'old', 'town', 'vieux', 'port',
+        'gare', 'station', 'stazione', 'estacion', 'airport', 'aeroport', 'aeropuerto', 'aeroporto',
+        'plaza', 'place', 'piazza', 'square', 'beach', 'playa', 'plage', 'north', 'south', 'east', 'west',
+        'nord', 'sud', 'est', 'ouest',
+    }
+)
+
+EARTH_RADIUS_M = 6371000
+
+
+def name_tokens(name: str) -> frozenset:
+    """Identifying tokens of a hotel name: accents, case, punctuation and stopwords removed"""
+    return frozenset(token for token in _WORDS.findall(_normalize(name)) if token not in STOPWORDS)
+
+
+def distance_m(lat1, lon1, lat2, lon2) -> float:
+    """Equirectangular distance in meters (precise enough below a few km)"""
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_M * math.hypot(x, y)
+
+
+class HotelDedupIndex:
+    """Incremental index merging the same property seen in several result sets.
+
+    Names are compared on their distinctive tokens: locality words (city
+    and area names, `locality` such as the searched city, and tokens found
+    in at least `frequent_share` of the distinct hotels) are left out, so
+    "Novotel Paris Gare de Lyon" and "Mercure Paris Gare de Lyon" only
+    compare "novotel" with "mercure". Two hotels are the same property when
+    one's distinctive tokens contain the other's (brand and variant must
+    match) and, if both have coordinates, they are less than `radius_m`
+    apart; names made only of locality words must be identical.
+
+    Located hotels are compared only with the hotels of the neighbouring
+    grid cells (one cell per radius), the others with the hotels sharing a
+    name token, so each add() looks at a handful of entries instead of the
+    whole set. Merged entries keep the cheapest offer (price, booking link
+    and the name it was listed under) and the richest metadata of every
+    duplicate.
+    """
+
+    def __init__(self, radius_m: float = 150, min_overlap: float = 1.0, min_similarity: float = 0.8,
+                 locality=(), frequent_share: float = 0.25, frequent_min: int = 4):
+        self.radius_m = radius_m
+        # Recouvrement (|A∩B| / min) exigé quand la position confirme ; Jaccard sinon
+        self.min_overlap = min_overlap
+        self.min_similarity = min_similarity
+        self.locality = LOCALITY_WORDS | {token for place in locality for token in name_tokens(place)}
+        self.frequent_share = frequent_share
+        self.frequent_min = frequent_min
+        self.hotels = []
+        self.merged = 0
+        self._tokens = []
+        self._frequency = Counter()  # token -> nombre d'hôtels distincts qui le portent
+        self._cell_deg = radius_m / (math.pi * EARTH_RADIUS_M / 180)
+        self._cells = defaultdict(list)  # (lat, lon) de la cellule -> positions des hôtels localisés
+        self._postings = defaultdict(list)  # token -> positions de tous les hôtels
+        self._unlocated = defaultdict(list)  # token -> positions des hôtels sans coordonnées
+        self._copied = set()
+
+    def __len__(self):
+        return len(self.hotels)
+
+    def extend(self, hotels):
+        for hotel in hotels:
+            self.add(hotel)
+        return self
+
+    def add(self, hotel) -> int:
+        """Position of hotel in self.hotels, merged into an existing entry if it is a duplicate"""
+        tokens = name_tokens(hotel.name)
+        position = self._find(hotel, tokens)
+        if position is None:
+            position = len(self.hotels)
+            self.hotels.append(hotel)
+            self._tokens.append(tokens)
+            self._frequency.update(tokens)
+            for token in tokens:
+                self._postings[token].append(position)
+            if self._located(hotel):
+                self._cells[self._cell(hotel.latitude, hotel.longitude)].append(position)
+            else:
+                for token in tokens:
+                    self._unlocated[token].append(position)
+            return position
+
+        self.merged += 1
+        self._merge(position, hotel)
+        return position
+
+    def distinctive(self, tokens) -> frozenset:
+        """Tokens of a name that identify a property: locality and very frequent words removed"""
+        threshold = max(self.frequent_min, self.frequent_share * len(self.hotels))
+        return frozenset(token for token in tokens - self.locality if self._frequency[token] < threshold)
+
+    @staticmethod
+    def _located(hotel) -> bool:
+        return hotel.latitude is not None and hotel.longitude is not None
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self._cell_deg), math.floor(longitude / self._cell_deg)
+
+    def _neighbours(self, latitude, longitude):
+        """Located hotels of the cells within radius_m (cells shrink in longitude away from the equator)"""
+        row, column = self._cell(latitude, longitude)
+        span = math.ceil(1 / max(math.cos(math.radians(latitude)), 0.01))
+        for r in (row - 1, row, row + 1):
+            for c in range(column - span, column + span + 1):
+                yield from self._cells.get((r, c), ())
+
+    def _find(self, hotel, tokens):
+        if not tokens:
+            return None
+        distinctive = self.distinctive(tokens)
+        if self._located(hotel):
+            candidates = set(self._neighbours(hotel.latitude, hotel.longitude))
+            candidates.update(self._sharing(self._unlocated, tokens, distinctive))
+        else:
+            candidates = self._sharing(self._postings, tokens, distinctive)
+        for position in sorted(candidates):
+            if self._same_property(hotel, tokens, distinctive, self.hotels[position], self._tokens[position]):
+                return position
+        return None
+
+    def _sharing(self, postings, tokens, distinctive) -> set:
+        """Positions that can match without coordinates on both sides (compared by Jaccard).
+
+        A duplicate shares at least ceil(min_similarity × |distinctive|)
+        distinctive tokens, so it holds one of the |distinctive| - that + 1
+        rarest ones; a name without distinctive token needs every token.
+        """
+        keys = distinctive or tokens
+        needed = math.ceil(self.min_similarity * len(keys) - 1e-9) if distinctive else len(keys)
+        rarest = sorted(keys, key=lambda token: len(postings.get(token, ())))[:len(keys) - needed + 1]
+        return {position for token in rarest for position in postings.get(token, ())}
+
+    def _same_property(self, hotel, tokens, distinctive, other, other_tokens) -> bool:
+        if self._located(hotel) and self._located(other):
+            if distance_m(hotel.latitude, hotel.longitude, other.latitude, other.longitude) > self.radius_m:
+                return False
+        other_distinctive = self.distinctive(other_tokens)
+        if not distinctive or not other_distinctive:
+            # Nom fait de mots de lieu seulement ("Hotel Paris Centre") : seul le même nom confirme
+            return tokens == other_tokens
+        common = len(distinctive & other_distinctive)
+        if not common:
+            return False
+        if self._located(hotel) and self._located(other):
+            return common / min(len(distinctive), len(other_distinctive)) >= self.min_overlap
+        return common / len(distinctive | other_distinctive) >= self.min_similarity
+
+    def _merge(self, position, hotel):
+        """Fold a duplicate into the entry at position (copied first so cached offers stay untouched)"""
+        if position not in self._copied:
+            self.hotels[position] = replace(self.hotels[position])
+            self._copied.add(position)
+        kept = self.hotels[position]
+
+        if hotel.price_numeric is not None and (kept.price_numeric is None or hotel.price_numeric < kept.price_numeric):
+            # Le lien de réservation reste avec le nom sous lequel l'offre est listée
+            kept.name, kept.price, kept.price_numeric, kept.booking_url = hotel.name, hotel.price, hotel.price_numeric, hotel.booking_url
+        if (hotel.reviews or 0) > (kept.reviews or 0):
+            kept.rating, kept.reviews = hotel.rating, hotel.reviews
+        kept.stars = max(kept.stars or 0, hotel.stars or 0)
+        kept.image = kept.image or hotel.image
+        if len(hotel.description or '') > len(kept.description or ''):
+            kept.description = hotel.description
+        if len(hotel.amenities or []) > len(kept.amenities or []):
+            kept.amenities = hotel.amenities
+        kept.free_cancellation = bool(kept.free_cancellation or hotel.free_cancellation)
+        if not self._located(kept) and self._located(hotel):
+            kept.latitude, kept.longitude = hotel.latitude, hotel.longitude
+            self._cells[self._cell(kept.latitude, kept.longitude)].append(position)
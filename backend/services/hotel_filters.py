@@ -0,0 +1,107 @@
+import math
+from array import array
+
+HOTEL_TYPES = ('Hotel', 'Boutique Hotel', 'Hostel', 'Resort', 'Apartment')
+
+# Valeur du filtre hotel_type -> types acceptés ('hotel' inclut les boutique hotels, comme l'ancien /api/hotels/search)
+TYPE_FILTERS = {
+    'hotel': ('Hotel', 'Boutique Hotel'),
+    'boutique': ('Boutique Hotel',),
+    'hostel': ('Hostel',),
+    'resort': ('Resort',),
+    'apartment': ('Apartment',),
+}
+
+# Codes sort_by envoyés par l'ancien front
+SORT_ALIASES = {'8': 'price', '1': 'rating'}
+SORTS = ('price', 'price_desc', 'rating', 'reviews', 'stars')
+
+
+class HotelIndex:
+    """Columnar view of one hotel result set, for repeated filter / sort requests.
+
+    Each filterable attribute is kept in a typed array (one slot per hotel)
+    and each sort order is computed once, so select() scans a few compact
+    columns and only touches the HotelOffer objects it returns.
+    """
+
+    def __init__(self, hotels):
+        self.hotels = list(hotels)
+        self.price = array('d', (math.nan if h.price_numeric is None else h.price_numeric for h in self.hotels))
+        self.stars = array('b', (h.stars or 0 for h in self.hotels))
+        self.rating = array('d', (h.rating or 0 for h in self.hotels))
+        self.reviews = array('l', (h.reviews or 0 for h in self.hotels))
+        self.free_cancellation = bytes(bool(h.free_cancellation) for h in self.hotels)
+        self.type_code = bytes(self._type_code(h.hotel_type) for h in self.hotels)
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.hotels)
+
+    @staticmethod
+    def _type_code(hotel_type):
+        return HOTEL_TYPES.index(hotel_type) if hotel_type in HOTEL_TYPES else 0
+
+    def order(self, sort: str = None):
+        """Positions of the hotels in the requested order (computed once per sort)"""
+        sort = SORT_ALIASES.get(sort, sort)
+        if not sort:
+            return range(len(self.hotels))
+        if sort not in self._orders:
+            positions = range(len(self.hotels))
+            price, rating, reviews, stars = self.price, self.rating, self.reviews, self.stars
+            # Les hôtels sans prix restent en fin de liste pour les tris par prix
+            keys = {
+                'price': lambda i: (math.isnan(price[i]), price[i]),
+                'price_desc': lambda i: (math.isnan(price[i]), -price[i]),
+                'rating': lambda i: -rating[i],
+                'reviews': lambda i: -reviews[i],
+                'stars': lambda i: -stars[i],
+            }
+            if sort not in keys:
+                raise ValueError(f"Unknown sort '{sort}' (expected one of {', '.join(SORTS)})")
+            self._orders[sort] = tuple(sorted(positions, key=keys[sort]))
+        return self._orders[sort]
+
+    def select(self, price_min: float = None, price_max: float = None, hotel_class=None, hotel_type: str = None,
+               free_cancellation: bool = False, sort: str = None, limit: int = None):
+        """Hotels matching every given filter, in the requested order.
+
+        hotel_class is a star count, a list of them or a comma separated
+        string ('4,5'). A price filter excludes hotels without a price.
+        """
+        classes = self._parse_classes(hotel_class)
+        types = None
+        if hotel_type:
+            if hotel_type.lower() not in TYPE_FILTERS:
+                raise ValueError(f"Unknown hotel_type '{hotel_type}' (expected one of {', '.join(TYPE_FILTERS)})")
+            types = {HOTEL_TYPES.index(t) for t in TYPE_FILTERS[hotel_type.lower()]}
+
+        price, stars, cancellable, type_code = self.price, self.stars, self.free_cancellation, self.type_code
+        result = []
+        for i in self.order(sort):
+            # Comparaisons écrites pour exclure NaN (prix inconnu)
+            if price_min is not None and not price[i] >= price_min:
+                continue
+            if price_max is not None and not price[i] <= price_max:
+                continue
+            if classes is not None and stars[i] not in classes:
+                continue
+            if types is not None and type_code[i] not in types:
+                continue
+            if free_cancellation and not cancellable[i]:
+                continue
+            result.append(self.hotels[i])
+            if limit and len(result) >= limit:
+                break
+        return result
+
+    @staticmethod
+    def _parse_classes(hotel_class):
+        if hotel_class is None or hotel_class == '':
+            return None
+        if isinstance(hotel_class, int):
+            return {hotel_class}
+        if isinstance(hotel_class, str):
+            hotel_class = hotel_class.split(',')
+        return {int(value) for value in hotel_class if str(value).strip()}
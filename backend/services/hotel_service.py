@@ -1,170 +1,519 @@
-import requests
 import re
 import os
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .cache import ResponseCache, serpapi_cache
+from .hotel_dedup import HotelDedupIndex
+from .hotel_filters import HotelIndex
+from .image_proxy import image_proxy
+from .models import HotelOffer
+from .rates import rate_normalizer
+from .store import offer_store
+from .serpapi import serpapi_search, serpapi_refresh, SERPAPI_URL
+from .rate_limit import serpapi_limiter
+from .refresher import hot_refresher
+from .singleflight import upstream_calls
+
+# Pages SerpAPI lues au maximum en mode inventaire profond (~20 hôtels par page)
+DEEP_MAX_PAGES = 4
+
+# Variantes de recherche (région, langue, formulation) pour élargir l'inventaire
+SEARCH_VARIANTS = (
+    {'gl': 'us', 'hl': 'en'},
+    {'gl': 'uk', 'hl': 'en'},
+    {'q': 'hotels near {city}'},
+    {'q': '{city} accommodation'},
+    {'gl': 'de', 'hl': 'de'},
+)
+
+# Grille de dates flexible : check-in max et durées de séjour max (1 appel par cellule non cachée)
+MAX_GRID_CHECKINS = 14
+MAX_GRID_NIGHTS = 7
+DEFAULT_GRID_NIGHTS = (2, 3, 4, 5)
 
 class HotelService:
     def __init__(self):
         self.serpapi_key = os.environ.get('SERPAPI_KEY')
-        self.base_url = "https://serpapi.com/search.json"
+        self.base_url = SERPAPI_URL
+        self.store = offer_store
+        self.rates = rate_normalizer
+        self.images = image_proxy
+        self.page_workers = int(os.environ.get('HOTEL_PAGE_WORKERS', 8))
+        self.limiter = serpapi_limiter
+        self.variant_wait = float(os.environ.get('HOTEL_VARIANT_MAX_WAIT', 5))
+        # Grille de dates : recherches SerpAPI max par requête et attente max du quota partagé
+        self.grid_searches = int(os.environ.get('HOTEL_GRID_MAX_SEARCHES', 24))
+        self.grid_wait = float(os.environ.get('HOTEL_GRID_MAX_WAIT', 10))
+        # Index colonnaires des séjours déjà recherchés (filtres / tris sans nouvel appel)
+        self.indexes = ResponseCache(
+            max_entries=int(os.environ.get('HOTEL_INDEX_MAX_ENTRIES', 256)),
+            default_ttl=int(os.environ.get('HOTEL_INDEX_TTL', 900)),
+            stale_ttl=0,
+        )
+        # Séjours les plus demandés gardés au chaud en arrière-plan
+        self.refresher = hot_refresher
+        if self.serpapi_key:
+            self.refresher.register('hotels', self._build_params, self.refresh_stay)
+        self._executor = None
+
+    def _get_executor(self):
+        """Lazily create the worker pool used to fetch result pages and variants in parallel"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.page_workers, thread_name_prefix='hotel-pages')
+        return self._executor
     
-    def search_hotels(self, destination_city: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2):
-        """Search for hotels using SERP API Google Hotels"""
-        from .mappings import IATA_TO_CITY, CITY_TO_IATA
-        
-        # Convert city name to IATA if needed, then to city name for API
-        if destination_city.upper() in IATA_TO_CITY:
-            city_name = IATA_TO_CITY[destination_city.upper()]
-        elif destination_city.lower() in CITY_TO_IATA:
-            iata = CITY_TO_IATA[destination_city.lower()]
-            city_name = IATA_TO_CITY.get(iata, destination_city)
-        else:
-            city_name = destination_city
-        
-        if not checkin_date:
-            from datetime import datetime, timedelta
-            checkin_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-        if not checkout_date:
-            from datetime import datetime, timedelta
-            checkout_date = (datetime.strptime(checkin_date, '%Y-%m-%d') + timedelta(days=3)).strftime('%Y-%m-%d')
+    def search_hotels(self, destination_city: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, deep: bool = False, min_results: int = 0):
+        """Search for hotels using SERP API Google Hotels.
+
+        deep=True reads up to DEEP_MAX_PAGES result pages instead of the first
+        one (60-90 hotels instead of ~20). With min_results, search variants
+        (SEARCH_VARIANTS) complete the set until that many distinct hotels.
+        """
+        city_name = self._resolve_city(destination_city)
+        checkin_date, checkout_date = self._default_dates(checkin_date, checkout_date)
         
         if not self.serpapi_key:
             return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
         
+        self.refresher.record('hotels', city_name, checkin_date, checkout_date, adults)
         try:
-            params = {
-                'engine': 'google_hotels',
-                'q': city_name,
-                'check_in_date': checkin_date,
-                'check_out_date': checkout_date,
-                'adults': adults,
-                'api_key': self.serpapi_key,
-                'hl': 'fr',
-                'gl': 'fr',
-                'num': '20'
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=15)
+            # Les recherches identiques simultanées partagent un seul appel SerpAPI
+            key = ('hotels', city_name, checkin_date, checkout_date, adults, deep, min_results)
+            hotels = upstream_calls.do(key, lambda: self._load_inventory(city_name, checkin_date, checkout_date, adults, deep, min_results))
             
-            if response.status_code != 200:
+            if hotels is None:
                 return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
             
-            data = response.json()
-            
-            if 'error' in data:
-                return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
-            
-            hotels = []
-            properties = data.get('properties', [])
-            
-            for hotel in properties[:30]:  # Check more hotels to find bookable ones
-                rate_info = hotel.get('rate_per_night', {}) or hotel.get('prices', {}) or hotel.get('price', {})
-
-                price_display = self._extract_price(rate_info)
-                price_numeric = self._extract_price_numeric(rate_info)
-
-                hotel_name = hotel.get('name', 'Hotel')
-
-                # Try multiple fields for VALID booking links only
-                booking_url = ''
-                booking_source = ''
-
-                # Method 1: Direct booking link from hotel data (BEST)
-                direct_link = hotel.get('booking_link', '') or hotel.get('link', '')
-                if direct_link and 'http' in direct_link and not 'google.com' in direct_link:
-                    booking_url = direct_link
-                    booking_source = 'direct'
-
-                # Method 2: Check for extension links (Booking.com, Hotels.com, Expedia, etc.)
-                if not booking_url and hotel.get('extensions'):
-                    for ext in hotel.get('extensions', []):
-                        if isinstance(ext, dict):
-                            link = ext.get('link', '')
-                            # Only accept known booking sites
-                            if link and any(site in link.lower() for site in ['booking.com', 'hotels.com', 'expedia', 'agoda', 'trip.com', 'kayak']):
-                                booking_url = link
-                                booking_source = 'extension'
-                                break
-
-                # Method 3: Check serpapi_link
-                if not booking_url:
-                    serpapi_link = hotel.get('serpapi_link', '')
-                    if serpapi_link and 'http' in serpapi_link and not 'google.com' in serpapi_link:
-                        booking_url = serpapi_link
-                        booking_source = 'serpapi'
-
-                # Method 4: Try extracted_link
-                if not booking_url:
-                    extracted = hotel.get('extracted_link', '')
-                    if extracted and 'http' in extracted and not 'google.com' in extracted:
-                        booking_url = extracted
-                        booking_source = 'extracted'
-
-                # ONLY add hotel if we have a valid booking link (not generic search)
-                if booking_url and booking_source in ['direct', 'extension', 'serpapi', 'extracted']:
-                    hotels.append({
-                        'name': hotel_name,
-                        'rating': hotel.get('overall_rating', 0),
-                        'price': price_display or 'Prix sur demande',
-                        'price_numeric': price_numeric,
-                        'image': hotel.get('images', [{}])[0].get('thumbnail') if hotel.get('images') else None,
-                        'description': hotel.get('description', ''),
-                        'amenities': hotel.get('amenities', [])[:5],
-                        'booking_url': booking_url,
-                        'stars': self._extract_stars(hotel.get('hotel_class')),
-                        'reviews': hotel.get('reviews', 0),
-                    })
-            
             return hotels
             
         except Exception as e:
             print(f"Hotel search error: {e}")
             return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
     
-    def _extract_price(self, rate_info):
-        """Extract price from rate information"""
-        if not rate_info:
-            return None
+    def filter_hotels(self, destination_city: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, deep: bool = False, min_results: int = 0, **filters):
+        """Hotels of a stay filtered and sorted server-side (filters: see HotelIndex.select).
+
+        The first request for a stay loads its hotel set once and keeps it as
+        a HotelIndex; later filter or sort changes for the same stay are
+        answered from the index without another upstream call.
+        """
+        city_name = self._resolve_city(destination_city)
+        checkin_date, checkout_date = self._default_dates(checkin_date, checkout_date)
+
+        if not self.serpapi_key:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        self.refresher.record('hotels', city_name, checkin_date, checkout_date, adults)
+        stay = self._stay_params(city_name, checkin_date, checkout_date, adults, deep, min_results)
+        try:
+            index = self.indexes.get_or_fetch(stay, lambda: upstream_calls.do(
+                ('hotel_index',) + tuple(stay.values()),
+                lambda: self._build_index(city_name, checkin_date, checkout_date, adults, deep, min_results)
+            ))
+        except Exception as e:
+            print(f"Hotel search error: {e}")
+            index = None
+
+        if index is None:
+            return self._get_fallback_hotels(city_name, checkin_date, checkout_date)
+
+        return index.select(**filters)
+
+    @staticmethod
+    def _stay_params(city_name, checkin_date, checkout_date, adults, deep, min_results):
+        """Key of the hotel index of a stay"""
+        return {'city': city_name, 'check_in_date': checkin_date, 'check_out_date': checkout_date,
+                'adults': adults, 'deep': deep, 'min_results': min_results}
+
+    def _build_index(self, city_name, checkin_date, checkout_date, adults, deep, min_results):
+        """HotelIndex of the hotel set of a stay, None on API error"""
+        hotels = self._load_inventory(city_name, checkin_date, checkout_date, adults, deep, min_results)
+        return HotelIndex(hotels) if hotels is not None else None
+    
+    def search_hotels_grid(self, destination_city: str, checkin_from: str = None, checkin_to: str = None, nights=DEFAULT_GRID_NIGHTS, adults: int = 2, top_n: int = 10):
+        """Price every check-in date × stay length of a window concurrently.
+
+        Each cell is an ordinary stay search (same cache, store and
+        coalescing as search_hotels), so cells already searched cost no
+        upstream call. Uncached cells are limited to `grid_searches` SerpAPI
+        calls per grid, paced by the shared token bucket for at most
+        `grid_wait` seconds; the others are left empty and counted in
+        'skipped'. Returns the cheapest nightly price per cell, each hotel's
+        own price matrix and the top_n cheapest cells.
+        """
+        city_name = self._resolve_city(destination_city)
+        checkins = self._grid_checkins(checkin_from, checkin_to)
+        nights = self._grid_nights(nights)
+
+        results = {}
+        skipped = []
+        if self.serpapi_key:
+            budget = threading.Semaphore(self.grid_searches)
+            deadline = time.monotonic() + self.grid_wait
+            executor = self._get_executor()
+            futures = {
+                (checkin, length): executor.submit(self._search_cell, city_name, checkin, length, adults, budget, deadline, skipped)
+                for checkin in checkins for length in nights
+            }
+            for cell, future in futures.items():
+                try:
+                    results[cell] = future.result()
+                except Exception as e:
+                    print(f"Hotel grid error for {cell}: {e}")
+
+        return dict(self._summarize_grid(city_name, checkins, nights, results, top_n), skipped=len(skipped))
+
+    def _search_cell(self, city_name, checkin_date, nights, adults, budget, deadline, skipped):
+        """Hotels of one grid cell (None on API error or when the grid's SerpAPI budget is spent)"""
+        checkout_date = self._checkout(checkin_date, nights)
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        if not serpapi_cache.contains(params):
+            stored = self._stored_hotels(params, city_name, checkin_date, checkout_date, adults)
+            if stored is not None:
+                return stored
+            # Cellule non cachée : un appel pris sur le budget de la grille, puis sur le quota partagé
+            if not budget.acquire(blocking=False) or not self.limiter.acquire(timeout=max(0, deadline - time.monotonic())):
+                skipped.append((checkin_date, nights))
+                return None
+        key = ('hotels', city_name, checkin_date, checkout_date, adults, False, 0)
+        return upstream_calls.do(key, lambda: self._load_inventory(city_name, checkin_date, checkout_date, adults))
+
+    def _grid_checkins(self, checkin_from=None, checkin_to=None):
+        """Every check-in date of the window (inclusive, capped to MAX_GRID_CHECKINS, one week by default)"""
+        try:
+            start = datetime.strptime(checkin_from, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            start = datetime.now() + timedelta(days=30)
+        try:
+            end = datetime.strptime(checkin_to, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            end = start + timedelta(days=6)
+
+        days = max(0, min((end - start).days, MAX_GRID_CHECKINS - 1))
+        return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days + 1)]
+
+    @staticmethod
+    def _grid_nights(nights):
+        """Distinct stay lengths (1-30 nights), sorted and capped to MAX_GRID_NIGHTS"""
+        lengths = sorted({int(n) for n in nights if 0 < int(n) <= 30})[:MAX_GRID_NIGHTS]
+        return lengths or list(DEFAULT_GRID_NIGHTS)
+
+    @staticmethod
+    def _checkout(checkin_date, nights):
+        return (datetime.strptime(checkin_date, '%Y-%m-%d') + timedelta(days=nights)).strftime('%Y-%m-%d')
+
+    def _summarize_grid(self, city_name, checkins, nights, results, top_n):
+        """Price matrices (rows: check-in dates, columns: stay lengths) from per-cell hotels"""
+        cells = [[None] * len(nights) for _ in checkins]
+        # Même établissement d'une cellule à l'autre, même si son nom varie légèrement
+        identities = HotelDedupIndex(locality=(city_name,))
+        hotels = {}
+        cheapest = []
+
+        for i, checkin in enumerate(checkins):
+            for j, length in enumerate(nights):
+                best = None
+                for hotel in results.get((checkin, length)) or []:
+                    if hotel.price_numeric is None:
+                        continue
+                    key = identities.add(hotel)
+                    entry = hotels.get(key)
+                    if entry is None:
+                        entry = hotels[key] = {
+                            'name': hotel.name,
+                            'stars': hotel.stars,
+                            'rating': hotel.rating,
+                            'image': hotel.image,
+                            'booking_url': hotel.booking_url,
+                            'prices': [[None] * len(nights) for _ in checkins],
+                        }
+                    previous = entry['prices'][i][j]
+                    entry['prices'][i][j] = hotel.price_numeric if previous is None else min(previous, hotel.price_numeric)
+                    if best is None or hotel.price_numeric < best.price_numeric:
+                        best = hotel
+
+                if best is not None:
+                    cells[i][j] = best.price_numeric
+                    cheapest.append({
+                        'checkin_date': checkin,
+                        'checkout_date': self._checkout(checkin, length),
+                        'nights': length,
+                        'price_per_night': best.price_numeric,
+                        'total': best.price_numeric * length,
+                        'hotel': best.name,
+                    })
+
+        cheapest.sort(key=lambda cell: (cell['price_per_night'], cell['total']))
+        # Hôtels triés par leur meilleur prix sur toute la grille
+        ranked = sorted(hotels.values(), key=lambda h: min(p for row in h['prices'] for p in row if p is not None))
+
+        return {
+            'checkin_dates': checkins,
+            'nights': nights,
+            'cells': cells,
+            'hotels': ranked,
+            'cheapest': cheapest[:top_n],
+        }
+
+    def _resolve_city(self, destination_city):
+        """City name used by Google Hotels for a city name or IATA code"""
+        from .mappings import IATA_TO_CITY, CITY_TO_IATA
+        
+        # Convert city name to IATA if needed, then to city name for API
+        if destination_city.upper() in IATA_TO_CITY:
+            return IATA_TO_CITY[destination_city.upper()]
+        if destination_city.lower() in CITY_TO_IATA:
+            iata = CITY_TO_IATA[destination_city.lower()]
+            return IATA_TO_CITY.get(iata, destination_city)
+        return destination_city
+    
+    def _default_dates(self, checkin_date, checkout_date):
+        """Default stay: check-in today+30, 3 nights"""
+        from datetime import datetime, timedelta
+        if not checkin_date:
+            checkin_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+        if not checkout_date:
+            checkout_date = (datetime.strptime(checkin_date, '%Y-%m-%d') + timedelta(days=3)).strftime('%Y-%m-%d')
+        return checkin_date, checkout_date
+    
+    def _load_inventory(self, city_name, checkin_date, checkout_date, adults, deep=False, min_results=0):
+        """Hotels for one stay: first page (every page if deep), then variants up to min_results"""
+        if deep:
+            hotels = self._load_hotels_deep(city_name, checkin_date, checkout_date, adults)
+        else:
+            hotels = self._load_hotels(city_name, checkin_date, checkout_date, adults)
+
+        if min_results and (hotels is None or len(hotels) < min_results):
+            hotels = self._broaden(hotels, city_name, checkin_date, checkout_date, adults, min_results)
+
+        return hotels
+
+    def _load_hotels(self, city_name, checkin_date, checkout_date, adults):
+        """Hotels for one stay from the cache, the store or SerpAPI (None on API error)"""
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        
+        # Tier chaud sur disque : consulté seulement si le cache mémoire n'a rien, et pas
+        # au-delà de ce que le cache servirait (sinon la recherche ne serait jamais rafraîchie)
+        if not serpapi_cache.contains(params):
+            stored = self._stored_hotels(params, city_name, checkin_date, checkout_date, adults)
+            if stored is not None:
+                return stored
+
+        def persist(payload):
+            self._persist_hotels(payload, city_name, checkin_date, checkout_date, adults)
+
+        data = serpapi_search(params, base_url=self.base_url, timeout=15, on_fetch=persist)
         
-        if isinstance(rate_info, dict):
-            price_fields = ['lowest', 'extracted_lowest', 'before_taxes_fees', 'displayed_price', 'total', 'price']
-            for field in price_fields:
-                if rate_info.get(field):
-                    price = rate_info[field]
-                    price_str = str(price).replace('$', '').replace('€', '').replace(',', '').strip()
-                    numbers = re.findall(r'\d+\.?\d*', price_str)
-                    if numbers:
-                        try:
-                            price_num = float(numbers[0])
-                            if '$' in str(price):
-                                price_num *= 0.85  # USD to EUR
-                            return f"{int(price_num)}€"
-                        except:
-                            pass
+        if data is None:
+            return None
         
-        return None
+        return self._parse_hotels(data)
     
-    def _extract_price_numeric(self, rate_info):
-        """Extract price as numeric value"""
-        if not rate_info:
+    def _stored_hotels(self, params, city_name, checkin_date, checkout_date, adults):
+        """Hotels of the offer store for a stay, if no older than the cache would serve them (else None)"""
+        max_age = min(self.store.max_age, serpapi_cache.servable_for(params))
+        return self.store.get_hotels(city_name, checkin_date, checkout_date, adults, max_age=max_age)
+
+    def _load_hotels_deep(self, city_name, checkin_date, checkout_date, adults, max_pages: int = DEEP_MAX_PAGES):
+        """Hotels of the first result pages for one stay, deduplicated (None on API error).
+
+        The first page tells whether SerpAPI has more inventory; the next
+        pages are then requested all at once with `start` offsets, so the
+        whole set costs about two round trips instead of one per page.
+        """
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+
+        def persist(payload):
+            self._persist_hotels(payload, city_name, checkin_date, checkout_date, adults)
+
+        # Même requête que le mode normal : partage son entrée de cache
+        first = serpapi_search(params, base_url=self.base_url, timeout=15, on_fetch=persist)
+
+        if first is None:
+            return None
+
+        page_size = len(first.get('properties', []))
+        if not first.get('serpapi_pagination') or not page_size:
+            return self._parse_hotels(first)
+
+        executor = self._get_executor()
+        futures = [executor.submit(self._fetch_page, params, page * page_size) for page in range(1, max_pages)]
+
+        index = HotelDedupIndex(locality=(city_name,)).extend(self._parse_hotels(first))
+        for future in futures:
+            try:
+                page = future.result()
+            except Exception as e:
+                print(f"Hotel page error: {e}")
+                continue
+            if page is None:
+                continue
+            if not page:
+                break  # fin de l'inventaire : les pages suivantes sont vides aussi
+            index.extend(page)
+
+        return index.hotels
+
+    def _fetch_page(self, params, start):
+        """Parsed hotels of the result page starting at `start`, [] past the end, None on API error"""
+        data = serpapi_search(dict(params, start=str(start)), base_url=self.base_url, timeout=15)
+        if data is None:
+            return None
+        return self._parse_hotels(data)
+
+    def _broaden(self, hotels, city_name, checkin_date, checkout_date, adults, min_results):
+        """Complete hotels with search variants until min_results distinct hotels.
+
+        Every variant is submitted at once; the shared token bucket paces the
+        upstream calls (cached variants skip it) and results are merged as
+        they arrive. Variants not started yet are dropped as soon as the
+        target is reached. Returns None only if nothing at all was found.
+        """
+        index = HotelDedupIndex(locality=(city_name,)).extend(hotels or [])
+
+        stop = threading.Event()
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._fetch_variant, params, stop)
+            for params in self._variant_params(city_name, checkin_date, checkout_date, adults)
+        ]
+
+        try:
+            for future in as_completed(futures):
+                try:
+                    page = future.result()
+                except Exception as e:
+                    print(f"Hotel variant error: {e}")
+                    continue
+                if page:
+                    index.extend(page)
+                if len(index) >= min_results:
+                    break
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+
+        if hotels is None and not index.hotels:
             return None
+        return index.hotels
+
+    def _variant_params(self, city_name, checkin_date, checkout_date, adults):
+        """SerpAPI params of every search variant of a stay"""
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        return [
+            dict(params, **{name: value.format(city=city_name) for name, value in variant.items()})
+            for variant in SEARCH_VARIANTS
+        ]
+
+    def _fetch_variant(self, params, stop):
+        """Parsed hotels of one search variant, None if skipped or on API error"""
+        if stop.is_set():
+            return None
+        if not serpapi_cache.contains(params) and not self.limiter.acquire(timeout=self.variant_wait, cancel=stop):
+            return None
+        data = serpapi_search(params, base_url=self.base_url, timeout=10)
+        if data is None:
+            return None
+        return self._parse_hotels(data)
+
+    def refresh_stay(self, city_name, checkin_date, checkout_date, adults):
+        """Fetch the first result page of a stay again (cache and store updated); False on API error"""
+        def persist(payload):
+            self._persist_hotels(payload, city_name, checkin_date, checkout_date, adults)
+
+        params = self._build_params(city_name, checkin_date, checkout_date, adults)
+        return serpapi_refresh(params, base_url=self.base_url, timeout=15, on_fetch=persist) is not None
+
+    def _persist_hotels(self, data, city_name, checkin_date, checkout_date, adults):
+        """Write the hotels of a freshly fetched payload to the store"""
+        self.store.save_hotels(city_name, checkin_date, checkout_date, adults, self._parse_hotels(data))
+    
+    def _build_params(self, city_name, checkin_date, checkout_date, adults):
+        """SerpAPI Google Hotels params for one stay"""
+        return {
+            'engine': 'google_hotels',
+            'q': city_name,
+            'check_in_date': checkin_date,
+            'check_out_date': checkout_date,
+            'adults': adults,
+            'api_key': self.serpapi_key,
+            'hl': 'fr',
+            'gl': 'fr',
+            'num': '20'
+        }
+    
+    def _parse_hotels(self, data):
+        """Parse bookable hotels out of a Google Hotels payload"""
+        hotels = []
+        properties = data.get('properties', [])
         
-        if isinstance(rate_info, dict):
-            price_fields = ['lowest', 'extracted_lowest', 'before_taxes_fees', 'displayed_price', 'total', 'price']
-            for field in price_fields:
-                if rate_info.get(field):
-                    price = rate_info[field]
-                    price_str = str(price).replace('$', '').replace('€', '').replace(',', '').strip()
-                    numbers = re.findall(r'\d+\.?\d*', price_str)
-                    if numbers:
-                        try:
-                            price_num = float(numbers[0])
-                            if '$' in str(price):
-                                price_num *= 0.85
-                            return int(price_num)
-                        except:
-                            pass
+        properties = properties[:30]  # Check more hotels to find bookable ones
+        # Tous les tarifs de la page normalisés en une passe (affichage + valeur en EUR)
+        rates = self.rates.normalize_page(properties)
         
-        return None
+        for hotel, (price_display, price_numeric) in zip(properties, rates):
+
+            hotel_name = hotel.get('name', 'Hotel')
+
+            # Try multiple fields for VALID booking links only
+            booking_url = ''
+            booking_source = ''
+
+            # Method 1: Direct booking link from hotel data (BEST)
+            direct_link = hotel.get('booking_link', '') or hotel.get('link', '')
+            if direct_link and 'http' in direct_link and not 'google.com' in direct_link:
+                booking_url = direct_link
+                booking_source = 'direct'
+
+            # Method 2: Check for extension links (Booking.com, Hotels.com, Expedia, etc.)
+            if not booking_url and hotel.get('extensions'):
+                for ext in hotel.get('extensions', []):
+                    if isinstance(ext, dict):
+                        link = ext.get('link', '')
+                        # Only accept known booking sites
+                        if link and any(site in link.lower() for site in ['booking.com', 'hotels.com', 'expedia', 'agoda', 'trip.com', 'kayak']):
+                            booking_url = link
+                            booking_source = 'extension'
+                            break
+
+            # Method 3: Check serpapi_link
+            if not booking_url:
+                serpapi_link = hotel.get('serpapi_link', '')
+                if serpapi_link and 'http' in serpapi_link and not 'google.com' in serpapi_link:
+                    booking_url = serpapi_link
+                    booking_source = 'serpapi'
+
+            # Method 4: Try extracted_link
+            if not booking_url:
+                extracted = hotel.get('extracted_link', '')
+                if extracted and 'http' in extracted and not 'google.com' in extracted:
+                    booking_url = extracted
+                    booking_source = 'extracted'
+
+            # ONLY add hotel if we have a valid booking link (not generic search)
+            if booking_url and booking_source in ['direct', 'extension', 'serpapi', 'extracted']:
+                hotels.append(HotelOffer(
+                    name=hotel_name,
+                    rating=hotel.get('overall_rating', 0),
+                    price=price_display or 'Prix sur demande',
+                    price_numeric=price_numeric,
+                    image=self.images.url_for(hotel['images'][0].get('thumbnail')) if hotel.get('images') else None,
+                    description=hotel.get('description', ''),
+                    amenities=hotel.get('amenities', [])[:5],
+                    booking_url=booking_url,
+                    stars=self._extract_stars(hotel.get('hotel_class')),
+                    reviews=hotel.get('reviews', 0),
+                    hotel_type=self._categorize_hotel(hotel),
+                    free_cancellation=bool(hotel.get('free_cancellation', False)),
+                    latitude=(hotel.get('gps_coordinates') or {}).get('latitude'),
+                    longitude=(hotel.get('gps_coordinates') or {}).get('longitude'),
+                ))
+        
+        return hotels
     
     def _extract_stars(self, hotel_class_str):
         """Extract number of stars"""
@@ -180,19 +529,34 @@ class HotelService:
                 pass
         return 0
     
+    def _categorize_hotel(self, hotel):
+        """Hotel type (one of HOTEL_TYPES) guessed from the hotel name"""
+        name = hotel.get('name', '').lower()
+
+        if any(word in name for word in ['hostel', 'auberge', 'backpack']):
+            return 'Hostel'
+        elif any(word in name for word in ['resort', 'spa']):
+            return 'Resort'
+        elif any(word in name for word in ['apartment', 'appart', 'residence', 'résidence']):
+            return 'Apartment'
+        elif any(word in name for word in ['boutique', 'design']):
+            return 'Boutique Hotel'
+        return 'Hotel'
+    
     def _get_fallback_hotels(self, city_name, checkin_date, checkout_date):
         """Fallback hotels when API fails"""
         return [
-            {
-                'name': f'Hôtel à {city_name}',
-                'rating': 4.0,
-                'price': 'Prix sur demande',
-                'price_numeric': None,
-                'image': None,
-                'description': f'Hébergement disponible à {city_name}',
-                'amenities': ['WiFi', 'Petit-déjeuner'],
-                'booking_url': f"https://www.booking.com/searchresults.html?ss={city_name}&checkin={checkin_date}&checkout={checkout_date}",
-                'stars': 3,
-                'reviews': 0,
-            }
+            HotelOffer(
+                name=f'Hôtel à {city_name}',
+                rating=4.0,
+                price='Prix sur demande',
+                price_numeric=None,
+                image=None,
+                description=f'Hébergement disponible à {city_name}',
+                amenities=['WiFi', 'Petit-déjeuner'],
+                booking_url=f"https://www.booking.com/searchresults.html?ss={city_name}&checkin={checkin_date}&checkout={checkout_date}",
+                stars=3,
+                reviews=0,
+                fallback=True,
+            )
         ]
@@ -0,0 +1,195 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlencode
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel : seul gzip est alors proposé
+    brotli = None
+
+
+def accepted_encodings(header: str) -> set:
+    """Content codings accepted by an Accept-Encoding header (q=0 excluded)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+class HttpCache:
+    """HTTP caching headers, conditional GETs and compression for JSON search results.
+
+    The ETag is a hash of the response content: it changes exactly when the
+    SerpAPI / Places cache entries behind the response are refreshed with
+    different data, and every gunicorn worker computes the same one.
+    Last-Modified is the time this process first served the current ETag
+    for a URL. Cache-Control max-age depends on the data type (`max_ages`:
+    flight prices move faster than hotel prices, places hardly at all).
+
+    Revalidations (If-None-Match, else If-Modified-Since) get a 304 without
+    body; other responses of at least `min_size` bytes are compressed with
+    brotli (if installed) or gzip, as accepted by the client. The ETag is
+    weak so that it validates every content coding of the same content.
+    """
+
+    def __init__(self, max_ages: dict, default_max_age: int = 0, stale_while_revalidate: int = 60, min_size: int = 1024,
+                 gzip_level: int = 6, brotli_quality: int = 5, max_entries: int = 4096, compressed_entries: int = 256,
+                 enabled: bool = True):
+        self.max_ages = dict(max_ages)
+        self.default_max_age = default_max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_entries = max_entries
+        self.compressed_entries = compressed_entries
+        self.enabled = enabled
+        self._validators = OrderedDict()  # url -> (etag, last_modified)
+        self._compressed = OrderedDict()  # (hash du corps, coding) -> corps compressé
+        self._lock = threading.Lock()
+        self._stats = {'responses': 0, 'not_modified': 0, 'compressed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    @staticmethod
+    def resource_key(path: str, params) -> str:
+        """URL with its query params sorted, so parameter order does not split validators"""
+        return f"{path}?{urlencode(sorted(params))}"
+
+    @staticmethod
+    def etag_for(content: bytes) -> str:
+        return f'W/"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+    def cache_control(self, kind: str, partial: bool = False) -> str:
+        max_age = self.max_ages.get(kind, self.default_max_age)
+        if partial or max_age <= 0:
+            return 'no-cache'
+        return f"public, max-age={max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+
+    def respond(self, kind: str, url: str, body: bytes, request_headers, etag_source: bytes = None, partial: bool = False):
+        """(status, body, headers) of a 200 JSON response for url.
+
+        etag_source replaces body for the ETag when the payload carries
+        per-request fields (timings) that must not defeat revalidation.
+        Partial results (empty, or categories past their deadline) are sent
+        with no-cache: clients keep them but revalidate every time.
+        """
+        if not self.enabled:
+            return 200, body, {}
+
+        etag = self.etag_for(body if etag_source is None else etag_source)
+        # Corps compressés mis en cache par contenu exact (l'ETag peut ignorer des champs)
+        body_tag = etag if etag_source is None else self.etag_for(body)
+        last_modified = self._last_modified(url, etag)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(last_modified, usegmt=True),
+            'Cache-Control': self.cache_control(kind, partial),
+            'Vary': 'Accept-Encoding',
+        }
+
+        if self._not_modified(request_headers, etag, last_modified):
+            self._count(not_modified=1, responses=1)
+            return 304, b'', headers
+
+        size = len(body)
+        coding = self._negotiate(request_headers.get('Accept-Encoding')) if size >= self.min_size else None
+        if coding is not None:
+            body = self._compress(body_tag, coding, body)
+            headers['Content-Encoding'] = coding
+        self._count(responses=1, compressed=int(coding is not None), bytes_in=size, bytes_out=len(body))
+        return 200, body, headers
+
+    def _last_modified(self, url, etag) -> float:
+        now = time.time()
+        with self._lock:
+            validator = self._validators.get(url)
+            if validator is None or validator[0] != etag:
+                # Contenu nouveau ou modifié : dates HTTP à la seconde
+                validator = (etag, float(int(now)))
+            self._validators[url] = validator
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.max_entries:
+                self._validators.popitem(last=False)
+        return validator[1]
+
+    @staticmethod
+    def _not_modified(request_headers, etag, last_modified) -> bool:
+        if_none_match = request_headers.get('If-None-Match')
+        if if_none_match:
+            # Comparaison faible : W/"x" et "x" désignent le même contenu
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or etag.removeprefix('W/') in tags
+        if_modified_since = request_headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _negotiate(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and ('br' in accepted or '*' in accepted):
+            return 'br'
+        if 'gzip' in accepted or '*' in accepted:
+            return 'gzip'
+        return None
+
+    def _compress(self, body_tag, coding, body) -> bytes:
+        """Compressed body, kept per (content hash, coding) so repeat views of unchanged results are not recompressed"""
+        key = (body_tag, coding)
+        with self._lock:
+            compressed = self._compressed.get(key)
+            if compressed is not None:
+                self._compressed.move_to_end(key)
+                return compressed
+        if coding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        with self._lock:
+            self._compressed[key] = compressed
+            while len(self._compressed) > self.compressed_entries:
+                self._compressed.popitem(last=False)
+        return compressed
+
+    def _count(self, **increments):
+        with self._lock:
+            for stat, value in increments.items():
+                self._stats[stat] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, validators=len(self._validators), compressed_cached=len(self._compressed))
+        stats['brotli'] = brotli is not None
+        stats['compression_ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+        return stats
+
+
+# En-têtes de cache HTTP des résultats de recherche (max-age par type de données, en secondes)
+http_cache = HttpCache(
+    max_ages={
+        'flights': int(os.environ.get('HTTP_MAX_AGE_FLIGHTS', 300)),
+        'hotels': int(os.environ.get('HTTP_MAX_AGE_HOTELS', 900)),
+        'activities': int(os.environ.get('HTTP_MAX_AGE_ACTIVITIES', 3600)),
+    },
+    stale_while_revalidate=int(os.environ.get('HTTP_STALE_WHILE_REVALIDATE', 60)),
+    min_size=int(os.environ.get('HTTP_COMPRESS_MIN_BYTES', 1024)),
+    enabled=os.environ.get('HTTP_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+)
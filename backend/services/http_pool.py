@@ -0,0 +1,145 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuts considérés comme transitoires pour les GET (rejoués avec backoff)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class HttpClient:
+    """Thread-safe pooled HTTP client shared by every upstream integration.
+
+    One requests.Session keeps a keep-alive connection pool per host, so
+    repeated calls to SerpAPI, Google Places or n8n skip the TCP+TLS
+    handshake. Idempotent GETs are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32, max_retries: int = 2, backoff_base: float = 0.2, backoff_max: float = 2.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        # Aucun cookie conservé : la session est partagée entre tous les utilisateurs
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'errors': 0}
+
+    def get(self, url: str, params: dict = None, timeout: float = 10, retries: int = None, **kwargs):
+        """GET with retries on connection errors, timeouts and transient statuses"""
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                response.close()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    self._count('errors')
+                    raise
+            attempt += 1
+            self._count('retries')
+            time.sleep(jittered_backoff(attempt, self.backoff_base, self.backoff_max))
+
+    def post(self, url: str, json: dict = None, timeout: float = 10, **kwargs):
+        """POST without retries (not idempotent)"""
+        self._count('requests')
+        try:
+            return self.session.post(url, json=json, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self._count('errors')
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+class AsyncHttpClient:
+    """asyncio counterpart of HttpClient built on httpx.AsyncClient.
+
+    The underlying client is created lazily inside the running event loop
+    and keeps up to `max_keepalive` idle connections.
+    """
+
+    def __init__(self, max_connections: int = 200, max_keepalive: int = 32, max_retries: int = 2, backoff_base: float = 0.2, backoff_max: float = 2.0):
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = None
+        self._stats = {'requests': 0, 'retries': 0, 'errors': 0}
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self.limits)
+        return self._client
+
+    async def get(self, url: str, params: dict = None, timeout: float = 10, retries: int = None, **kwargs):
+        """GET with retries on connection errors, timeouts and transient statuses"""
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            self._stats['requests'] += 1
+            try:
+                response = await self._get_client().get(url, params=params, timeout=timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt >= retries:
+                    self._stats['errors'] += 1
+                    raise
+            attempt += 1
+            self._stats['retries'] += 1
+            await asyncio.sleep(jittered_backoff(attempt, self.backoff_base, self.backoff_max))
+
+    async def post(self, url: str, json: dict = None, timeout: float = 10, **kwargs):
+        """POST without retries (not idempotent)"""
+        self._stats['requests'] += 1
+        try:
+            return await self._get_client().post(url, json=json, timeout=timeout, **kwargs)
+        except httpx.HTTPError:
+            self._stats['errors'] += 1
+            raise
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+
+# Client partagé par tous les services du processus
+http_client = HttpClient(
+    pool_connections=int(os.environ.get('HTTP_POOL_CONNECTIONS', 10)),
+    pool_maxsize=int(os.environ.get('HTTP_POOL_MAXSIZE', 32)),
+    max_retries=int(os.environ.get('HTTP_MAX_RETRIES', 2)),
+)
+async_http_client = AsyncHttpClient(
+    max_connections=int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200)),
+    max_keepalive=int(os.environ.get('HTTP_POOL_MAXSIZE', 32)),
+    max_retries=int(os.environ.get('HTTP_MAX_RETRIES', 2)),
+)
@@ -0,0 +1,291 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from urllib.parse import quote, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow est optionnel : les images sont alors servies à leur taille d'origine
+    Image = None
+
+from .http_pool import http_client
+from .rate_limit import places_photo_limiter
+from .singleflight import upstream_calls
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'images')
+
+# Seuls ces hôtes (et leurs sous-domaines) sont relayés : le proxy n'est pas ouvert
+ALLOWED_HOSTS = ('googleusercontent.com', 'ggpht.com', 'gstatic.com', 'googleapis.com')
+
+# Largeurs servies : une largeur demandée est arrondie à la valeur supérieure
+WIDTHS = (200, 400, 800, 1200, 1600)
+MAX_IMAGE_BYTES = 8 * 2 ** 20
+EXTENSIONS = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp', 'image/gif': 'gif'}
+CONTENT_TYPES = {extension: content_type for content_type, extension in EXTENSIONS.items()}
+
+
+class ImageProxy:
+    """Fetch remote images once and serve them from a size-bounded on-disk LRU.
+
+    Result payloads point at /api/images (hotel thumbnails) and
+    /api/images/places/<photo_reference> (Google Places photos, fetched with
+    the server-side key so it never reaches the browser). Places photo URLs
+    are signed with an HMAC of the photo reference (`secret`, else derived
+    from the Places key, so every worker agrees): only references issued by
+    the backend itself are fetched, and cold fetches wait for
+    `places_limiter` at most `places_wait` seconds. Concurrent misses for
+    the same image share one upstream fetch; with Pillow installed, images
+    wider than the requested width are downscaled before caching.
+
+    The directory is shared by every process serving the app (gunicorn
+    workers): a miss first adopts a file another worker already wrote,
+    hits refresh the file mtime (recency seen by all workers), and the
+    index is rebuilt from disk every `sync_interval` seconds and whenever
+    it exceeds max_bytes, so eviction applies to the files of all workers.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 256 * 2 ** 20, max_age: int = 7 * 86400,
+                 allowed_hosts=ALLOWED_HOSTS, places_url: str = "https://maps.googleapis.com/maps/api/place",
+                 places_key: str = None, route: str = '/api/images', enabled: bool = True, sync_interval: float = 60,
+                 secret: str = None, places_limiter=None, places_wait: float = 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.allowed_hosts = tuple(allowed_hosts)
+        self.places_url = places_url
+        self.places_key = places_key
+        self.route = route
+        self.enabled = enabled
+        self.sync_interval = sync_interval
+        self.secret = secret
+        self.places_limiter = places_limiter
+        self.places_wait = places_wait
+        self._entries = OrderedDict()  # key -> (path, content_type, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._stats = {'hits': 0, 'misses': 0, 'fetches': 0, 'errors': 0, 'rejected': 0, 'throttled': 0, 'evictions': 0}
+
+    def url_for(self, src: str, width: int = None):
+        """Proxied URL of a remote image (src unchanged if disabled or its host is not allowed)"""
+        if not self.enabled or not src or not self.is_allowed(src):
+            return src
+        url = f"{self.route}?src={quote(src, safe='')}"
+        return f"{url}&w={width}" if width else url
+
+    def places_url_for(self, photo_reference: str, width: int = 400):
+        """Proxied URL of a Google Places photo, signed so that only this reference can be fetched"""
+        return f"{self.route}/places/{quote(photo_reference, safe='')}?w={width}&sig={self._signature(photo_reference)}"
+
+    def is_signed(self, photo_reference: str, signature: str) -> bool:
+        """True if signature was issued by places_url_for for this photo reference"""
+        return bool(signature) and hmac.compare_digest(signature, self._signature(photo_reference))
+
+    def _places_key(self):
+        return self.places_key or os.environ.get('GOOGLE_MAPS_API_KEY') or os.environ.get('GOOGLE_MAP_API')
+
+    def _signature(self, photo_reference: str) -> str:
+        # Sans secret dédié, dérivé de la clé Places : identique dans tous les workers et après redémarrage
+        secret = self.secret or f"places-photo|{self._places_key() or ''}"
+        return hmac.new(secret.encode(), photo_reference.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def is_allowed(self, src: str) -> bool:
+        parts = urlsplit(src)
+        host = (parts.hostname or '').lower()
+        return parts.scheme in ('http', 'https') and any(host == h or host.endswith('.' + h) for h in self.allowed_hosts)
+
+    def get(self, src: str, width: int = None):
+        """(path, content_type, etag) of a remote image, fetched on a miss; None if not allowed or unavailable"""
+        if not self.is_allowed(src):
+            self._count('rejected')
+            return None
+        return self._get(src, self._bucket(width), resize=True)
+
+    def get_places_photo(self, photo_reference: str, width: int = 400, signature: str = None):
+        """(path, content_type, etag) of a Google Places photo, None if unsigned, without API key or on error"""
+        if not self.is_signed(photo_reference, signature):
+            self._count('rejected')
+            return None
+        key = self._places_key()
+        if not key:
+            return None
+        width = self._bucket(width) or 400
+        # Google redimensionne lui-même (maxwidth) ; la clé n'entre pas dans la clé de cache
+        src = f"{self.places_url}/photo?maxwidth={width}&photoreference={quote(photo_reference, safe='')}"
+        return self._get(src, width, resize=False, params={'key': key}, limiter=self.places_limiter)
+
+    @staticmethod
+    def _bucket(width):
+        if not width:
+            return None
+        return next((w for w in WIDTHS if w >= width), WIDTHS[-1])
+
+    def _get(self, src, width, resize, params=None, limiter=None):
+        key = hashlib.sha256(f"{src}|{width or ''}".encode()).hexdigest()
+        image = self._lookup(key)
+        if image is not None:
+            self._count('hits')
+            return image
+        self._count('misses')
+        # Les demandes simultanées d'une même image partagent un seul téléchargement
+        return upstream_calls.do(('image', key), lambda: self._lookup(key) or self._fetch(key, src, width, resize, params, limiter))
+
+    def _lookup(self, key):
+        with self._lock:
+            self._sync_index()
+            entry = self._entries.get(key) or self._adopt(key)
+            if entry is None:
+                return None
+            path, content_type, size = entry
+            try:
+                # mtime = dernier accès, partagé par tous les workers pour l'éviction
+                os.utime(path)
+            except OSError:
+                del self._entries[key]
+                self._size -= size
+                return None
+            self._entries.move_to_end(key)
+            return path, content_type, key[:32]
+
+    def _adopt(self, key):
+        """Index entry of an image another worker already cached, None if not on disk (caller holds the lock)"""
+        directory = os.path.join(self.cache_dir, key[:2])
+        for extension, content_type in CONTENT_TYPES.items():
+            path = os.path.join(directory, f"{key}.{extension}")
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            self._entries[key] = (path, content_type, size)
+            self._size += size
+            return self._entries[key]
+        return None
+
+    def _fetch(self, key, src, width, resize, params, limiter=None):
+        if limiter is not None and not limiter.acquire(timeout=self.places_wait):
+            self._count('throttled')
+            return None
+        self._count('fetches')
+        try:
+            response = http_client.get(src, params=params, timeout=10)
+        except Exception as e:
+            print(f"Image proxy error: {e}")
+            self._count('errors')
+            return None
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if response.status_code != 200 or content_type not in EXTENSIONS or len(response.content) > MAX_IMAGE_BYTES:
+            self._count('errors')
+            return None
+
+        body = response.content
+        if resize and width:
+            body = self._downscale(body, width)
+        return self._store(key, body, content_type)
+
+    @staticmethod
+    def _downscale(body, width):
+        """Image resized to `width` pixels wide (same format), or unchanged without Pillow"""
+        if Image is None:
+            return body
+        try:
+            image = Image.open(BytesIO(body))
+            if image.width <= width:
+                return body
+            image_format = image.format
+            image.thumbnail((width, image.height))
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            output = BytesIO()
+            image.save(output, format=image_format, quality=85)
+            return output.getvalue()
+        except Exception as e:
+            print(f"Image downscale error: {e}")
+            return body
+
+    def _store(self, key, body, content_type):
+        directory = os.path.join(self.cache_dir, key[:2])
+        path = os.path.join(directory, f"{key}.{EXTENSIONS[content_type]}")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            temporary = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(body)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"Image cache write error: {e}")
+            self._count('errors')
+            return None
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[key] = (path, content_type, len(body))
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                # Les autres workers ont pu écrire depuis : taille réelle relue sur le disque
+                self._sync_index(force=True)
+            self._evict()
+        return path, content_type, key[:32]
+
+    def _evict(self):
+        """Drop least recently used files until the cache fits in max_bytes (caller holds the lock)"""
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (path, _, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._stats['evictions'] += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _sync_index(self, force: bool = False):
+        """Rebuild the LRU from the files on disk, least recently used first (caller holds the lock)"""
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        self._entries.clear()
+        self._size = 0
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                key, _, extension = name.partition('.')
+                if extension in CONTENT_TYPES:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:  # supprimé entre-temps par un autre worker
+                        continue
+                    files.append((stat.st_mtime, key, path, CONTENT_TYPES[extension], stat.st_size))
+        for _, key, path, content_type, size in sorted(files):
+            self._entries[key] = (path, content_type, size)
+            self._size += size
+        self._evict()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), size_bytes=self._size, max_bytes=self.max_bytes)
+
+
+# Cache d'images partagé (backend/data/images par défaut, hors git)
+image_proxy = ImageProxy(
+    cache_dir=os.environ.get('IMAGE_CACHE_DIR', DEFAULT_CACHE_DIR),
+    max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 256 * 2 ** 20)),
+    max_age=int(os.environ.get('IMAGE_CACHE_MAX_AGE', 7 * 86400)),
+    places_url=os.environ.get('GOOGLE_PLACES_URL', "https://maps.googleapis.com/maps/api/place"),
+    enabled=os.environ.get('IMAGE_PROXY_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+    sync_interval=float(os.environ.get('IMAGE_CACHE_SYNC_INTERVAL', 60)),
+    secret=os.environ.get('IMAGE_PROXY_SECRET'),
+    places_limiter=places_photo_limiter,
+    places_wait=float(os.environ.get('PLACES_PHOTO_MAX_WAIT', 2)),
+)
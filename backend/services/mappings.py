@@ -54,3 +54,30 @@ IATA_TO_CITY = {
     'NCE': 'Nice', 'MRS': 'Marseille', 'LYS': 'Lyon', 'BOD': 'Bordeaux',
     'TLS': 'Toulouse', 'NTE': 'Nantes',
 }
+
+# Mapping inverse IATA -> nom de ville (clé française utilisée par les services)
+IATA_TO_CITY_KEY = {}
+for _city, _iata in CITY_TO_IATA.items():
+    IATA_TO_CITY_KEY.setdefault(_iata, _city)
+
+
+def resolve_destination(destination: str) -> dict:
+    """Resolve a city name or IATA code once for all services.
+
+    Returns the IATA code (flights), the Google Hotels city name (hotels)
+    and the lowercase French city key (activities).
+    """
+    name = destination.strip()
+    if name.upper() in IATA_TO_CITY_KEY or name.upper() in IATA_TO_CITY:
+        iata = name.upper()
+        city_key = IATA_TO_CITY_KEY.get(iata, IATA_TO_CITY.get(iata, name).lower())
+    else:
+        city_key = name.lower()
+        iata = CITY_TO_IATA.get(city_key, name.upper())
+
+    return {
+        'query': destination,
+        'iata': iata,
+        'city': IATA_TO_CITY.get(iata, name),
+        'city_key': city_key,
+    }
@@ -0,0 +1,107 @@
+import json
+from dataclasses import dataclass
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur json
+    orjson = None
+
+
+@dataclass(slots=True)
+class FlightOffer:
+    airline: str
+    departure: str
+    arrival: str
+    departureTime: str
+    arrivalTime: str
+    departureDate: str
+    returnDate: str
+    price: float
+    duration: str
+    stops: int
+    booking_link: str
+    # Offre de secours (pas de clé, erreur SerpAPI) : jamais mise en cache HTTP
+    fallback: bool = False
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+@dataclass(slots=True)
+class HotelOffer:
+    name: str
+    rating: float
+    price: str
+    price_numeric: int
+    image: str
+    description: str
+    amenities: list
+    booking_url: str
+    stars: int
+    reviews: int
+    hotel_type: str = 'Hotel'
+    free_cancellation: bool = False
+    latitude: float = None
+    longitude: float = None
+    # Hôtel de secours (pas de clé, erreur SerpAPI) : jamais mis en cache HTTP
+    fallback: bool = False
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+@dataclass(slots=True)
+class Activity:
+    name: str
+    category: str
+    price: int
+    duration: str
+    image: str
+    description: str
+    rating: float
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+MODELS = (FlightOffer, HotelOffer, Activity)
+
+
+def is_fallback(offers) -> bool:
+    """True if a result list holds placeholder offers instead of live ones"""
+    return any(getattr(offer, 'fallback', False) for offer in offers)
+
+
+def _default(obj):
+    """json fallback encoder for the slotted models"""
+    if isinstance(obj, MODELS):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """Serialize result payloads (dicts, lists, models) to UTF-8 JSON bytes.
+
+    Uses orjson, which encodes slotted dataclasses natively, when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
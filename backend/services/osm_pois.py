@@ -0,0 +1,249 @@
+"""
+Offline OpenStreetMap POI import.
+
+Streams a local OSM extract (.osm / .osm.bz2 / .osm.gz XML, or .osm.pbf
+with pyosmium installed), keeps the named tourism / amenity / leisure /
+historic nodes the old Overpass query asked for, and writes one compact
+gzip JSON file per city under OSM_POI_DIR. ActivityService serves those
+files for cities it cannot search on Google Places.
+
+Memory stays bounded: the XML is parsed element by element and cleared as
+it goes, and each city keeps at most --max-per-category POIs per category
+(the most notable ones) in a fixed-size heap.
+
+Usage (from backend/):
+    python import_osm.py ile-de-france-latest.osm.pbf
+    python import_osm.py region.osm.bz2 --city Paris --city "Annecy=45.899,6.129" --radius 10000
+"""
+import argparse
+import bz2
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from itertools import count
+from xml.etree import ElementTree
+
+DEFAULT_OSM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'osm')
+
+# Tags retenus (mêmes valeurs que l'ancienne requête Overpass) -> type Google Places de PLACE_CATEGORIES
+OSM_TAGS = {
+    'tourism': {
+        'museum': 'museum', 'gallery': 'museum',
+        'attraction': 'tourist_attraction', 'zoo': 'tourist_attraction',
+        'theme_park': 'tourist_attraction', 'viewpoint': 'tourist_attraction',
+    },
+    'historic': {
+        'monument': 'tourist_attraction', 'castle': 'tourist_attraction',
+        'church': 'tourist_attraction', 'cathedral': 'tourist_attraction',
+    },
+    'leisure': {'park': 'park', 'garden': 'park', 'nature_reserve': 'park', 'beach': 'park'},
+    'amenity': {'restaurant': 'restaurant', 'cafe': 'restaurant', 'pub': 'restaurant', 'bar': 'restaurant', 'fast_food': 'restaurant'},
+}
+
+SUBTYPE_LABELS = {
+    'museum': 'Musée', 'gallery': 'Galerie', 'attraction': 'Attraction', 'zoo': 'Zoo',
+    'theme_park': "Parc d'attractions", 'viewpoint': 'Point de vue', 'monument': 'Monument',
+    'castle': 'Château', 'church': 'Église', 'cathedral': 'Cathédrale', 'park': 'Parc',
+    'garden': 'Jardin', 'nature_reserve': 'Réserve naturelle', 'beach': 'Plage',
+    'restaurant': 'Restaurant', 'cafe': 'Café', 'pub': 'Pub', 'bar': 'Bar', 'fast_food': 'Restauration rapide',
+}
+
+# Indices de notoriété d'un lieu OSM (pas de note comme sur Google Places)
+NOTABILITY_TAGS = {'wikidata': 3, 'wikipedia': 2, 'website': 1, 'opening_hours': 0.5, 'image': 0.5}
+
+EARTH_RADIUS_M = 6371000
+
+
+def city_slug(name: str) -> str:
+    """File name of a city: accents, case and punctuation removed ('Athènes' -> 'athenes')"""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().lower()
+    return re.sub(r'[^a-z0-9]+', '-', text).strip('-')
+
+
+def classify(tags: dict):
+    """(place_type, subtype) of a named OSM element, None if it is not a kept POI"""
+    if not tags.get('name'):
+        return None
+    for key, values in OSM_TAGS.items():
+        value = tags.get(key)
+        if value in values:
+            return values[value], value
+    return None
+
+
+def notability(tags: dict) -> float:
+    return sum(weight for tag, weight in NOTABILITY_TAGS.items() if tag in tags)
+
+
+def iter_xml_nodes(path: str):
+    """(lat, lon, tags) of every tagged node of an OSM XML extract, in constant memory"""
+    opener = bz2.open if path.endswith('.bz2') else gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        context = ElementTree.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event != 'end' or elem.tag not in ('node', 'way', 'relation'):
+                continue
+            if elem.tag == 'node':
+                tags = {tag.get('k'): tag.get('v') for tag in elem.iter('tag')}
+                if tags:
+                    yield float(elem.get('lat')), float(elem.get('lon')), tags
+            # Les éléments déjà lus sont libérés : la mémoire ne dépend pas de la taille du fichier
+            root.clear()
+
+
+def iter_pbf_nodes(path: str):
+    """(lat, lon, tags) of the candidate nodes of an OSM PBF extract, streamed (requires pyosmium >= 3.7)"""
+    try:
+        import osmium
+    except ImportError:
+        raise SystemExit("Reading .pbf extracts requires pyosmium (pip install osmium); XML extracts need nothing")
+
+    for node in osmium.FileProcessor(path, osmium.osm.NODE):
+        tags = node.tags
+        if 'name' in tags and any(key in tags for key in OSM_TAGS) and node.location.valid():
+            yield node.location.lat, node.location.lon, {tag.k: tag.v for tag in tags}
+
+
+def iter_nodes(path: str):
+    return iter_pbf_nodes(path) if path.endswith('.pbf') else iter_xml_nodes(path)
+
+
+class OSMImporter:
+    """Assign kept POIs to the nearest city center within `radius` meters.
+
+    Each (city, place_type) keeps the `max_per_category` most notable POIs
+    in a min-heap, so memory is bounded by the number of cities whatever
+    the extract size.
+    """
+
+    def __init__(self, cities: dict, radius: float = 15000, max_per_category: int = 200):
+        self.cities = dict(cities)  # nom -> (lat, lon)
+        self.radius = radius
+        self.max_per_category = max_per_category
+        self.heaps = {}
+        self.read = 0
+        self.kept = 0
+        self._order = count()
+        dlat = math.degrees(radius / EARTH_RADIUS_M)
+        # Boîte englobante de chaque ville : test rapide avant le calcul de distance
+        self._boxes = [
+            (name, lat, lon, dlat, dlat / max(math.cos(math.radians(lat)), 0.01))
+            for name, (lat, lon) in self.cities.items()
+        ]
+
+    def nearest_city(self, lat, lon):
+        best, best_distance = None, self.radius
+        for name, city_lat, city_lon, dlat, dlon in self._boxes:
+            if abs(lat - city_lat) > dlat or abs(lon - city_lon) > dlon:
+                continue
+            x = math.radians(lon - city_lon) * math.cos(math.radians((lat + city_lat) / 2))
+            distance = EARTH_RADIUS_M * math.hypot(x, math.radians(lat - city_lat))
+            if distance <= best_distance:
+                best, best_distance = name, distance
+        return best
+
+    def add(self, lat, lon, tags):
+        self.read += 1
+        kind = classify(tags)
+        if kind is None:
+            return
+        city = self.nearest_city(lat, lon)
+        if city is None:
+            return
+        place_type, subtype = kind
+        heap = self.heaps.setdefault((city, place_type), [])
+        entry = (notability(tags), next(self._order), (tags['name'], place_type, subtype, round(lat, 6), round(lon, 6)))
+        if len(heap) < self.max_per_category:
+            heapq.heappush(heap, entry)
+            self.kept += 1
+        elif entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def run(self, path: str):
+        for lat, lon, tags in iter_nodes(path):
+            self.add(lat, lon, tags)
+        return self
+
+    def city_pois(self, city: str):
+        """[name, place_type, subtype, lat, lon, score] of a city, most notable first"""
+        rows = []
+        for (name, _), heap in self.heaps.items():
+            if name == city:
+                rows.extend(entry[2] + (entry[0],) for entry in heap)
+        rows.sort(key=lambda row: row[5], reverse=True)
+        return [list(row) for row in rows]
+
+    def write(self, output_dir: str, source: str):
+        """Write one <city>.json.gz per city with POIs; returns {city: POI count}"""
+        os.makedirs(output_dir, exist_ok=True)
+        written = {}
+        for city, (lat, lon) in self.cities.items():
+            pois = self.city_pois(city)
+            if not pois:
+                continue
+            payload = {
+                'city': city, 'center': [lat, lon], 'radius': self.radius, 'source': source,
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'fields': ['name', 'place_type', 'subtype', 'lat', 'lon', 'score'], 'pois': pois,
+            }
+            path = os.path.join(output_dir, f"{city_slug(city)}.json.gz")
+            temporary = f"{path}.tmp"
+            with gzip.open(temporary, 'wt', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporary, path)
+            written[city] = len(pois)
+        return written
+
+
+def load_city_pois(city: str, directory: str = DEFAULT_OSM_DIR):
+    """POIs of a city file as dicts (most notable first), None if the city was not imported"""
+    path = os.path.join(directory, f"{city_slug(city)}.json.gz")
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    fields = payload['fields']
+    return [dict(zip(fields, row)) for row in payload['pois']]
+
+
+def parse_city(value: str, known: dict):
+    """'Name=lat,lon' or a known city name -> (name, (lat, lon))"""
+    name, _, coordinates = value.partition('=')
+    if coordinates:
+        lat, lon = (float(part) for part in coordinates.split(','))
+        return name.strip(), (lat, lon)
+    key = name.strip().lower()
+    if key not in known:
+        raise SystemExit(f"Unknown city '{name}': give its center as '{name}=lat,lon'")
+    return key, known[key]
+
+
+def main():
+    from .activity_service import ActivityService
+
+    parser = argparse.ArgumentParser(prog='import_osm.py', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('extract', help='.osm, .osm.bz2, .osm.gz or .osm.pbf file')
+    parser.add_argument('--city', action='append', default=[], help="known city name or 'Name=lat,lon' (default: every known city)")
+    parser.add_argument('--radius', type=float, default=15000, help='meters around each city center')
+    parser.add_argument('--max-per-category', type=int, default=200)
+    parser.add_argument('--output', default=os.environ.get('OSM_POI_DIR', DEFAULT_OSM_DIR))
+    args = parser.parse_args()
+
+    known = ActivityService().city_coordinates
+    cities = dict(parse_city(value, known) for value in args.city) if args.city else known
+
+    started = time.perf_counter()
+    importer = OSMImporter(cities, radius=args.radius, max_per_category=args.max_per_category).run(args.extract)
+    written = importer.write(args.output, os.path.basename(args.extract))
+
+    print(f"{importer.read} tagged nodes read, {importer.kept} POIs kept in {time.perf_counter() - started:.1f}s")
+    for city, total in sorted(written.items()):
+        print(f"  {city:<20}{total:>6} POIs")
+    print(f"{len(written)} city files written to {args.output}")
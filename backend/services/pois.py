@@ -0,0 +1,231 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from .models import dumps, loads
+
+DEFAULT_POI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'pois.db')
+
+# Côté d'une cellule de la grille en degrés (~5.5 km en latitude)
+CELL_DEG = 0.05
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEG = math.pi * EARTH_RADIUS_M / 180
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pois (
+    place_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    cell INTEGER NOT NULL,
+    rating REAL,
+    place TEXT NOT NULL,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (place_id, category)
+);
+CREATE INDEX IF NOT EXISTS idx_poi_category_cell ON pois (category, cell);
+CREATE INDEX IF NOT EXISTS idx_poi_cell ON pois (cell);
+
+CREATE TABLE IF NOT EXISTS poi_coverage (
+    cell INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    radius REAL NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (cell, category)
+);
+"""
+
+
+def haversine_m(lat1, lng1, lat2, lng2) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_of(lat, lng) -> int:
+    """Grid cell id of a point (row-major, CELL_DEG sided cells)"""
+    return _cell_id(math.floor((lat + 90) / CELL_DEG), math.floor((lng + 180) / CELL_DEG))
+
+
+def _cell_id(row, column) -> int:
+    return row * 10000 + column % int(360 / CELL_DEG)
+
+
+def cells_in_radius(lat, lng, radius) -> list:
+    """Grid cells overlapped by the circle of radius meters around (lat, lng)"""
+    dlat = radius / METERS_PER_DEG
+    dlng = radius / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+    cells = []
+    for row in range(math.floor((lat - dlat + 90) / CELL_DEG), math.floor((lat + dlat + 90) / CELL_DEG) + 1):
+        south = row * CELL_DEG - 90
+        for column in range(math.floor((lng - dlng + 180) / CELL_DEG), math.floor((lng + dlng + 180) / CELL_DEG) + 1):
+            west = column * CELL_DEG - 180
+            # Point de la cellule le plus proche du centre : la cellule touche le cercle s'il est dedans
+            nearest_lat = min(max(lat, south), south + CELL_DEG)
+            nearest_lng = min(max(lng, west), west + CELL_DEG)
+            if haversine_m(lat, lng, nearest_lat, nearest_lng) <= radius:
+                cells.append(_cell_id(row, column))
+    return cells
+
+
+def compact_place(place: dict) -> dict:
+    """Fields of a Places result kept in the store (same shape as the API, without the bulk)"""
+    location = place.get('geometry', {}).get('location', {})
+    compact = {
+        'place_id': place.get('place_id'),
+        'name': place.get('name'),
+        'rating': place.get('rating'),
+        'user_ratings_total': place.get('user_ratings_total', 0),
+        'types': place.get('types', []),
+        'vicinity': place.get('vicinity'),
+        'geometry': {'location': {'lat': location.get('lat'), 'lng': location.get('lng')}},
+    }
+    photos = place.get('photos') or []
+    if photos and photos[0].get('photo_reference'):
+        compact['photos'] = [{'photo_reference': photos[0]['photo_reference']}]
+    if place.get('price_level') is not None:
+        compact['price_level'] = place['price_level']
+    return compact
+
+
+class POIStore:
+    """SQLite store of points of interest with a grid spatial index.
+
+    Each POI is filed under a CELL_DEG × CELL_DEG grid cell, so radius and
+    bounding-box queries read only the cells they overlap before the exact
+    distance check. `poi_coverage` records, per category, every cell
+    overlapped by a radius search fetched upstream and when: a radius query
+    is served locally only if all the cells it overlaps are fresh, so
+    callers go upstream only for areas with a missing or stale cell. A
+    covered cell holds what Places returned for the searches around it
+    (20-60 results per search, by prominence), not every POI of the cell.
+    """
+
+    def __init__(self, path: str = DEFAULT_POI_PATH, max_age: int = 7 * 86400):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    # Écriture
+
+    def save_places(self, places: list, category: str, source: str = 'places'):
+        """Upsert Places-shaped results under a category (results without coordinates are skipped)"""
+        now = time.time()
+        rows = []
+        for place in places:
+            place = compact_place(place)
+            location = place['geometry']['location']
+            if not place['place_id'] or location['lat'] is None or location['lng'] is None:
+                continue
+            lat, lng = location['lat'], location['lng']
+            rows.append((place['place_id'], category, lat, lng, cell_of(lat, lng), place.get('rating'),
+                         dumps(place).decode('utf-8'), source, now))
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO pois VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def mark_covered(self, lat: float, lng: float, category: str, radius: float):
+        """Record that every cell of the area of radius meters around (lat, lng) was fetched for category"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO poi_coverage VALUES (?, ?, ?, ?)',
+                             [(cell, category, radius, now) for cell in cells_in_radius(lat, lng, radius)])
+
+    # Lecture
+
+    def is_covered(self, lat: float, lng: float, category: str, radius: float, max_age: int = None) -> bool:
+        """True if every cell of the area of radius meters around (lat, lng) was fetched for category recently enough"""
+        cells = cells_in_radius(lat, lng, radius)
+        conn = self._connect()
+        cutoff = self._cutoff(max_age)
+        fresh = 0
+        # Par paquets : SQLite limite le nombre de paramètres d'une requête
+        for start in range(0, len(cells), 500):
+            chunk = cells[start:start + 500]
+            fresh += conn.execute(
+                f"SELECT COUNT(*) FROM poi_coverage WHERE category = ? AND fetched_at >= ? AND cell IN ({','.join('?' * len(chunk))})",
+                [category, cutoff, *chunk]
+            ).fetchone()[0]
+        return fresh == len(cells)
+
+    def query_radius(self, lat: float, lng: float, radius: float, category: str = None, limit: int = None):
+        """POIs within radius meters of (lat, lng), nearest first, each with its 'distance_m'"""
+        dlat = radius / METERS_PER_DEG
+        dlng = radius / (METERS_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+        places = []
+        for place, place_lat, place_lng in self._scan(lat - dlat, lng - dlng, lat + dlat, lng + dlng, category):
+            distance = haversine_m(lat, lng, place_lat, place_lng)
+            if distance <= radius:
+                place['distance_m'] = round(distance)
+                places.append(place)
+        places.sort(key=lambda place: place['distance_m'])
+        return places[:limit] if limit else places
+
+    def query_bbox(self, south: float, west: float, north: float, east: float, category: str = None, limit: int = None):
+        """POIs inside a bounding box, best rated first"""
+        places = [
+            place for place, place_lat, place_lng in self._scan(south, west, north, east, category)
+            if south <= place_lat <= north and west <= place_lng <= east
+        ]
+        places.sort(key=lambda place: place.get('rating') or 0, reverse=True)
+        return places[:limit] if limit else places
+
+    def _scan(self, south, west, north, east, category):
+        """(place, lat, lng) of every POI in the grid cells overlapping the box"""
+        rows = range(math.floor((south + 90) / CELL_DEG), math.floor((north + 90) / CELL_DEG) + 1)
+        columns = range(math.floor((west + 180) / CELL_DEG), math.floor((east + 180) / CELL_DEG) + 1)
+        cells = [_cell_id(row, column) for row in rows for column in columns]
+        conn = self._connect()
+        seen = set()
+        # Par paquets : SQLite limite le nombre de paramètres d'une requête
+        for start in range(0, len(cells), 500):
+            chunk = cells[start:start + 500]
+            sql = f"SELECT place_id, place, lat, lng FROM pois WHERE cell IN ({','.join('?' * len(chunk))})"
+            params = list(chunk)
+            if category:
+                sql += ' AND category = ?'
+                params.append(category)
+            for place_id, place, lat, lng in conn.execute(sql, params):
+                # Un lieu rangé sous plusieurs catégories n'est rendu qu'une fois
+                if place_id not in seen:
+                    seen.add(place_id)
+                    yield loads(place), lat, lng
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        pois, cells = conn.execute('SELECT COUNT(*), COUNT(DISTINCT cell) FROM pois').fetchone()
+        covered = conn.execute('SELECT COUNT(*) FROM poi_coverage WHERE fetched_at >= ?', (self._cutoff(),)).fetchone()[0]
+        return {'pois': pois, 'cells': cells, 'fresh_areas': covered, 'max_age': self.max_age}
+
+    def _cutoff(self, max_age: int = None) -> float:
+        return time.time() - (self.max_age if max_age is None else max_age)
+
+
+# POI partagés (backend/data/pois.db par défaut, hors git)
+poi_store = POIStore(
+    path=os.environ.get('POI_STORE_PATH', DEFAULT_POI_PATH),
+    max_age=int(os.environ.get('POI_MAX_AGE', 7 * 86400)),
+)
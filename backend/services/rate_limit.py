@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Callers wait for the next token instead of sleeping a fixed delay, so
+    parallel upstream calls start as fast as the quota allows. rate <= 0
+    disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {'granted': 0, 'delayed': 0, 'rejected': 0}
+
+    def _reserve(self) -> float:
+        """Take a token if one is available, else return the seconds until the next one"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def acquire(self, timeout: float = None, cancel: threading.Event = None) -> bool:
+        """Wait for a token; False if none comes within timeout or cancel is set first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delayed = False
+        while True:
+            wait = self._reserve()
+            if not wait:
+                self._count('delayed' if delayed else 'granted')
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                self._count('rejected')
+                return False
+            delayed = True
+            if cancel is not None:
+                if cancel.wait(wait):
+                    self._count('rejected')
+                    return False
+            else:
+                time.sleep(wait)
+
+    async def acquire_async(self, timeout: float = None) -> bool:
+        """asyncio variant of acquire (cancel the awaiting task to give up)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delayed = False
+        while True:
+            wait = self._reserve()
+            if not wait:
+                self._count('delayed' if delayed else 'granted')
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                self._count('rejected')
+                return False
+            delayed = True
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, rate=self.rate, capacity=self.capacity)
+
+
+# Quota partagé des appels SerpAPI optionnels (variantes de recherche hôtels)
+serpapi_limiter = TokenBucket(
+    rate=float(os.environ.get('SERPAPI_RATE_LIMIT', 5)),
+    capacity=int(os.environ.get('SERPAPI_RATE_BURST', 5)),
+)
+
+# Photos Google Places absentes du cache d'images (quota Places de la clé serveur)
+places_photo_limiter = TokenBucket(
+    rate=float(os.environ.get('PLACES_PHOTO_RATE_LIMIT', 5)),
+    capacity=int(os.environ.get('PLACES_PHOTO_RATE_BURST', 20)),
+)
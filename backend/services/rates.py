@@ -0,0 +1,102 @@
+import json
+import os
+import re
+
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'currency_rates.json')
+
+# Champs d'un bloc tarif SerpAPI, lus dans l'ordre : le premier exploitable gagne
+PRICE_FIELDS = ('lowest', 'extracted_lowest', 'before_taxes_fees', 'displayed_price', 'total', 'price')
+
+# Montant brut avec ses séparateurs ('1 234,50', '1,234.50', '120')
+_AMOUNT = re.compile(r'\d[\d.,\s]*')
+
+# Table minimale si le fichier de taux est absent (ancien taux codé en dur)
+DEFAULT_RATES = {'base': 'EUR', 'symbols': {'€': 'EUR', '$': 'USD'}, 'rates': {'EUR': 1.0, 'USD': 0.85}}
+
+
+class RateNormalizer:
+    """Turn SerpAPI rate blocks into a display price and a numeric price in one pass.
+
+    `rates` maps a currency code to the value of one unit in the base
+    currency; amounts without a recognizable currency are taken as already
+    in the base currency. Prices whose currency has no rate are skipped.
+    """
+
+    def __init__(self, rates: dict, base: str = 'EUR', symbols: dict = None, display_symbol: str = '€'):
+        self.rates = dict(rates)
+        self.base = base
+        self.symbols = dict(symbols or {})
+        self.display_symbol = display_symbol
+        # Symboles et codes ISO connus, du plus long au plus court
+        tokens = sorted(set(self.symbols) | set(self.rates), key=len, reverse=True)
+        self._currency = re.compile('|'.join(re.escape(token) for token in tokens))
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RATES_PATH):
+        """Normalizer for a JSON table {'base', 'symbols', 'rates'}; falls back to DEFAULT_RATES"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                table = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Currency rates error: {e}. Using default rates.")
+            table = DEFAULT_RATES
+        return cls(table['rates'], base=table.get('base', 'EUR'), symbols=table.get('symbols'))
+
+    def parse_amount(self, value):
+        """(amount, currency code or None) of a raw price, None if it holds no number"""
+        if isinstance(value, (int, float)):
+            return float(value), None
+        text = str(value)
+        match = _AMOUNT.search(text)
+        if match is None:
+            return None
+        amount = self._to_float(match.group())
+        currency = self._currency.search(text)
+        if currency is None:
+            return amount, None
+        token = currency.group()
+        return amount, self.symbols.get(token, token)
+
+    @staticmethod
+    def _to_float(digits: str) -> float:
+        """Float of a raw amount: the last '.' or ',' followed by 1-2 digits is the decimal mark"""
+        digits = ''.join(digits.split()).rstrip('.,')
+        if digits.isdigit():
+            return float(digits)
+        mark = max(digits.rfind('.'), digits.rfind(','))
+        if 0 < len(digits) - mark - 1 <= 2:
+            return float(digits[:mark].replace('.', '').replace(',', '') + '.' + digits[mark + 1:])
+        return float(digits.replace('.', '').replace(',', ''))
+
+    def normalize(self, rate_info):
+        """(display, numeric) of a rate block in the base currency, (None, None) if no usable price"""
+        if not rate_info or not isinstance(rate_info, dict):
+            return None, None
+        for field in PRICE_FIELDS:
+            value = rate_info.get(field)
+            if not value:
+                continue
+            parsed = self.parse_amount(value)
+            if parsed is None:
+                continue
+            amount, currency = parsed
+            rate = self.rates.get(currency or self.base)
+            if rate is None:
+                continue
+            numeric = int(amount * rate)
+            return f"{numeric}{self.display_symbol}", numeric
+        return None, None
+
+    @staticmethod
+    def rate_block(hotel: dict):
+        """Rate block of a Google Hotels property"""
+        return hotel.get('rate_per_night', {}) or hotel.get('prices', {}) or hotel.get('price', {})
+
+    def normalize_page(self, properties: list):
+        """(display, numeric) for every property of a results page, in order"""
+        normalize, rate_block = self.normalize, self.rate_block
+        return [normalize(rate_block(hotel)) for hotel in properties]
+
+
+# Table chargée une fois par process (CURRENCY_RATES_PATH pour une table locale à jour)
+rate_normalizer = RateNormalizer.from_file(os.environ.get('CURRENCY_RATES_PATH', DEFAULT_RATES_PATH))
@@ -0,0 +1,152 @@
+import math
+import os
+import threading
+import time
+
+from .cache import serpapi_cache
+from .rate_limit import TokenBucket
+
+
+class HotKeyRefresher:
+    """Keep the most requested searches warm in the SerpAPI cache.
+
+    Services record every user search (kind + search arguments) in a
+    request counter that decays with `half_life`, so yesterday's peak does
+    not outrank today's traffic. A background thread wakes up every
+    `interval` seconds, takes the `top_k` hottest searches and refreshes
+    those whose cache entry goes stale within `lead` seconds (or is gone).
+    Refreshes are paid from an hourly SerpAPI `budget`; when it is spent
+    the round stops and the remaining keys wait for the next one.
+    """
+
+    def __init__(self, cache=serpapi_cache, top_k: int = 20, interval: float = 30, lead: float = 120,
+                 budget: int = 60, half_life: float = 1800, min_hits: float = 2, max_tracked: int = 2000):
+        self.cache = cache
+        self.top_k = top_k
+        self.interval = interval
+        self.lead = lead
+        self.half_life = half_life
+        self.min_hits = min_hits
+        self.max_tracked = max_tracked
+        # budget appels SerpAPI par heure, rafale limitée à un tour complet
+        self.budget = TokenBucket(rate=budget / 3600, capacity=max(1, min(top_k, budget))) if budget > 0 else None
+        self._handlers = {}  # kind -> (params_for, refresh)
+        self._scores = {}  # (kind, args) -> (score, updated_at)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'recorded': 0, 'rounds': 0, 'refreshes': 0, 'refresh_errors': 0, 'skipped_fresh': 0, 'over_budget': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget is not None and self.top_k > 0
+
+    def register(self, kind: str, params_for, refresh):
+        """Declare how to refresh a kind of search.
+
+        params_for(*args) gives the SerpAPI params whose cache entry is
+        watched; refresh(*args) fetches them again and returns True on success.
+        """
+        with self._lock:
+            self._handlers[kind] = (params_for, refresh)
+
+    def record(self, kind: str, *args):
+        """Count one user request for a search"""
+        if not self.enabled:
+            return
+        key = (kind, args)
+        now = time.time()
+        with self._lock:
+            score, updated = self._scores.get(key, (0.0, now))
+            self._scores[key] = (self._decay(score, now - updated) + 1, now)
+            self._stats['recorded'] += 1
+            if len(self._scores) > self.max_tracked:
+                self._prune(now)
+
+    def _decay(self, score, elapsed):
+        return score * math.pow(0.5, elapsed / self.half_life) if self.half_life > 0 else score
+
+    def _prune(self, now):
+        """Forget the coldest quarter of the tracked searches (caller holds the lock)"""
+        ranked = sorted(self._scores, key=lambda key: self._decay(self._scores[key][0], now - self._scores[key][1]))
+        for key in ranked[:len(ranked) // 4]:
+            del self._scores[key]
+
+    def hot(self, limit: int = None):
+        """[(kind, args, score)] of the most requested searches, hottest first"""
+        now = time.time()
+        with self._lock:
+            scored = [(kind, args, self._decay(score, now - updated)) for (kind, args), (score, updated) in self._scores.items()]
+        scored = [entry for entry in scored if entry[2] >= self.min_hits]
+        scored.sort(key=lambda entry: entry[2], reverse=True)
+        return scored[:limit or self.top_k]
+
+    def run_once(self) -> int:
+        """One refresh round over the top_k searches; returns the number of refreshes"""
+        refreshed = 0
+        for kind, args, _ in self.hot():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                continue
+            params_for, refresh = handler
+            try:
+                expires_in = self.cache.expires_in(params_for(*args))
+                if expires_in is not None and expires_in > self.lead:
+                    self._count('skipped_fresh')
+                    continue
+                if not self.budget.acquire(timeout=0):
+                    self._count('over_budget')
+                    break
+                if refresh(*args):
+                    refreshed += 1
+                    self._count('refreshes')
+                else:
+                    self._count('refresh_errors')
+            except Exception as e:
+                print(f"Hot key refresh error for {kind} {args}: {e}")
+                self._count('refresh_errors')
+        self._count('rounds')
+        return refreshed
+
+    def start(self):
+        """Start the background refresh thread (no-op if disabled or already running)"""
+        with self._lock:
+            if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='hot-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self) -> dict:
+        hot = [{'kind': kind, 'search': list(args), 'score': round(score, 2)} for kind, args, score in self.hot()]
+        with self._lock:
+            stats = dict(self._stats, tracked=len(self._scores), running=self._thread is not None and self._thread.is_alive())
+        stats['budget'] = self.budget.stats() if self.budget is not None else None
+        stats['hot'] = hot
+        return stats
+
+
+# Rafraîchissement des recherches populaires (SERPAPI_REFRESH_BUDGET=0 pour le désactiver)
+hot_refresher = HotKeyRefresher(
+    top_k=int(os.environ.get('HOT_REFRESH_TOP_K', 20)),
+    interval=float(os.environ.get('HOT_REFRESH_INTERVAL', 30)),
+    lead=float(os.environ.get('HOT_REFRESH_LEAD', 120)),
+    budget=int(os.environ.get('SERPAPI_REFRESH_BUDGET', 60)),
+    half_life=float(os.environ.get('HOT_REFRESH_HALF_LIFE', 1800)),
+    min_hits=float(os.environ.get('HOT_REFRESH_MIN_HITS', 2)),
+)
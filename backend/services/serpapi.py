@@ -0,0 +1,54 @@
+import os
+
+from .cache import serpapi_cache
+from .http_pool import http_client, async_http_client
+
+# Surchargeable pour rejouer des réponses enregistrées (benchmarks/stub_upstream.py)
+SERPAPI_URL = os.environ.get('SERPAPI_URL', "https://serpapi.com/search.json")
+
+
+def serpapi_search(params: dict, base_url: str = SERPAPI_URL, timeout: int = 15, on_fetch=None):
+    """Run a SerpAPI search through the shared response cache.
+
+    Returns the decoded JSON payload, or None when SerpAPI answers with a
+    non-200 status or an 'error' field (those responses are never cached).
+    on_fetch(data) is called whenever a payload is actually fetched upstream.
+    """
+    return serpapi_cache.get_or_fetch(params, lambda: _fetch(params, base_url, timeout), on_fetch=on_fetch)
+
+
+def serpapi_refresh(params: dict, base_url: str = SERPAPI_URL, timeout: int = 15, on_fetch=None):
+    """Fetch a SerpAPI search upstream even if cached and replace its cache entry.
+
+    Returns the payload, or None on error (the cached entry is then kept).
+    """
+    data = _fetch(params, base_url, timeout)
+    if data is not None:
+        serpapi_cache.set(params, data)
+        if on_fetch is not None:
+            on_fetch(data)
+    return data
+
+
+def _fetch(params: dict, base_url: str, timeout: int):
+    response = http_client.get(base_url, params=params, timeout=timeout)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if 'error' in data:
+        return None
+    return data
+
+
+async def serpapi_search_async(params: dict, base_url: str = SERPAPI_URL, timeout: int = 15, on_fetch=None):
+    """Async variant of serpapi_search sharing the same response cache"""
+    async def fetch():
+        response = await async_http_client.get(base_url, params=params, timeout=timeout)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        if 'error' in data:
+            return None
+        return data
+
+    return await serpapi_cache.get_or_fetch_async(params, fetch, on_fetch=on_fetch)
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one execution.
+
+    The first caller for a key runs fn(); callers arriving while it is in
+    flight wait and receive the same result (or exception). A caller passing
+    `timeout` stops waiting for someone else's call after that many seconds
+    (TimeoutError); the call itself goes on for the other waiters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'executed': 0, 'saved': 0}
+
+    def do(self, key, fn, timeout: float = None):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats['saved'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError(f"single-flight call {key!r} still running after {timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for the ASGI service layer.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {'executed': 0, 'saved': 0}
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self._stats['saved'] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self._stats['executed'] += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marque l'exception comme lue si personne n'attend
+            raise
+        finally:
+            # Appel annulé : les requêtes en attente sont annulées aussi
+            if not future.done():
+                future.cancel()
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._calls)
+        return stats
+
+
+# Coalescing partagé par les services (clés préfixées par type de recherche)
+upstream_calls = SingleFlight()
+async_upstream_calls = AsyncSingleFlight()
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .models import FlightOffer, HotelOffer, dumps, loads
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'offers.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flight_offers (
+    origin TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    departure_date TEXT NOT NULL,
+    return_date TEXT NOT NULL,
+    price REAL,
+    offer TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_flight_route_date ON flight_offers (origin, destination, departure_date, return_date);
+
+CREATE TABLE IF NOT EXISTS hotel_rates (
+    city TEXT NOT NULL,
+    checkin_date TEXT NOT NULL,
+    checkout_date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    price REAL,
+    offer TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hotel_city_date ON hotel_rates (city, checkin_date, checkout_date, adults);
+"""
+
+
+class OfferStore:
+    """SQLite store of normalized flight offers and hotel rates.
+
+    Each search result set is replaced atomically and stamped with its fetch
+    time, so it can serve as the warm tier under the in-memory SerpAPI cache
+    and survive restarts.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_age: int = 6 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    # Vols
+
+    def save_flights(self, origin: str, destination: str, departure_date: str, return_date: str, offers: list):
+        """Replace the stored offers for one route and date pair"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'DELETE FROM flight_offers WHERE origin = ? AND destination = ? AND departure_date = ? AND return_date = ?',
+                (origin, destination, departure_date, return_date)
+            )
+            conn.executemany(
+                'INSERT INTO flight_offers VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(origin, destination, departure_date, return_date, offer.price, dumps(offer).decode('utf-8'), now) for offer in offers]
+            )
+
+    def get_flights(self, origin: str, destination: str, departure_date: str, return_date: str, max_age: int = None):
+        """Stored offers for a route and date pair sorted by price, or None if absent or too old"""
+        rows = self._connect().execute(
+            'SELECT offer FROM flight_offers WHERE origin = ? AND destination = ? AND departure_date = ? AND return_date = ? '
+            'AND fetched_at >= ? ORDER BY price',
+            (origin, destination, departure_date, return_date, self._cutoff(max_age))
+        ).fetchall()
+        return [FlightOffer.from_dict(loads(row[0])) for row in rows] if rows else None
+
+    def query_flights(self, origin: str, destination: str, date_from: str, date_to: str, max_age: int = None, limit: int = 50):
+        """Cheapest stored offers for a route over a departure date range"""
+        rows = self._connect().execute(
+            'SELECT offer, fetched_at FROM flight_offers WHERE origin = ? AND destination = ? '
+            'AND departure_date BETWEEN ? AND ? AND fetched_at >= ? ORDER BY price LIMIT ?',
+            (origin, destination, date_from, date_to, self._cutoff(max_age), limit)
+        ).fetchall()
+        return [dict(loads(offer), fetched_at=fetched_at) for offer, fetched_at in rows]
+
+    # Hôtels
+
+    def save_hotels(self, city: str, checkin_date: str, checkout_date: str, adults: int, hotels: list):
+        """Replace the stored rates for one city and stay"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                'DELETE FROM hotel_rates WHERE city = ? AND checkin_date = ? AND checkout_date = ? AND adults = ?',
+                (city, checkin_date, checkout_date, adults)
+            )
+            conn.executemany(
+                'INSERT INTO hotel_rates VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(city, checkin_date, checkout_date, adults, hotel.price_numeric, dumps(hotel).decode('utf-8'), now) for hotel in hotels]
+            )
+
+    def get_hotels(self, city: str, checkin_date: str, checkout_date: str, adults: int, max_age: int = None):
+        """Stored rates for a city and stay in insertion order, or None if absent or too old"""
+        rows = self._connect().execute(
+            'SELECT offer FROM hotel_rates WHERE city = ? AND checkin_date = ? AND checkout_date = ? AND adults = ? '
+            'AND fetched_at >= ? ORDER BY rowid',
+            (city, checkin_date, checkout_date, adults, self._cutoff(max_age))
+        ).fetchall()
+        return [HotelOffer.from_dict(loads(row[0])) for row in rows] if rows else None
+
+    def query_hotels(self, city: str, checkin_from: str, checkin_to: str, max_age: int = None, limit: int = 50):
+        """Cheapest stored rates for a city over a check-in date range"""
+        rows = self._connect().execute(
+            'SELECT offer, checkin_date, checkout_date, fetched_at FROM hotel_rates WHERE city = ? '
+            'AND checkin_date BETWEEN ? AND ? AND price IS NOT NULL AND fetched_at >= ? ORDER BY price LIMIT ?',
+            (city, checkin_from, checkin_to, self._cutoff(max_age), limit)
+        ).fetchall()
+        return [
+            dict(loads(offer), checkin_date=checkin, checkout_date=checkout, fetched_at=fetched_at)
+            for offer, checkin, checkout, fetched_at in rows
+        ]
+
+    def purge(self, max_age: int = None):
+        """Delete rows older than max_age (defaults to the store max_age)"""
+        cutoff = self._cutoff(max_age)
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM flight_offers WHERE fetched_at < ?', (cutoff,))
+            conn.execute('DELETE FROM hotel_rates WHERE fetched_at < ?', (cutoff,))
+
+    def _cutoff(self, max_age: int = None) -> float:
+        return time.time() - (self.max_age if max_age is None else max_age)
+
+
+# Store partagé (fichier monté avec ./backend dans docker-compose, donc conservé entre redémarrages)
+offer_store = OfferStore(
+    path=os.environ.get('OFFER_STORE_PATH', DEFAULT_STORE_PATH),
+    max_age=int(os.environ.get('OFFER_STORE_MAX_AGE', 6 * 3600)),
+)
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from .mappings import resolve_destination
+
+
+class TripService:
+    """Fetch flights, hotels and activities for one destination concurrently.
+
+    The destination is resolved once and each search gets `deadline`
+    seconds from the moment it starts running (time queued in a busy pool
+    does not count): sources still running past it, or not started within
+    it, are reported as 'timeout' and their results are dropped from the
+    response (the searches keep running and warm the caches for the next
+    request). The pool runs 3 searches per trip, so max_workers / 3 trips
+    run at once.
+    """
+
+    def __init__(self, flight_service, hotel_service, activity_service, deadline: float = 8.0, max_workers: int = 48):
+        self.flight_service = flight_service
+        self.hotel_service = hotel_service
+        self.activity_service = activity_service
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='trip')
+
+    def plan_trip(self, destination: str, origin: str = 'CDG', checkin_date: str = None, checkout_date: str = None, adults: int = 2, min_stay: int = 4, deadline: float = None):
+        """Return {'destination', 'flights', 'hotels', 'activities', 'sources'}"""
+        resolved = resolve_destination(destination)
+        deadline = self.deadline if deadline is None else deadline
+
+        # Le séjour hôtel fixe les dates du vol quand il est fourni
+        if checkin_date and checkout_date:
+            try:
+                min_stay = (datetime.strptime(checkout_date, '%Y-%m-%d') - datetime.strptime(checkin_date, '%Y-%m-%d')).days
+            except ValueError:
+                pass
+
+        calls = {
+            'flights': lambda: self.flight_service.search_flights(
+                origin_city=origin,
+                destination_city=resolved['iata'],
+                departure_date_from=checkin_date,
+                min_stay_duration=min_stay
+            ),
+            'hotels': lambda: self.hotel_service.search_hotels(
+                destination_city=resolved['city'],
+                checkin_date=checkin_date,
+                checkout_date=checkout_date,
+                adults=adults
+            ),
+            'activities': lambda: self.activity_service.search_activities(destination_city=resolved['city_key']),
+        }
+
+        started = time.perf_counter()
+        starts = {}  # source -> début effectif de la recherche
+        futures = {source: self._executor.submit(self._timed, call, source, starts) for source, call in calls.items()}
+        wait(futures.values(), timeout=deadline)
+        # Sources démarrées en retard (pool occupé) : leur délai court depuis leur début,
+        # celles encore en file après `deadline` sont abandonnées (réponse en 2 × deadline au plus)
+        for source, future in futures.items():
+            begun = starts.get(source)
+            if not future.done() and begun is not None and begun - started <= deadline:
+                wait([future], timeout=max(0, begun + deadline - time.perf_counter()))
+
+        result = {'destination': resolved, 'sources': {}}
+        for source, future in futures.items():
+            if not future.done():
+                future.cancel()
+                result[source] = []
+                result['sources'][source] = {'status': 'timeout', 'elapsed_ms': round((time.perf_counter() - starts.get(source, started)) * 1000)}
+                continue
+            try:
+                data, elapsed = future.result()
+                result[source] = data
+                result['sources'][source] = {'status': 'ok', 'elapsed_ms': round(elapsed * 1000), 'total': len(data)}
+            except Exception as e:
+                print(f"Trip {source} error: {e}")
+                result[source] = []
+                result['sources'][source] = {'status': 'error', 'error': str(e)}
+
+        return result
+
+    @staticmethod
+    def _timed(call, source, starts):
+        started = starts[source] = time.perf_counter()
+        return call(), time.perf_counter() - started
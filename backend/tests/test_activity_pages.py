@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import time
+
+from services import ActivityService, AsyncActivityService
+
+
+class SlowResponse:
+    status_code = 200
+
+    def json(self):
+        return {'status': 'INVALID_REQUEST'}
+
+
+class SlowClient:
+    """Places token that never becomes valid, each request taking up to its timeout"""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        time.sleep(min(timeout, 0.3))
+        return SlowResponse()
+
+
+def service(monkeypatch):
+    client = SlowClient()
+    monkeypatch.setattr(sys.modules['services.activity_service'], 'http_client', client)
+    activities = ActivityService()
+    activities.page_token_delay = 0.05
+    return activities, client
+
+
+def test_token_page_stops_at_the_deadline(monkeypatch):
+    activities, client = service(monkeypatch)
+    started = time.perf_counter()
+    assert activities._load_token_page('token', 'museum', deadline=started + 0.5) is None
+    assert time.perf_counter() - started < 0.6
+    # Délai HTTP borné par le temps restant, jamais les 10 s par défaut
+    assert client.timeouts and all(timeout <= 0.5 for timeout in client.timeouts)
+
+
+def test_inline_continuation_respects_remaining_time(monkeypatch):
+    activities, client = service(monkeypatch)
+    started = time.perf_counter()
+    places = activities._continue_places([{'place_id': 'a', 'rating': 4}], 'token-inline', 'museum', limit=6, remaining=1.2)
+    assert [place['place_id'] for place in places] == ['a']
+    assert time.perf_counter() - started < 1.3
+    # Préchargement en arrière-plan terminé avant de rendre le vrai client HTTP
+    activities._get_prefetch_executor().shutdown(wait=True)
+
+
+class SlowAsyncClient(SlowClient):
+    async def get(self, url, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        await asyncio.sleep(min(timeout, 0.1))
+        return SlowResponse()
+
+
+def async_service(monkeypatch):
+    client = SlowAsyncClient()
+    monkeypatch.setattr(sys.modules['services.async_services'], 'async_http_client', client)
+    activities = AsyncActivityService()
+    activities.page_token_delay = 0.05
+    # Préchargement hors sujet ici (client HTTP synchrone)
+    monkeypatch.setattr(activities, '_prefetch_pages', lambda token, place_type: None)
+    return activities, client
+
+
+def test_async_continuation_stops_when_the_category_is_cancelled(monkeypatch):
+    activities, client = async_service(monkeypatch)
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(
+            activities._continue_places_async([{'place_id': 'a', 'rating': 4}], 'token-cancel', 'museum', limit=6, remaining=5)
+        )
+        await asyncio.sleep(0.3)
+        task.cancel()
+        requests = len(client.timeouts)
+        await asyncio.sleep(0.4)
+        return task.cancelled(), requests, len(client.timeouts)
+
+    cancelled, before, after = asyncio.run(cancel_midway())
+    assert cancelled
+    assert before > 0 and after == before
+
+
+def test_async_continuation_respects_remaining_time(monkeypatch):
+    activities, client = async_service(monkeypatch)
+    started = time.perf_counter()
+    places = asyncio.run(activities._continue_places_async(
+        [{'place_id': 'a', 'rating': 4}], 'token-async', 'museum', limit=6, remaining=1.2
+    ))
+    assert [place['place_id'] for place in places] == ['a']
+    assert time.perf_counter() - started < 1.3
+    assert all(timeout <= 1.2 for timeout in client.timeouts)
@@ -0,0 +1,24 @@
+import pytest
+
+from app import app, flight_service, hotel_service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Sans clé SerpAPI, les services renvoient leurs résultats de secours
+    monkeypatch.setattr(flight_service, 'serpapi_key', None)
+    monkeypatch.setattr(hotel_service, 'serpapi_key', None)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url', [
+    '/api/flights?destination=BCN',
+    '/api/flights?destination=BCN&flexible=1&departure_date_from=2031-01-01&departure_date_to=2031-01-03',
+    '/api/hotels?destination=Paris',
+])
+def test_fallback_results_are_not_cached(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    results = response.json.get('flights') or response.json.get('hotels')
+    assert results and all(result['fallback'] for result in results)
@@ -0,0 +1,44 @@
+import sys
+import threading
+
+from services import FlightOffer, FlightSearchService
+
+
+def offer(price):
+    return FlightOffer(
+        airline='Test Air', departure='CDG', arrival='BCN', departureTime='08:00', arrivalTime='10:00',
+        departureDate='2031-02-01', returnDate='2031-02-05', price=price, duration='2h00', stops=0,
+        booking_link='https://book.example/flight',
+    )
+
+
+def test_offers_are_streamed_while_the_payload_is_parsed(monkeypatch):
+    released = threading.Event()
+
+    def iter_flights(self, data, origin, destination, departure_date, return_date):
+        yield offer(120)
+        # Le reste du payload n'est parsé qu'une fois la première offre partie
+        assert released.wait(2)
+        yield offer(80)
+
+    monkeypatch.setenv('SERPAPI_KEY', 'test')
+    monkeypatch.setattr(sys.modules['services.flight_service'], 'serpapi_search', lambda *args, **kwargs: {})
+    monkeypatch.setattr(FlightSearchService, '_iter_flights', iter_flights)
+    events = FlightSearchService().stream_flights('Paris', 'STREAM1', departure_date_from='2031-02-01')
+
+    first = next(events)
+    assert (first['type'], first['offer'].price) == ('offer', 120)
+    released.set()
+    rest = list(events)
+    assert [event['type'] for event in rest] == ['offer', 'summary']
+    summary = rest[-1]
+    assert [flight.price for flight in summary['flights']] == [80, 120]
+    assert summary['fallback'] is False
+
+
+def test_fallback_flights_only_appear_in_the_summary(monkeypatch):
+    monkeypatch.delenv('SERPAPI_KEY', raising=False)
+    events = list(FlightSearchService().stream_flights('Paris', 'BCN', departure_date_from='2031-02-01'))
+    assert [event['type'] for event in events] == ['summary']
+    assert events[0]['fallback'] is True
+    assert all(flight.fallback for flight in events[0]['flights'])
@@ -0,0 +1,91 @@
+from services import HotelService
+from services.hotel_dedup import HotelDedupIndex
+from services.models import HotelOffer
+
+
+def hotel(name, price, lat=None, lon=None, url=None):
+    return HotelOffer(
+        name=name, rating=4.0, price=f"{price}€", price_numeric=price, image='', description='',
+        amenities=[], booking_url=url or f"https://book.example/{name}", stars=4, reviews=100,
+        latitude=lat, longitude=lon,
+    )
+
+
+def test_chains_on_the_same_street_stay_separate():
+    index = HotelDedupIndex(locality=('Paris',)).extend([
+        hotel('Novotel Paris Gare de Lyon', 180, 48.8443, 2.3736),
+        hotel('Mercure Paris Gare de Lyon', 150, 48.8445, 2.3739),
+    ])
+    assert len(index) == 2
+    assert index.merged == 0
+
+
+def test_city_and_area_words_do_not_identify_a_hotel():
+    index = HotelDedupIndex(locality=('Barcelona',)).extend([
+        hotel('NH Barcelona Centro', 120, 41.3870, 2.1700),
+        hotel('H10 Barcelona Centro', 110, 41.3871, 2.1702),
+    ])
+    assert [h.name for h in index.hotels] == ['NH Barcelona Centro', 'H10 Barcelona Centro']
+
+
+def test_same_brand_different_variant_stays_separate():
+    index = HotelDedupIndex(locality=('Paris',)).extend([
+        hotel('ibis Paris Gare de Lyon Diderot', 110, 48.8440, 2.3740),
+        hotel('ibis Paris Gare de Lyon Reuilly', 100, 48.8442, 2.3743),
+        hotel('ibis budget Paris Gare de Lyon', 80, 48.8441, 2.3741),
+    ])
+    assert len(index) == 3
+
+
+def test_names_made_of_locality_words_must_be_identical():
+    index = HotelDedupIndex(locality=('Paris',)).extend([
+        hotel('Hotel Paris Centre', 90),
+        hotel('Paris Centre Gare', 95),
+    ])
+    assert len(index) == 2
+
+
+def test_same_property_is_merged_with_its_cheapest_offer():
+    index = HotelDedupIndex(locality=('Paris',)).extend([
+        hotel('Novotel Paris Gare de Lyon', 180, 48.8443, 2.3736, url='https://a.example'),
+        hotel('Hôtel Novotel Paris Gare-de-Lyon', 165, 48.8444, 2.3737, url='https://b.example'),
+    ])
+    assert len(index) == 1
+    kept = index.hotels[0]
+    # Le lien de réservation reste associé au nom sous lequel l'offre est listée
+    assert (kept.name, kept.price_numeric, kept.booking_url) == ('Hôtel Novotel Paris Gare-de-Lyon', 165, 'https://b.example')
+
+
+def test_same_name_far_apart_stays_separate():
+    index = HotelDedupIndex().extend([
+        hotel('Hotel Arts', 200, 41.3868, 2.1963),
+        hotel('Hotel Arts', 90, 41.4036, 2.1744),
+    ])
+    assert len(index) == 2
+
+
+def test_unlocated_duplicate_is_merged():
+    index = HotelDedupIndex(locality=('Barcelona',)).extend([
+        hotel('H10 Casanova Barcelona', 130),
+        hotel('H10 Casanova', 120),
+    ])
+    assert len(index) == 1
+    assert index.hotels[0].price_numeric == 120
+
+
+def test_street_name_shared_by_many_hotels_does_not_merge_them():
+    # "Ramblas" revient dans la plupart des noms du jeu : seul la marque distingue les hôtels
+    names = [f'{brand} Ramblas' for brand in ('Alpha', 'Bravo', 'Charlie', 'Delta', 'Echo', 'Foxtrot')]
+    index = HotelDedupIndex().extend([hotel(name, 100 + i) for i, name in enumerate(names)])
+    assert len(index) == len(names)
+
+
+def test_hotels_without_coordinates_are_parsed():
+    page = {'properties': [
+        {'name': 'Hotel Null GPS', 'link': 'https://book.example/null', 'gps_coordinates': None,
+         'rate_per_night': {'extracted_lowest': 120}},
+        {'name': 'Hotel With GPS', 'link': 'https://book.example/gps', 'gps_coordinates': {'latitude': 48.85, 'longitude': 2.35},
+         'rate_per_night': {'extracted_lowest': 140}},
+    ]}
+    hotels = HotelService()._parse_hotels(page)
+    assert [(h.name, h.latitude) for h in hotels] == [('Hotel Null GPS', None), ('Hotel With GPS', 48.85)]
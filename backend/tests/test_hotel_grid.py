@@ -0,0 +1,37 @@
+import sys
+import threading
+
+from services import HotelService, TokenBucket
+
+
+def grid_service(monkeypatch, searches, rate=0):
+    calls = []
+    lock = threading.Lock()
+
+    def serpapi_search(params, base_url=None, timeout=None, on_fetch=None):
+        with lock:
+            calls.append(params)
+        return {'properties': []}
+
+    monkeypatch.setenv('SERPAPI_KEY', 'test')
+    monkeypatch.setattr(sys.modules['services.hotel_service'], 'serpapi_search', serpapi_search)
+    hotels = HotelService()
+    hotels.grid_searches = searches
+    hotels.grid_wait = 0.2
+    hotels.limiter = TokenBucket(rate=rate, capacity=1)
+    return hotels, calls
+
+
+def test_uncached_cells_are_capped_per_grid(monkeypatch):
+    hotels, calls = grid_service(monkeypatch, searches=5)
+    grid = hotels.search_hotels_grid('Grid Budget Town', '2031-03-01', '2031-03-14', nights=[1, 2, 3, 4, 5, 6, 7])
+    assert len(calls) == 5
+    assert grid['skipped'] == 14 * 7 - 5
+
+
+def test_uncached_cells_wait_for_the_shared_quota(monkeypatch):
+    # Un jeton initial puis 10/s : 200 ms de file ne laissent passer que quelques appels
+    hotels, calls = grid_service(monkeypatch, searches=50, rate=10)
+    grid = hotels.search_hotels_grid('Grid Quota Town', '2031-04-01', '2031-04-07', nights=[2, 3, 4])
+    assert 1 <= len(calls) <= 4
+    assert grid['skipped'] == 21 - len(calls)
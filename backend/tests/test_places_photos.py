@@ -0,0 +1,55 @@
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from app import app
+from services import ImageProxy, TokenBucket
+
+
+class PhotoResponse:
+    status_code = 200
+    headers = {'Content-Type': 'image/jpeg'}
+    content = b'\xff\xd8photo'
+
+
+class PhotoClient:
+    def __init__(self):
+        self.fetched = []
+
+    def get(self, url, params=None, timeout=None):
+        self.fetched.append(url)
+        return PhotoResponse()
+
+
+def proxy(monkeypatch, tmp_path, limiter=None):
+    client = PhotoClient()
+    monkeypatch.setattr(sys.modules['services.image_proxy'], 'http_client', client)
+    images = ImageProxy(cache_dir=str(tmp_path), places_key='server-key', places_limiter=limiter, places_wait=0)
+    return images, client
+
+
+def signature(url):
+    return parse_qs(urlsplit(url).query)['sig'][0]
+
+
+def test_only_issued_references_are_fetched(monkeypatch, tmp_path):
+    images, client = proxy(monkeypatch, tmp_path)
+    url = images.places_url_for('issued-ref')
+    assert images.get_places_photo('issued-ref', 400, signature(url)) is not None
+    assert images.get_places_photo('forged-ref', 400, signature(url)) is None
+    assert images.get_places_photo('forged-ref', 400, None) is None
+    assert len(client.fetched) == 1
+
+
+def test_cold_fetches_are_rate_limited(monkeypatch, tmp_path):
+    images, client = proxy(monkeypatch, tmp_path, limiter=TokenBucket(rate=0.001, capacity=1))
+    first, second = (images.places_url_for(ref) for ref in ('ref-1', 'ref-2'))
+    assert images.get_places_photo('ref-1', 400, signature(first)) is not None
+    assert images.get_places_photo('ref-2', 400, signature(second)) is None
+    # Déjà en cache : servie sans jeton
+    assert images.get_places_photo('ref-1', 400, signature(first)) is not None
+    assert len(client.fetched) == 1
+
+
+def test_route_rejects_unsigned_references():
+    response = app.test_client().get('/api/images/places/any-reference?w=400')
+    assert response.status_code == 403
@@ -0,0 +1,37 @@
+from services import POIStore
+from services.pois import METERS_PER_DEG
+
+PARIS = (48.8566, 2.3522)
+
+
+def store(tmp_path):
+    pois = POIStore(path=str(tmp_path / 'pois.db'))
+    pois.mark_covered(*PARIS, 'museum', 15000)
+    return pois
+
+
+def north_of(point, meters):
+    return point[0] + meters / METERS_PER_DEG, point[1]
+
+
+def test_the_fetched_area_is_covered(tmp_path):
+    pois = store(tmp_path)
+    assert pois.is_covered(*PARIS, 'museum', 15000)
+    assert not pois.is_covered(*PARIS, 'park', 15000)
+
+
+def test_smaller_areas_inside_the_fetched_one_are_covered(tmp_path):
+    # Centre dans une autre cellule, mais zone entièrement dans le cercle déjà récupéré
+    pois = store(tmp_path)
+    assert pois.is_covered(*north_of(PARIS, 7000), 'museum', 5000)
+
+
+def test_areas_reaching_past_the_fetched_one_are_not_covered(tmp_path):
+    pois = store(tmp_path)
+    assert not pois.is_covered(*north_of(PARIS, 10000), 'museum', 15000)
+    assert not pois.is_covered(*PARIS, 'museum', 30000)
+
+
+def test_stale_cells_are_not_covered(tmp_path):
+    pois = store(tmp_path)
+    assert not pois.is_covered(*PARIS, 'museum', 15000, max_age=-1)
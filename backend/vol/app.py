@@ -1,8 +1,17 @@
+import os
 from flask import Flask, request, jsonify
 from datetime import datetime
+from ryanair import Ryanair
+from ryanair.SessionManager import SessionManager
 from flight_search import FlightSearch
 from airports import AIRPORTS, THEMES, city_to_iata
 
+# Redirection optionnelle de l'API Ryanair (stub local de backend/benchmarks)
+if os.environ.get('RYANAIR_API_URL'):
+    Ryanair.BASE_SERVICES_API_URL = os.environ['RYANAIR_API_URL']
+if os.environ.get('RYANAIR_SITE_URL'):
+    SessionManager.BASE_SITE_FOR_SESSION_URL = os.environ['RYANAIR_SITE_URL']
+
 app = Flask(__name__)
 flight_search = FlightSearch()
 
@@ -99,7 +108,6 @@ def search():
                 return jsonify({'error': 'Format de return_date invalide. Utiliser YYYY-MM-DD'}), 400
 
         # Rechercher les vols pour cette destination spécifique
-        from ryanair import Ryanair
         ryanair = Ryanair()
 
         results = []
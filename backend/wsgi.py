@@ -0,0 +1,9 @@
+"""
+WSGI entry point for production serving of backend/app.py.
+
+Run with (settings in gunicorn.conf.py, all overridable by env):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app
+
+application = app
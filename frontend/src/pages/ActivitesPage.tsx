@@ -5,6 +5,14 @@ import DestinationMap from '../components/DestinationMap'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000'
 
+// Les images passent par le proxy du backend (/api/images...) : chemin relatif à l'API
+const imageUrl = (image?: string) => {
+  if (!image) return null
+  if (image.startsWith('http')) return image
+  if (image.startsWith('/')) return `${API_BASE_URL}${image}`
+  return null
+}
+
 export default function ActivitesPage() {
   const [searchParams] = useSearchParams()
   const navigate = useNavigate()
@@ -144,9 +152,30 @@ export default function ActivitesPage() {
                   display: 'flex',
                   alignItems: 'center',
                   justifyContent: 'center',
-                  fontSize: '4rem'
+                  fontSize: '4rem',
+                  overflow: 'hidden'
                 }}>
-                  {activity.image}
+                  {imageUrl(activity.image) ? (
+                    <img
+                      src={imageUrl(activity.image)!}
+                      alt={activity.name}
+                      style={{
+                        width: '100%',
+                        height: '100%',
+                        objectFit: 'cover'
+                      }}
+                      onError={(e) => {
+                        // Fallback to emoji if image fails to load
+                        const target = e.target as HTMLElement;
+                        target.style.display = 'none';
+                        if (target.parentElement) {
+                          target.parentElement.innerHTML = '🎫';
+                        }
+                      }}
+                    />
+                  ) : (
+                    activity.image
+                  )}
                 </div>
                 <div style={{ padding: '1.5rem' }}>
                   <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'start', marginBottom: '0.5rem' }}>
@@ -5,6 +5,14 @@ import DestinationMap from '../components/DestinationMap'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || ''
 
+// Les images passent par le proxy du backend (/api/images...) : chemin relatif à l'API
+const imageUrl = (image?: string) => {
+  if (!image) return null
+  if (image.startsWith('http')) return image
+  if (image.startsWith('/')) return `${API_BASE_URL}${image}`
+  return null
+}
+
 export default function HotelsPage() {
   const [searchParams] = useSearchParams()
   const navigate = useNavigate()
@@ -145,9 +153,9 @@ export default function HotelsPage() {
                   overflow: 'hidden',
                   position: 'relative'
                 }}>
-                  {hotel.image && hotel.image.startsWith('http') ? (
+                  {imageUrl(hotel.image) ? (
                     <img
-                      src={hotel.image}
+                      src={imageUrl(hotel.image)!}
                       alt={hotel.name}
                       style={{
                         width: '100%',
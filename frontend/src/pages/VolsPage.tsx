@@ -1,6 +1,5 @@
 import { useSearchParams, useNavigate } from 'react-router-dom'
 import { useState, useEffect } from 'react'
-import axios from 'axios'
 import DestinationMap from '../components/DestinationMap'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000'
@@ -12,6 +11,8 @@ export default function VolsPage() {
   const [flights, setFlights] = useState<any[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
+  // Vols de secours (aucun résultat en direct) : affichés comme prix indicatifs
+  const [estimated, setEstimated] = useState(false)
 
   useEffect(() => {
     if (!destination) {
@@ -21,42 +22,73 @@ export default function VolsPage() {
 
     setLoading(true)
     setError(null)
+    setFlights([])
+    setEstimated(false)
 
-    axios.get(`${API_BASE_URL}/api/flights`, {
-      params: {
-        origin: 'CDG', // Paris par défaut
-        destination: destination,
-        min_stay: 4
-      }
+    // Formater les données pour correspondre au format attendu
+    const formatFlight = (flight: any, index: number) => ({
+      id: index + 1,
+      airline: flight.airline || 'Ryanair',
+      departure: flight.departure || 'Paris CDG',
+      arrival: flight.arrival || destination,
+      departureTime: flight.departureTime || '08:30',
+      arrivalTime: flight.arrivalTime || '10:45',
+      departureDate: flight.departureDate || '',
+      returnDate: flight.returnDate || '',
+      price: flight.price || 0,
+      duration: flight.duration || '2h15',
+      stops: flight.stops || 0,
+      bookingLink: flight.booking_link
     })
-    .then(response => {
-      if (response.data.success) {
-        // Formater les données pour correspondre au format attendu
-        const formattedFlights = response.data.flights.map((flight: any, index: number) => ({
-          id: index + 1,
-          airline: flight.airline || 'Ryanair',
-          departure: flight.departure || 'Paris CDG',
-          arrival: flight.arrival || destination,
-          departureTime: flight.departureTime || '08:30',
-          arrivalTime: flight.arrivalTime || '10:45',
-          departureDate: flight.departureDate || '',
-          returnDate: flight.returnDate || '',
-          price: flight.price || 0,
-          duration: flight.duration || '2h15',
-          stops: flight.stops || 0,
-          bookingLink: flight.booking_link
-        }))
-        setFlights(formattedFlights)
-      } else {
-        setError(response.data.error || 'Erreur lors de la recherche')
+
+    // Flux NDJSON : chaque offre est affichée dès réception, puis le résumé trié remplace la liste
+    const controller = new AbortController()
+    const params = new URLSearchParams({ origin: 'CDG', destination, min_stay: '4' })
+
+    const readStream = async () => {
+      const response = await fetch(`${API_BASE_URL}/api/flights/stream?${params}`, { signal: controller.signal })
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}`)
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      const received: any[] = []
+      let buffer = ''
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        const lines = buffer.split('\n')
+        buffer = lines.pop() || ''
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const event = JSON.parse(line)
+          if (event.type === 'offer') {
+            received.push(event.offer)
+            setFlights(received.map(formatFlight))
+            setLoading(false)
+          } else if (event.type === 'summary') {
+            setFlights(event.flights.map(formatFlight))
+            setEstimated(Boolean(event.fallback))
+          } else if (event.type === 'error') {
+            throw new Error(event.error)
+          }
+        }
       }
       setLoading(false)
-    })
-    .catch(err => {
+    }
+
+    readStream().catch(err => {
+      if (controller.signal.aborted) return
       console.error('Erreur API vols:', err)
       setError('Impossible de charger les vols. Veuillez réessayer.')
       setLoading(false)
     })
+
+    return () => controller.abort()
   }, [destination])
 
   return (
@@ -126,6 +158,11 @@ export default function VolsPage() {
           </div>
         ) : (
           <div style={{ display: 'flex', flexDirection: 'column', gap: '1.5rem' }}>
+            {estimated && (
+              <div style={{ background: '#fef3c7', color: '#92400e', borderRadius: '8px', padding: '1rem 1.5rem' }}>
+                Résultats en direct indisponibles : les vols ci-dessous sont des estimations, vérifiez les prix sur Google Flights.
+              </div>
+            )}
             {flights.map((flight) => (
               <div
                 key={flight.id}
@@ -192,7 +229,7 @@ export default function VolsPage() {
                 </div>
                 <div style={{ textAlign: 'right', marginLeft: '2rem' }}>
                   <div style={{ fontSize: '2rem', fontWeight: 700, color: '#0ea5a4', marginBottom: '0.5rem' }}>
-                    {flight.price}€
+                    {estimated ? `~${flight.price}€` : `${flight.price}€`}
                   </div>
                   <button
                     onClick={() => {
@@ -219,7 +256,7 @@ export default function VolsPage() {
                       e.currentTarget.style.background = '#0ea5a4'
                     }}
                   >
-                    Réserver
+                    {estimated ? 'Voir les vols' : 'Réserver'}
                   </button>
                 </div>
               </div>